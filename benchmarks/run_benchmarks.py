@@ -0,0 +1,200 @@
+"""
+Benchmarks for the scheduling, calendar, analytics, PERT and SimPy hot paths.
+
+    python benchmarks/run_benchmarks.py              # compare against benchmarks/baselines.json
+    python benchmarks/run_benchmarks.py --update     # record new baselines
+    python benchmarks/run_benchmarks.py --quick -k calendar
+
+Each case reports its best wall time over several repeats and, from one extra run under tracemalloc,
+its peak Python memory. A case fails when its time exceeds the baseline by more than --threshold
+(and by more than --min-delta seconds, so tiny cases do not trip on noise); the exit status is then 1.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simpy
+from lab_simulation.core.analytics import summarize_completion
+from lab_simulation.core.compiled_workflow import compile_workflow
+from lab_simulation.core.config_loader import load_config
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.process_runner import run_step
+from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
+from lab_simulation.processes.steps import Step
+from lab_simulation.resources.equipment import Equipment
+from lab_simulation.resources.staff import Staff
+from tests.workflow_fixture import WORKFLOW_COLUMNS, WORKFLOW_ROWS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+BASELINES = os.path.join(HERE, 'baselines.json')
+START = datetime.datetime(2025, 6, 30, 9, 0)
+# Larger sizes are skipped with --quick
+QUICK_LIMIT = 10000
+
+WORKFLOW = [dict(zip(WORKFLOW_COLUMNS, row)) for row in WORKFLOW_ROWS]
+EQUIPMENT = [
+    {'name': 'Micronizing Mill', 'quantity': 2},
+    {'name': 'XRF1', 'quantity': 1},
+    {'name': 'Thin Section Machine', 'quantity': 1},
+    {'name': 'Rock Saw', 'quantity': 1},
+]
+BATCHING = {'enabled': True, 'steps': {'XRF Scan': 10, 'XRD Scan': 6}, 'default_batch_size': 2, 'batch_policy': 'min'}
+
+def _simulation(samples):
+    def run():
+        sim = LabSimulationWithCalendar(calendar=LabCalendar(holiday_list=[]), n_tech=4, n_sci=3, batching=BATCHING, equipment=EQUIPMENT)
+        sim.simulate_sample_set(WORKFLOW, samples, START)
+    return run
+
+def _calendar_pairs(count, years):
+    rng = random.Random(17)
+    span = years * 365 * 24 * 60
+    starts = [START + datetime.timedelta(minutes=rng.randrange(span)) for _ in range(count)]
+    return starts, [rng.randrange(years * 250 * 7 * 60) for _ in range(count)]
+
+def _add_work_minutes(count, years=5):
+    calendar = LabCalendar(holiday_list=[])
+    starts, minutes = _calendar_pairs(count, years)
+    def run():
+        for start, m in zip(starts, minutes):
+            calendar.add_work_minutes(start, m)
+    return run
+
+def _work_minutes_between(count, years=5):
+    calendar = LabCalendar(holiday_list=[])
+    starts, minutes = _calendar_pairs(count, years)
+    # Real spans: each end lies a random number of working minutes after its start
+    ends = [calendar.add_work_minutes(start, m) for start, m in zip(starts, minutes)]
+    def run():
+        for start, end in zip(starts, ends):
+            calendar.work_minutes_between(start, end)
+    return run
+
+def _summarize(samples):
+    calendar = LabCalendar(holiday_list=[])
+    sim = LabSimulationWithCalendar(calendar=calendar, n_tech=4, n_sci=3, batching=BATCHING, equipment=EQUIPMENT)
+    schedule = sim.simulate_schedule(WORKFLOW, samples, START)
+    def run():
+        summarize_completion(schedule, calendar, sim_start_date=START, percentiles=(10, 50, 90, 100))
+    return run
+
+def synthetic_workflow(nodes, fan_in=3, seed=5):
+    """Random layered DAG of `nodes` steps, as workflow CSV rows."""
+    rng = random.Random(seed)
+    names = [f'S{i}' for i in range(nodes)]
+    deps = [rng.sample(names[max(0, i - 50):i], min(i, rng.randint(1, fan_in))) if i else [] for i in range(nodes)]
+    succ = [[] for _ in range(nodes)]
+    for i, ds in enumerate(deps):
+        for d in ds:
+            succ[int(d[1:])].append(names[i])
+    return [dict(zip(WORKFLOW_COLUMNS, [names[i], ';'.join(deps[i]), ';'.join(deps[i]), ';'.join(succ[i]), 'instrument',
+                                        str(rng.randint(5, 600)), '', 'No', 'Yes', '10'])) for i in range(nodes)]
+
+def _pert(nodes):
+    rows = synthetic_workflow(nodes)
+    def run():
+        compile_workflow(rows)
+    return run
+
+def _run_step(samples):
+    config = load_config(os.path.join(REPO, 'rock_analysis_configs.txt'))
+    def run():
+        env = simpy.Environment()
+        equipment = {k: Equipment(env, v['name'], v) for k, v in config['equipment'].items()}
+        staff = {k: Staff(env, v['name'], v) for k, v in config['staff'].items()}
+        steps = {k: Step(v['name'], v) for k, v in config['workflow_steps'].items()}
+        def process():
+            for key in ('sample_receipt', 'rock_cutting', 'micronization'):
+                yield from run_step(env, steps[key], equipment, staff, samples, [])
+        env.process(process())
+        env.run()
+    return run
+
+# (name, sizes, setup(size) -> zero-argument callable)
+CASES = [
+    ('simulate_sample_set', (100, 1000, 10000, 100000), _simulation),
+    ('calendar.add_work_minutes', (10000,), _add_work_minutes),
+    ('calendar.work_minutes_between', (10000,), _work_minutes_between),
+    ('summarize_completion', (10000, 100000), _summarize),
+    ('compile_workflow', (1000, 10000), _pert),
+    ('run_step', (100, 1000), _run_step),
+]
+
+def measure(fn, min_time=0.5, max_repeats=7):
+    """Best wall time over repeats (at least one, until min_time has been spent), then peak memory from one traced run."""
+    times = []
+    total = 0
+    while len(times) < max_repeats and (not times or total < min_time):
+        gc.collect()
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+        total += times[-1]
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), len(times), peak
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('cases', {})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the simulator hot paths against stored baselines.')
+    parser.add_argument('-k', '--filter', help='only cases whose name contains this text')
+    parser.add_argument('--quick', action='store_true', help=f'skip sizes above {QUICK_LIMIT}')
+    parser.add_argument('--baseline', default=BASELINES)
+    parser.add_argument('--update', action='store_true', help='write the measured times as the new baselines')
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed slowdown over baseline (0.5 = 50%%)')
+    parser.add_argument('--min-delta', type=float, default=0.01, help='ignore slowdowns smaller than this many seconds')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baseline)
+    results = {}
+    failures = []
+    print(f"{'case':<36}{'best (s)':>11}{'runs':>6}{'peak MB':>10}{'baseline':>11}{'ratio':>8}")
+    for name, sizes, setup in CASES:
+        for size in sizes:
+            case = f'{name}[{size}]'
+            if args.filter and args.filter not in case:
+                continue
+            if args.quick and size > QUICK_LIMIT:
+                continue
+            best, runs, peak = measure(setup(size))
+            results[case] = {'seconds': round(best, 6), 'peak_mb': round(peak / 2**20, 2)}
+            base = baselines.get(case, {}).get('seconds')
+            ratio = best / base if base else None
+            status = ''
+            if base and best > base * (1 + args.threshold) and best - base > args.min_delta:
+                failures.append(case)
+                status = '  REGRESSION'
+            print(f"{case:<36}{best:>11.4f}{runs:>6}{peak / 2**20:>10.2f}"
+                  f"{(f'{base:.4f}' if base else '-'):>11}{(f'{ratio:.2f}' if ratio else '-'):>8}{status}")
+    if args.update:
+        merged = dict(load_baselines(args.baseline), **results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'cases': merged}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baselines written to {args.baseline}')
+        return 0
+    if failures:
+        print(f"\n{len(failures)} case(s) regressed more than {args.threshold:.0%}: {', '.join(failures)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
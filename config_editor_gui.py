@@ -2,9 +2,75 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 import yaml
 import os
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import collections
 import csv
+import datetime
+import hashlib
+import json
+import queue
+import threading
+from lab_simulation.core.event_sinks import ProgressSink, SimulationCancelled
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.optimizer import max_batch_sizes
+from lab_simulation.core.schedule import from_minutes
+from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
+from visualize_burn import plot_sample_burn
+
+# How often the Tk loop checks a running simulation, and how many finished runs are kept
+SIM_POLL_MS = 100
+SIM_CACHE_SIZE = 8
+SIM_CALENDAR = {'country': 'US', 'work_hours_per_day': 7}
+
+def simulation_inputs(config, workflow_rows, sample_count, start_date):
+    """
+    Scheduler inputs for the edited config: technicians and scientists counted from the staff roles (at least one
+    of each), equipment and instruments as single-unit pools unless they give a quantity, and batch sizes from the
+    workflow's 'Batch?' / 'Max Batch Size' columns.
+    """
+    roles = [(member or {}).get('role', '') for member in (config.get('staff') or {}).values()]
+    n_sci = sum('scientist' in str(role) for role in roles)
+    equipment = []
+    for section in ('equipment', 'instruments'):
+        for name, item in (config.get(section) or {}).items():
+            item = item or {}
+            equipment.append({'name': str(item.get('name') or name), 'quantity': int(item.get('quantity') or 1)})
+    return {
+        'workflow_rows': workflow_rows,
+        'n_tech': max(1, len(roles) - n_sci),
+        'n_sci': max(1, n_sci),
+        'equipment': equipment,
+        'batching': {'enabled': True, 'default_batch_size': 1, 'steps': max_batch_sizes(workflow_rows)},
+        'sample_count': sample_count,
+        'start_date': start_date,
+    }
+
+def simulation_key(inputs):
+    """Content hash of simulation_inputs(), so an unchanged config maps to its cached result."""
+    text = json.dumps(dict(inputs, start_date=inputs['start_date'].isoformat()), sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def run_simulation_job(inputs, cancel, messages):
+    """
+    Worker-thread body: simulate and report through the `messages` queue only (Tk is not thread-safe).
+    Posts ('progress', fraction, partial schedule) while running, then one of
+    ('done', schedule), ('cancelled',) or ('error', exception).
+    """
+    try:
+        # The calendar fills its holidays and day indexes lazily, so the worker gets its own instead of the
+        # process-wide get_calendar() one; the Tk thread draws with a separate instance
+        calendar = LabCalendar(**SIM_CALENDAR)
+        sink = ProgressSink(lambda done, total, partial: messages.put(('progress', done / total if total else 1.0, partial())),
+                            cancel=cancel)
+        sim = LabSimulationWithCalendar(calendar=calendar, n_tech=inputs['n_tech'], n_sci=inputs['n_sci'],
+                                        batching=inputs['batching'], equipment=inputs['equipment'])
+        schedule = sim.simulate_schedule(inputs['workflow_rows'], inputs['sample_count'], inputs['start_date'], sink=sink)
+        messages.put(('done', schedule))
+    except SimulationCancelled:
+        messages.put(('cancelled',))
+    except Exception as e:
+        messages.put(('error', e))
 
 class ConfigEditorGUI:
     def __init__(self, root):
@@ -98,13 +164,28 @@ class ConfigEditorGUI:
 
     def create_simulation_tab(self):
         frame = tk.Frame(self.simulation_tab)
-        frame.pack(fill='both', expand=True)
+        frame.pack(fill='x')
         tk.Label(frame, text='Number of Samples:').grid(row=0, column=0)
         self.sim_samples = tk.Entry(frame)
         self.sim_samples.insert(0, '10')
         self.sim_samples.grid(row=0, column=1)
-        tk.Button(frame, text='Run Simulation', command=self.run_simulation).grid(row=1, column=0, columnspan=2)
-        self.sim_canvas = None
+        tk.Button(frame, text='Run Simulation', command=self.run_simulation).grid(row=1, column=0)
+        tk.Button(frame, text='Cancel', command=self.cancel_simulation).grid(row=1, column=1)
+        self.sim_progress = ttk.Progressbar(frame, maximum=100, length=300)
+        self.sim_progress.grid(row=2, column=0, columnspan=2)
+        self.sim_status = tk.Label(frame, text='')
+        self.sim_status.grid(row=3, column=0, columnspan=2)
+        # One figure and canvas, redrawn in place as results arrive
+        self.sim_figure = Figure(figsize=(8, 4))
+        self.sim_canvas = FigureCanvasTkAgg(self.sim_figure, master=self.simulation_tab)
+        self.sim_canvas.get_tk_widget().pack(fill='both', expand=True)
+        # Finished runs by simulation_key(), most recently used last
+        self.sim_cache = collections.OrderedDict()
+        # Only ever used on the Tk thread (see run_simulation_job)
+        self.sim_calendar = LabCalendar(**SIM_CALENDAR)
+        self.sim_job = None
+        self.sim_shown = None
+        self.tabs.bind('<<NotebookTabChanged>>', self.on_tab_changed)
 
     def open_file(self):
         path = filedialog.askopenfilename(filetypes=[('YAML files', '*.txt *.yaml *.yml')])
@@ -457,32 +538,109 @@ class ConfigEditorGUI:
         d.wait_window()
         return wf
 
+    def simulation_inputs(self):
+        workflow_rows = [{col: str(value) for col, value in zip(self.wf_table['columns'], self.wf_table.item(row_id)['values'])}
+                         for row_id in self.wf_table.get_children()]
+        # Start of today's working day, so a rerun on the same day hits the cache
+        start_date = datetime.datetime.combine(datetime.date.today(), datetime.time(9, 0))
+        return simulation_inputs(self.config, workflow_rows, int(self.sim_samples.get()), start_date)
+
     def run_simulation(self):
-        # Dummy simulation: generate burn chart data by work type and day
-        import random
-        num_samples = int(self.sim_samples.get())
-        work_types = ['Sample Entry', 'Sample Preparation', 'Measurement', 'Data Analysis', 'Data Review', 'Reporting']
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
-        burn_data = {wt: [0]*len(days) for wt in work_types}
-        for s in range(num_samples):
-            for i, wt in enumerate(work_types):
-                day = random.randint(0, len(days)-1)
-                burn_data[wt][day] += 1
-        # Calculate % total work per day
-        total_work = num_samples * len(work_types)
-        percent_burn = [sum(burn_data[wt][d] for wt in work_types)/total_work*100 for d in range(len(days))]
-        # Plot
-        fig, ax = plt.subplots(figsize=(8,4))
-        ax.plot(days, percent_burn, marker='o', label='Planned % Work Complete')
-        ax.set_ylabel('% Total Work Complete')
-        ax.set_xlabel('Day of Week')
-        ax.set_title('Burn Chart: Planned Activity')
-        ax.legend()
-        if self.sim_canvas:
-            self.sim_canvas.get_tk_widget().destroy()
-        self.sim_canvas = FigureCanvasTkAgg(fig, master=self.simulation_tab)
-        self.sim_canvas.draw()
-        self.sim_canvas.get_tk_widget().pack(fill='both', expand=True)
+        try:
+            inputs = self.simulation_inputs()
+        except ValueError:
+            messagebox.showerror('Simulation', 'Number of Samples must be a whole number')
+            return
+        if not inputs['workflow_rows']:
+            messagebox.showerror('Simulation', 'Import or add workflow steps first')
+            return
+        key = simulation_key(inputs)
+        if key in self.sim_cache:
+            self.show_simulation(key)
+            return
+        if self.sim_job is not None:
+            if self.sim_job['key'] == key:
+                return
+            self.sim_job['cancel'].set()
+        self.sim_job = {'key': key, 'cancel': threading.Event(), 'messages': queue.Queue()}
+        threading.Thread(target=run_simulation_job, args=(inputs, self.sim_job['cancel'], self.sim_job['messages']), daemon=True).start()
+        self.sim_progress['value'] = 0
+        self.sim_status.config(text='Simulating...')
+        self.root.after(SIM_POLL_MS, self.poll_simulation, self.sim_job)
+
+    def cancel_simulation(self):
+        if self.sim_job is not None:
+            self.sim_job['cancel'].set()
+            self.sim_status.config(text='Cancelling...')
+
+    def poll_simulation(self, job):
+        # Runs on the Tk loop: drain the worker's messages, drawing only the newest partial schedule
+        if job is not self.sim_job:
+            return
+        partial = None
+        while True:
+            try:
+                message = job['messages'].get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'progress':
+                self.sim_progress['value'] = message[1] * 100
+                partial = message[2]
+            elif kind == 'done':
+                self.sim_job = None
+                self.sim_cache[job['key']] = message[1]
+                while len(self.sim_cache) > SIM_CACHE_SIZE:
+                    self.sim_cache.popitem(last=False)
+                self.show_simulation(job['key'])
+                return
+            else:
+                self.sim_job = None
+                self.sim_progress['value'] = 0
+                if kind == 'cancelled':
+                    self.sim_status.config(text='Simulation cancelled')
+                else:
+                    self.sim_status.config(text='Simulation failed')
+                    messagebox.showerror('Simulation', str(message[1]))
+                return
+        if partial is not None:
+            self.draw_schedule(partial)
+            self.sim_status.config(text=f'Simulating... {self.sim_progress["value"]:.0f}%')
+        self.root.after(SIM_POLL_MS, self.poll_simulation, job)
+
+    def show_simulation(self, key):
+        self.sim_cache.move_to_end(key)
+        schedule = self.sim_cache[key]
+        self.draw_schedule(schedule)
+        self.sim_shown = key
+        self.sim_progress['value'] = 100
+        if len(schedule):
+            self.sim_status.config(text=f'Done: last sample finishes {from_minutes(int(schedule.end.max())):%Y-%m-%d %H:%M}')
+        else:
+            self.sim_status.config(text='Done: nothing scheduled')
+
+    def draw_schedule(self, schedule):
+        self.sim_figure.clear()
+        if len(schedule):
+            ax = self.sim_figure.add_subplot()
+            plot_sample_burn(schedule, self.sim_calendar, ax=ax)
+            self.sim_figure.tight_layout()
+        self.sim_canvas.draw_idle()
+
+    def on_tab_changed(self, event):
+        # Coming back to the Simulation tab shows the cached result for the current config; it never reruns
+        if self.tabs.select() != str(self.simulation_tab) or self.sim_job is not None:
+            return
+        try:
+            key = simulation_key(self.simulation_inputs())
+        except ValueError:
+            return
+        if key == self.sim_shown:
+            return
+        if key in self.sim_cache:
+            self.show_simulation(key)
+        elif self.sim_shown is not None:
+            self.sim_status.config(text='Config changed since the chart was drawn; press Run Simulation to update it')
 
 if __name__ == '__main__':
     root = tk.Tk()
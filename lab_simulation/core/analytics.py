@@ -0,0 +1,114 @@
+# Completion analytics for planned schedules
+import numpy as np
+from .schedule import MINUTES_PER_DAY, ScheduleTable, day_to_date
+
+DEFAULT_PERCENTILES = (50, 100)
+
+def _percent_key(p):
+    return f'{p:g}'
+
+def completion_curve(schedule):
+    """
+    Cumulative number of samples finished by each day on which a sample finishes.
+    schedule: ScheduleTable, ScheduleStats, or the sample_events dict from simulate_sample_set.
+    Returns (day numbers, cumulative counts) as NumPy arrays; day numbers convert with schedule.day_to_date.
+    """
+    if isinstance(schedule, dict):
+        schedule = ScheduleTable.from_sample_events(schedule)
+    last_ends = schedule.last_end_by_sample()
+    # Samples without any event never finish
+    days, counts = np.unique(last_ends[last_ends >= 0] // MINUTES_PER_DAY, return_counts=True)
+    return days, np.cumsum(counts)
+
+def milestone_dates(schedule, percentiles=DEFAULT_PERCENTILES):
+    """{percentile: first date by which at least that share of samples has finished, or None}."""
+    if isinstance(schedule, dict):
+        schedule = ScheduleTable.from_sample_events(schedule)
+    days, done = completion_curve(schedule)
+    total = schedule.sample_count
+    result = {}
+    for p in percentiles:
+        if p <= 0:
+            first_end = schedule.first_end()
+            result[p] = day_to_date(first_end // MINUTES_PER_DAY) if first_end is not None else None
+            continue
+        i = int(np.searchsorted(done, total * p / 100, side='left'))
+        result[p] = day_to_date(days[i]) if i < len(days) else None
+    return result
+
+def summarize_completion(schedule, calendar, sim_start_date=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Returns a dict with business days to each completion percentile (50% and 100% by default),
+    keyed 'business_days_to_<p>' and 'date_<p>'.
+    schedule: ScheduleTable, ScheduleStats, or the sample_events dict from simulate_sample_set.
+    Business days are counted from the simulation start date (or the earliest planned end) to the milestone, inclusive.
+    """
+    if isinstance(schedule, dict):
+        schedule = ScheduleTable.from_sample_events(schedule)
+    dates = milestone_dates(schedule, percentiles)
+    # Use the true simulation start date
+    if sim_start_date is not None:
+        start_date = sim_start_date.date()
+    else:
+        first_end = schedule.first_end()
+        start_date = day_to_date(first_end // MINUTES_PER_DAY) if first_end is not None else None
+    summary = {}
+    for p in percentiles:
+        summary[f'business_days_to_{_percent_key(p)}'] = calendar.business_days_between(start_date, dates[p])
+    for p in percentiles:
+        summary[f'date_{_percent_key(p)}'] = dates[p]
+    return summary
+
+class DailyActivity:
+    """
+    Step x day activity for burn charts, indexed by every day on which some sample-step starts or ends.
+    active[s, i]: sample-steps of step s in progress on day i (start day <= day <= end day).
+    completed[s, i]: sample-steps of step s finishing on day i.
+    Rows are the steps that have events, in the order they first appear in the schedule.
+    """
+    def __init__(self, steps, days, active, completed):
+        self.steps = list(steps)
+        self.days = days
+        self.active = active
+        self.completed = completed
+
+    @classmethod
+    def from_schedule(cls, schedule):
+        """Build both matrices in one pass with difference arrays over the day index."""
+        if isinstance(schedule, dict):
+            schedule = ScheduleTable.from_sample_events(schedule)
+        start_days = schedule.start_days()
+        end_days = schedule.end_days()
+        days = np.union1d(start_days, end_days)
+        used, first_rows = np.unique(schedule.step, return_index=True)
+        used = used[np.argsort(first_rows)]
+        row_of = np.zeros(len(schedule.steps), dtype=np.intp)
+        row_of[used] = np.arange(len(used))
+        rows = row_of[schedule.step]
+        start_idx = np.searchsorted(days, start_days)
+        end_idx = np.searchsorted(days, end_days)
+        # +1 where an event starts, -1 the day after it ends; a running sum gives the active count
+        diff = np.zeros((len(used), len(days) + 1), dtype=np.int64)
+        np.add.at(diff, (rows, start_idx), 1)
+        np.add.at(diff, (rows, end_idx + 1), -1)
+        active = np.cumsum(diff, axis=1)[:, :-1]
+        completed = np.zeros((len(used), len(days)), dtype=np.int64)
+        np.add.at(completed, (rows, end_idx), 1)
+        return cls([schedule.steps[s] for s in used], days, active, completed)
+
+    def dates(self):
+        return [day_to_date(d) for d in self.days]
+
+    def day_numbers(self):
+        """Calendar days since the first indexed day."""
+        return self.days - self.days[0] if len(self.days) else self.days
+
+    def cumulative_activity(self):
+        """Running total of active[s, :] per step (the per-step burn-up)."""
+        return np.cumsum(self.active, axis=1)
+
+    def percent_complete(self):
+        """Cumulative share of all sample-steps finished by each day, in percent."""
+        done = np.cumsum(self.completed.sum(axis=0))
+        total = done[-1] if len(done) else 0
+        return done / total * 100 if total else done.astype(float)
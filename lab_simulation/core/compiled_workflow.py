@@ -0,0 +1,263 @@
+# Workflow CSV compiled once into integer ids, adjacency arrays and PERT values
+import collections
+import csv
+import functools
+import hashlib
+import io
+import os
+import pickle
+import numpy as np
+
+CACHE_VERSION = 3
+# Per-user cache, so nothing is written next to the CSV (the repository root for the shipped workflow)
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'lab_simulation', 'workflows')
+START, STOP = 'START', 'STOP'
+# Presentation terminals attached when these steps exist
+FIRST_STEP, LAST_STEP = 'Sample Entry', 'Report'
+
+# Compiled workflows by CSV content hash, for this process
+_MEMO = {}
+
+def split_names(value):
+    """Step names from a 'Previous Task'/'Dependencies'/'Next Task' cell (';' or ',' separated, 'none' ignored)."""
+    names = []
+    for name in (value or '').replace(';', ',').split(','):
+        name = name.strip()
+        if name and name.lower() != 'none' and name not in names:
+            names.append(name)
+    return names
+
+def _minutes(value):
+    # Blank times (terminals, placeholder rows) count as zero
+    value = (value or '').strip()
+    return int(value) if value else 0
+
+def _terminal_type(name):
+    return 'start' if name == START else 'stop' if name == STOP else ''
+
+def _csr(lists):
+    ptr = np.zeros(len(lists) + 1, dtype=np.int32)
+    ptr[1:] = np.cumsum([len(ids) for ids in lists])
+    ids = np.fromiter((i for ids in lists for i in ids), dtype=np.int32, count=int(ptr[-1]))
+    return ptr, ids
+
+class CompiledWorkflow:
+    """
+    A workflow table with one integer id per distinct step name, in first-appearance order.
+    Names referenced by other steps but never defined get ids after the defined steps, with zero duration.
+    When a name appears on several rows, the last row supplies its attributes.
+    Adjacency is stored as CSR arrays (ptr, ids): the entries of node n are ids[ptr[n]:ptr[n+1]].
+      prev/deps/next: the 'Previous Task', 'Dependencies' and 'Next Task' columns
+      succ/pred: the network edges, 'Next Task' links plus 'Dependencies' joins, with START/STOP terminals
+    The topological order, PERT values (es, ef, ls, lf, slack) and the critical path are over the network edges,
+    in minutes. They are computed on first use, so the scheduler, which only follows 'Dependencies', also runs
+    workflows whose 'Next Task' links form a loop.
+    """
+    def __init__(self, rows):
+        self.rows = [dict(r) for r in rows]
+        self.steps = []
+        self.index = {}
+        for row in self.rows:
+            self._node(row['Step Name'])
+        self.n_defined = len(self.steps)
+        self.row_nodes = np.array([self.index[row['Step Name']] for row in self.rows], dtype=np.int32)
+        node_rows = {}
+        for i, row in enumerate(self.rows):
+            node_rows[self.index[row['Step Name']]] = i
+        prev, deps, nxt = [], [], []
+        for n in range(self.n_defined):
+            row = self.rows[node_rows[n]]
+            prev.append([self._node(name) for name in split_names(row.get('Previous Task'))])
+            deps.append([self._node(name) for name in split_names(row.get('Dependencies'))])
+            nxt.append([self._node(name) for name in split_names(row.get('Next Task'))])
+        # Network edges in discovery order
+        edges = []
+        seen = set()
+        def add_edge(u, v):
+            if (u, v) not in seen:
+                seen.add((u, v))
+                edges.append((u, v))
+        for n in range(self.n_defined):
+            for v in nxt[n]:
+                add_edge(n, v)
+            for d in deps[n]:
+                add_edge(d, n)
+        if FIRST_STEP in self.index:
+            add_edge(self._node(START), self.index[FIRST_STEP])
+        if LAST_STEP in self.index:
+            add_edge(self.index[LAST_STEP], self._node(STOP))
+        n_nodes = len(self.steps)
+        for lists in (prev, deps, nxt):
+            lists.extend([] for _ in range(n_nodes - len(lists)))
+        self.node_rows = [node_rows.get(n) for n in range(n_nodes)]
+        self.task_types = [self.rows[r]['Task Type'] if r is not None else _terminal_type(self.steps[n]) for n, r in enumerate(self.node_rows)]
+        self.durations = np.array([_minutes(self.rows[r]['Time (min)']) if r is not None else 0 for r in self.node_rows], dtype=np.int64)
+        self.prev_ptr, self.prev_ids = _csr(prev)
+        self.dep_ptr, self.dep_ids = _csr(deps)
+        self.next_ptr, self.next_ids = _csr(nxt)
+        succ = [[] for _ in range(n_nodes)]
+        pred = [[] for _ in range(n_nodes)]
+        for u, v in edges:
+            succ[u].append(v)
+            pred[v].append(u)
+        self.succ_ptr, self.succ_ids = _csr(succ)
+        self.pred_ptr, self.pred_ids = _csr(pred)
+
+    def _node(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.steps)
+            self.steps.append(name)
+        return self.index[name]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f"<CompiledWorkflow {self.n_defined} steps, {len(self.succ_ids)} edges>"
+
+    @classmethod
+    def from_csv_text(cls, text):
+        return cls(csv.DictReader(io.StringIO(text, newline='')))
+
+    def row(self, node):
+        """CSV row for a node (None for START/STOP and undefined names)."""
+        r = self.node_rows[node]
+        return self.rows[r] if r is not None else None
+
+    def _names(self, ptr, ids, node):
+        return [self.steps[i] for i in ids[ptr[node]:ptr[node + 1]]]
+
+    def previous(self, node):
+        return self._names(self.prev_ptr, self.prev_ids, node)
+
+    def dependencies(self, node):
+        return self._names(self.dep_ptr, self.dep_ids, node)
+
+    def next_tasks(self, node):
+        return self._names(self.next_ptr, self.next_ids, node)
+
+    def successors(self, node):
+        return self.succ_ids[self.succ_ptr[node]:self.succ_ptr[node + 1]]
+
+    def predecessors(self, node):
+        return self.pred_ids[self.pred_ptr[node]:self.pred_ptr[node + 1]]
+
+    def edges(self):
+        """Network edges as (source name, target name) pairs."""
+        return [(self.steps[u], self.steps[v]) for u in range(len(self.steps)) for v in self.successors(u)]
+
+    @functools.cached_property
+    def topo_order(self):
+        # Kahn's algorithm, taking ready nodes in id order
+        indegree = np.diff(self.pred_ptr).tolist()
+        ready = collections.deque(n for n in range(len(self.steps)) if indegree[n] == 0)
+        order = []
+        while ready:
+            n = ready.popleft()
+            order.append(n)
+            for v in self.successors(n).tolist():
+                indegree[v] -= 1
+                if indegree[v] == 0:
+                    ready.append(v)
+        if len(order) != len(self.steps):
+            raise ValueError('Workflow network has a cycle')
+        return np.array(order, dtype=np.int32)
+
+    def generations(self):
+        """Nodes grouped by longest distance (in edges) from a source, for layered layouts."""
+        depth = [0]*len(self.steps)
+        for n in self.topo_order.tolist():
+            for v in self.successors(n).tolist():
+                depth[v] = max(depth[v], depth[n] + 1)
+        layers = [[] for _ in range(max(depth, default=-1) + 1)]
+        for n in self.topo_order.tolist():
+            layers[depth[n]].append(n)
+        return layers
+
+    @functools.cached_property
+    def _pert(self):
+        n_nodes = len(self.steps)
+        dur = self.durations.tolist()
+        es, ef = [0]*n_nodes, [0]*n_nodes
+        # Longest path to each node: (length, predecessor on the path)
+        best = [(0, None)]*n_nodes
+        order = self.topo_order.tolist()
+        for n in order:
+            preds = self.predecessors(n).tolist()
+            es[n] = max((ef[p] for p in preds), default=0)
+            ef[n] = es[n] + dur[n]
+            if preds:
+                p = max(preds, key=lambda p: best[p][0] + dur[p])
+                best[n] = (best[p][0] + dur[p], p)
+        max_ef = max(ef, default=0)
+        ls, lf = [max_ef]*n_nodes, [max_ef]*n_nodes
+        for n in reversed(order):
+            lf[n] = min((ls[s] for s in self.successors(n).tolist()), default=max_ef)
+            ls[n] = lf[n] - dur[n]
+        pert = dict(zip(('es', 'ef', 'ls', 'lf'), (np.array(v, dtype=np.int64) for v in (es, ef, ls, lf))))
+        pert['slack'] = pert['ls'] - pert['es']
+        path = []
+        if n_nodes:
+            # Walk back from the node that finishes last (its own duration counts, not just its start)
+            node = max(order, key=lambda n: best[n][0] + dur[n])
+            while node is not None:
+                path.append(node)
+                node = best[node][1]
+        pert['critical_path'] = np.array(path[::-1], dtype=np.int32)
+        return pert
+
+    es = property(lambda self: self._pert['es'])
+    ef = property(lambda self: self._pert['ef'])
+    ls = property(lambda self: self._pert['ls'])
+    lf = property(lambda self: self._pert['lf'])
+    slack = property(lambda self: self._pert['slack'])
+    critical_path = property(lambda self: self._pert['critical_path'])
+
+    def critical_names(self):
+        return [self.steps[n] for n in self.critical_path]
+
+    def critical_edges(self):
+        cp = self.critical_names()
+        return set(zip(cp, cp[1:]))
+
+def compile_workflow(workflow_steps):
+    """Compile workflow rows (dicts as from csv.DictReader); a CompiledWorkflow is returned unchanged."""
+    if isinstance(workflow_steps, CompiledWorkflow):
+        return workflow_steps
+    return CompiledWorkflow(workflow_steps)
+
+def workflow_rows(workflow_steps):
+    """The CSV rows of either a CompiledWorkflow or a plain list of row dicts."""
+    return workflow_steps.rows if isinstance(workflow_steps, CompiledWorkflow) else workflow_steps
+
+def load_workflow(path, cache_dir=None):
+    """
+    Compiled workflow for a CSV file, cached on disk under cache_dir (default: CACHE_DIR, in the user's cache directory)
+    keyed by the SHA-256 of the file contents, and in memory for this process.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest in _MEMO:
+        return _MEMO[digest]
+    cache_dir = cache_dir or CACHE_DIR
+    cache_file = os.path.join(cache_dir, f'v{CACHE_VERSION}-{digest}.pkl')
+    workflow = None
+    try:
+        with open(cache_file, 'rb') as f:
+            workflow = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    if not isinstance(workflow, CompiledWorkflow):
+        workflow = CompiledWorkflow.from_csv_text(data.decode('utf-8-sig'))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f'{cache_file}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(workflow, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_file)
+        except OSError:
+            # A read-only location just means no disk cache
+            pass
+    _MEMO[digest] = workflow
+    return workflow
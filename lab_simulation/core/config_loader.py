@@ -1,11 +1,107 @@
-import yaml
+import hashlib
+import os
+import pickle
 import re
+import yaml
+
+# libyaml's loader when PyYAML was built with it
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+SNAPSHOT_VERSION = 2
+# Per-user cache, so nothing is written next to the configs
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'lab_simulation', 'configs')
 
+# Pickled configs by (path, mtime_ns, size), for this process
+_SNAPSHOTS = {}
 
-def load_config(path):
-    """Load YAML config, stripping comments."""
+
+def _parse(path):
     with open(path, 'r', encoding='utf-8') as f:
         content = f.read()
     # Remove comments
     content = re.sub(r'(?m)^\s*#.*\n?', '', content)
-    return yaml.safe_load(content)
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def _file_key(path):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+def _snapshot_file(key, cache_dir):
+    # One snapshot per absolute path, so same-named configs in different directories don't overwrite each other
+    path = key[0]
+    name = re.sub(r'[^A-Za-z0-9_.-]', '_', os.path.basename(path))
+    digest = hashlib.sha256(path.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir or CACHE_DIR, f'{name}-{digest}.pkl')
+
+
+def _snapshot_header(key, data):
+    return {'version': SNAPSHOT_VERSION, 'key': key, 'length': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+
+def _read_snapshot(key, cache_dir):
+    # A snapshot is only used if its header matches the file's current path, mtime and size,
+    # and the body has the length and SHA-256 recorded when it was written
+    try:
+        with open(_snapshot_file(key, cache_dir), 'rb') as f:
+            header = pickle.load(f)
+            data = f.read()
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if header != _snapshot_header(key, data):
+        return None
+    return data
+
+
+def _remove_snapshot(key, cache_dir):
+    try:
+        os.remove(_snapshot_file(key, cache_dir))
+    except OSError:
+        pass
+
+
+def _write_snapshot(key, data, cache_dir):
+    target = _snapshot_file(key, cache_dir)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f'{target}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(_snapshot_header(key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.write(data)
+        os.replace(tmp, target)
+    except OSError:
+        # A read-only location just means no disk snapshot
+        pass
+
+
+def _pickled_config(path, cache_dir=None):
+    """
+    (key, config) for a YAML file, key being (absolute path, mtime_ns, size) and config a fresh copy.
+    Served from this process's memo of pickled configs, then from the disk snapshot, and only then parsed.
+    A snapshot that does not unpickle is deleted and rebuilt from the file.
+    """
+    key = _file_key(path)
+    data = _SNAPSHOTS.get(key)
+    if data is not None:
+        return key, pickle.loads(data)
+    data = _read_snapshot(key, cache_dir)
+    if data is not None:
+        try:
+            config = pickle.loads(data)
+        except Exception:
+            _remove_snapshot(key, cache_dir)
+            data = None
+    if data is None:
+        config = _parse(path)
+        data = pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+        _write_snapshot(key, data, cache_dir)
+    _SNAPSHOTS[key] = data
+    return key, config
+
+
+def load_config(path, cache=True, cache_dir=None):
+    """Load YAML config, stripping comments. Each call returns a fresh copy, so callers may modify it."""
+    if not cache:
+        return _parse(path)
+    return _pickled_config(path, cache_dir)[1]
@@ -0,0 +1,221 @@
+# Event sinks and online summary accumulators for the calendar scheduler
+import abc
+import array
+import csv
+import json
+import os
+import struct
+import time
+import numpy as np
+from .analytics import milestone_dates
+from .schedule import ROLES, ScheduleBuilder, ScheduleTable, from_minutes
+
+BINARY_MAGIC = b'LABSCHED'
+BINARY_VERSION = 1
+# One record per sample-step: sample, step, start, end, duration, role
+BINARY_RECORD = struct.Struct('<ihqqib')
+BINARY_DTYPE = np.dtype([('sample', '<i4'), ('step', '<i2'), ('start', '<i8'), ('end', '<i8'), ('duration', '<i4'), ('role', 'i1')])
+
+class EventSink(abc.ABC):
+    """
+    Receives planned batches as the scheduler emits them.
+    Times are whole minutes since schedule.EPOCH; role is an index into schedule.ROLES.
+    A run ends with close() when it completes, or abort() when it raises.
+    """
+    def open(self, steps, sample_count):
+        self.steps = list(steps)
+        self.sample_count = sample_count
+
+    @abc.abstractmethod
+    def write_batch(self, step_id, samples, start, end, duration, role):
+        pass
+
+    def close(self):
+        return None
+
+    def abort(self):
+        pass
+
+class MemorySink(EventSink):
+    """Collects events in memory; close() returns a ScheduleTable."""
+    def open(self, steps, sample_count):
+        super().open(steps, sample_count)
+        self.builder = ScheduleBuilder(steps, sample_count)
+
+    def write_batch(self, step_id, samples, start, end, duration, role):
+        self.builder.add_batch(step_id, samples, start, end, duration, role)
+
+    def close(self):
+        return self.builder.build()
+
+class SimulationCancelled(Exception):
+    """Raised out of simulate_schedule when a ProgressSink's cancel flag is set."""
+
+class ProgressSink(MemorySink):
+    """
+    MemorySink for runs watched from another thread.
+    on_progress(done, total, partial) is called at most every `interval` seconds, and once more on close(), with the
+    sample-steps planned so far and the total expected. partial() returns a ScheduleTable of everything planned so far;
+    it copies every row, so the table is only built when the callback asks for it.
+    cancel: anything with is_set() (e.g. a threading.Event), checked before every batch.
+    """
+    def __init__(self, on_progress=None, cancel=None, interval=0.5):
+        self.on_progress = on_progress
+        self.cancel = cancel
+        self.interval = interval
+
+    def open(self, steps, sample_count):
+        super().open(steps, sample_count)
+        self.total = len(self.steps) * sample_count
+        self.done = 0
+        self._reported = time.monotonic()
+
+    def write_batch(self, step_id, samples, start, end, duration, role):
+        if self.cancel is not None and self.cancel.is_set():
+            raise SimulationCancelled()
+        super().write_batch(step_id, samples, start, end, duration, role)
+        self.done += len(samples)
+        if self.on_progress is not None and time.monotonic() - self._reported >= self.interval:
+            self.on_progress(self.done, self.total, self.builder.build)
+            self._reported = time.monotonic()
+
+    def close(self):
+        table = super().close()
+        if self.on_progress is not None:
+            self.on_progress(self.done, self.total, lambda: table)
+        return table
+
+class _FileSink(EventSink):
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._times = {}
+
+    def _iso(self, minutes):
+        # Batches share start/end times, so formatting is cached
+        text = self._times.get(minutes)
+        if text is None:
+            if len(self._times) > 100000:
+                self._times.clear()
+            text = self._times[minutes] = from_minutes(minutes).isoformat()
+        return text
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self.path
+
+    def abort(self):
+        # Close and remove the partial file
+        if self._file is not None:
+            self.close()
+            os.remove(self.path)
+
+class CsvSink(_FileSink):
+    """One CSV row per sample-step."""
+    def open(self, steps, sample_count):
+        super().open(steps, sample_count)
+        self._file = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['sample', 'step', 'planned_start', 'planned_end', 'duration', 'staff_role'])
+
+    def write_batch(self, step_id, samples, start, end, duration, role):
+        step, start, end, role = self.steps[step_id], self._iso(start), self._iso(end), ROLES[role]
+        self._writer.writerows((idx, step, start, end, duration, role) for idx in samples)
+
+class JsonlSink(_FileSink):
+    """One JSON object per batch, listing the samples it contains."""
+    def open(self, steps, sample_count):
+        super().open(steps, sample_count)
+        self._file = open(self.path, 'w', encoding='utf-8')
+
+    def write_batch(self, step_id, samples, start, end, duration, role):
+        self._file.write(json.dumps({
+            'step': self.steps[step_id],
+            'samples': list(samples),
+            'planned_start': self._iso(start),
+            'planned_end': self._iso(end),
+            'duration': duration,
+            'staff_role': ROLES[role],
+        }) + '\n')
+
+class BinarySink(_FileSink):
+    """
+    Compact fixed-size records (27 bytes per sample-step) after a small JSON header.
+    Read back with read_binary_schedule().
+    """
+    def open(self, steps, sample_count):
+        super().open(steps, sample_count)
+        self._file = open(self.path, 'wb')
+        header = json.dumps({'version': BINARY_VERSION, 'steps': self.steps, 'sample_count': sample_count, 'roles': list(ROLES)}).encode('utf-8')
+        self._file.write(BINARY_MAGIC + struct.pack('<I', len(header)) + header)
+
+    def write_batch(self, step_id, samples, start, end, duration, role):
+        pack = BINARY_RECORD.pack
+        self._file.write(b''.join(pack(idx, step_id, start, end, duration, role) for idx in samples))
+
+def read_binary_schedule(path):
+    """Load a BinarySink file as a ScheduleTable."""
+    with open(path, 'rb') as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f'{path} is not a binary schedule file')
+        (length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(length).decode('utf-8'))
+        records = np.fromfile(f, dtype=BINARY_DTYPE)
+    return ScheduleTable(header['steps'], header['sample_count'], records['sample'], records['step'],
+                         records['start'], records['end'], records['duration'], records['role'])
+
+class ScheduleStats:
+    """
+    Online accumulators updated batch by batch: per-step batch/sample counts, first start, last end
+    and each sample's latest end. Memory grows with samples, not samples x steps.
+    """
+    def __init__(self, steps, sample_count):
+        self.steps = list(steps)
+        self.sample_count = sample_count
+        self.batches = [0]*len(self.steps)
+        self.samples = [0]*len(self.steps)
+        self.first_start = None
+        self.first_end_minutes = None
+        self.last_end = None
+        self._last_end = array.array('q', [-1])*sample_count
+
+    def add_batch(self, step_id, samples, start, end):
+        self.batches[step_id] += 1
+        self.samples[step_id] += len(samples)
+        if self.first_start is None or start < self.first_start:
+            self.first_start = start
+        if self.first_end_minutes is None or end < self.first_end_minutes:
+            self.first_end_minutes = end
+        if self.last_end is None or end > self.last_end:
+            self.last_end = end
+        last = self._last_end
+        for idx in samples:
+            if end > last[idx]:
+                last[idx] = end
+
+    def copy(self):
+        stats = ScheduleStats.__new__(ScheduleStats)
+        stats.__dict__.update(self.__dict__)
+        stats.steps = list(self.steps)
+        stats.batches = list(self.batches)
+        stats.samples = list(self.samples)
+        stats._last_end = array.array('q', self._last_end)
+        return stats
+
+    def last_end_by_sample(self):
+        """Latest planned end (minutes) of each sample; samples without events get -1."""
+        return np.frombuffer(self._last_end, dtype=np.int64).copy() if self.sample_count else np.empty(0, dtype=np.int64)
+
+    def first_end(self):
+        """Earliest planned end (minutes), or None before any batch."""
+        return self.first_end_minutes
+
+    def step_counts(self):
+        """{step: {'batches': n, 'samples': n}} in workflow order."""
+        return {step: {'batches': self.batches[i], 'samples': self.samples[i]} for i, step in enumerate(self.steps)}
+
+    def milestone_dates(self, percentiles=(50, 100)):
+        """{percentile: date by which that share of samples has finished every step}."""
+        return milestone_dates(self, percentiles)
@@ -1,14 +1,99 @@
+import bisect
 import datetime
-import holidays
+import itertools
+import threading
+
+WORK_DAY_START = datetime.time(9, 0)
+INDEX_CHUNK_DAYS = 366
+
+_CALENDAR_CACHE = {}
+
+def get_calendar(country='US', state=None, work_hours_per_day=7, workdays=(0,1,2,3,4), holiday_list=None):
+    """
+    Return the shared LabCalendar for these settings, building it on first use.
+    Calendars are only extended lazily after construction, so one instance can serve every scenario in a process,
+    including scenarios run on several threads: the lazy holiday and index loading is locked.
+    """
+    key = (country, state, work_hours_per_day, tuple(sorted(set(workdays))),
+           None if holiday_list is None else tuple(sorted(set(holiday_list))))
+    calendar = _CALENDAR_CACHE.get(key)
+    if calendar is None:
+        calendar = _CALENDAR_CACHE[key] = LabCalendar(country, state, work_hours_per_day, workdays, holiday_list)
+    return calendar
 
 class LabCalendar:
     def __init__(self, country='US', state=None, work_hours_per_day=7, workdays=(0,1,2,3,4), holiday_list=None):
+        self.country = country
+        self.state = state
         self.work_hours_per_day = work_hours_per_day
         self.workdays = set(workdays)  # 0=Monday, 4=Friday
-        self.holidays = set(holidays.country_holidays(country, state=state)) if holiday_list is None else set(holiday_list)
+        # Country holidays are loaded one year at a time, as years are first needed
+        self._country_holidays = holiday_list is None
+        self.holidays = set() if holiday_list is None else set(holiday_list)
+        # Business-day bitmap per year: year -> (ordinal of January 1st, one byte per day)
+        self._workday_bits = {}
+        self._workday_counts = {}
+        # Work-minute index (origin, cum): cum[i] = minutes worked before day ordinal origin + i.
+        # Replaced as one tuple and only appended to in place, so readers always see a consistent pair
+        self._index = None
+        # Guards the lazy loading above when one calendar is shared between threads
+        self._lock = threading.RLock()
+        day_minutes = work_hours_per_day * 60
+        # The index covers whole-minute working days that end before midnight; anything else uses the day-by-day walk
+        self._day_minutes = int(day_minutes) if float(day_minutes).is_integer() and 0 < day_minutes <= 15 * 60 else None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _year_bits(self, year):
+        with self._lock:
+            entry = self._workday_bits.get(year)
+            if entry is not None:
+                return entry
+            if self._country_holidays:
+                # The holidays package is slow to import; calendars with an explicit holiday list never need it
+                import holidays
+                self.holidays.update(holidays.country_holidays(self.country, state=self.state, years=year))
+            first = datetime.date(year, 1, 1)
+            days = (datetime.date(year + 1, 1, 1) - first).days
+            bits = bytearray(days)
+            for i in range(days):
+                day = first + datetime.timedelta(days=i)
+                bits[i] = day.weekday() in self.workdays and day not in self.holidays
+            entry = self._workday_bits[year] = (first.toordinal(), bytes(bits))
+            return entry
 
     def is_workday(self, date):
-        return date.weekday() in self.workdays and date not in self.holidays
+        entry = self._workday_bits.get(date.year) or self._year_bits(date.year)
+        return bool(entry[1][date.toordinal() - entry[0]])
+
+    def _year_counts(self, year):
+        # Running count of business days through each day of the year
+        counts = self._workday_counts.get(year)
+        if counts is None:
+            entry = self._workday_bits.get(year) or self._year_bits(year)
+            counts = self._workday_counts[year] = list(itertools.accumulate(entry[1]))
+        return counts
+
+    def business_days_between(self, start, end):
+        """Number of business days from start to end, both inclusive (0 if end is before start)."""
+        if start is None or end is None:
+            return None
+        if end < start:
+            return 0
+        total = 0
+        for year in range(start.year, end.year + 1):
+            counts = self._year_counts(year)
+            first = start.timetuple().tm_yday - 1 if year == start.year else 0
+            last = end.timetuple().tm_yday - 1 if year == end.year else len(counts) - 1
+            total += counts[last] - (counts[first - 1] if first else 0)
+        return total
 
     def next_workday(self, date):
         next_day = date + datetime.timedelta(days=1)
@@ -16,39 +101,109 @@ class LabCalendar:
             next_day += datetime.timedelta(days=1)
         return next_day
 
+    def _index_for(self, first, last):
+        """Work-minute index (origin, cum) covering the date ordinals first..last."""
+        index = self._index
+        if index is None or first < index[0] or last >= index[0] + len(index[1]) - 1:
+            with self._lock:
+                index = self._index
+                if index is None or first < index[0]:
+                    # (Re)build from January 1st of the requested year
+                    index = (datetime.date(datetime.date.fromordinal(first).year, 1, 1).toordinal(), [0])
+                origin, cum = index
+                while last >= origin + len(cum) - 1:
+                    start = origin + len(cum) - 1
+                    total = cum[-1]
+                    for ordinal in range(start, start + INDEX_CHUNK_DAYS):
+                        if self.is_workday(datetime.date.fromordinal(ordinal)):
+                            total += self._day_minutes
+                        cum.append(total)
+                self._index = index
+        return index
+
+    def _work_position(self, index, dt):
+        """Working minutes between the index origin and dt, which the index must cover."""
+        origin, cum = index
+        i = dt.toordinal() - origin
+        before = cum[i]
+        if cum[i + 1] == before:
+            return before
+        offset = dt.hour * 60 + dt.minute - WORK_DAY_START.hour * 60 - WORK_DAY_START.minute
+        return before + min(max(offset, 0), self._day_minutes)
+
+    def _indexed(self, *values):
+        # Whole minutes only; seconds would be truncated differently by the day-by-day walk
+        if self._day_minutes is None:
+            return False
+        for v in values:
+            if isinstance(v, datetime.datetime):
+                if v.second or v.microsecond or v.tzinfo is not None:
+                    return False
+            elif not float(v).is_integer():
+                return False
+        return True
+
     def add_work_minutes(self, start_datetime, minutes):
+        if minutes <= 0:
+            return start_datetime
+        if not self._indexed(start_datetime, minutes):
+            return self._add_work_minutes_by_day(start_datetime, minutes)
+        day = start_datetime.toordinal()
+        index = self._index_for(day, day)
+        while True:
+            origin, cum = index
+            # Recomputed each pass, in case another thread rebuilt the index from an earlier origin
+            target = self._work_position(index, start_datetime) + int(minutes)
+            if cum[-1] >= target:
+                break
+            index = self._index_for(day, origin + len(cum) - 1)
+        # Day whose working window contains the target minute
+        i = bisect.bisect_left(cum, target) - 1
+        day = datetime.date.fromordinal(origin + i)
+        return datetime.datetime.combine(day, WORK_DAY_START) + datetime.timedelta(minutes=target - cum[i])
+
+    def work_minutes_between(self, start_datetime, end_datetime):
+        if start_datetime >= end_datetime:
+            return 0
+        if not self._indexed(start_datetime, end_datetime):
+            return self._work_minutes_between_by_day(start_datetime, end_datetime)
+        # Both positions from one index, so they share an origin
+        index = self._index_for(start_datetime.toordinal(), end_datetime.toordinal())
+        return self._work_position(index, end_datetime) - self._work_position(index, start_datetime)
+
+    def _add_work_minutes_by_day(self, start_datetime, minutes):
         dt = start_datetime
         minutes_left = minutes
         while minutes_left > 0:
             if not self.is_workday(dt.date()):
                 dt = datetime.datetime.combine(self.next_workday(dt.date()), datetime.time(0,0))
                 continue
-            work_start = datetime.datetime.combine(dt.date(), datetime.time(9,0))
+            work_start = datetime.datetime.combine(dt.date(), WORK_DAY_START)
             work_end = work_start + datetime.timedelta(hours=self.work_hours_per_day)
             if dt < work_start:
                 dt = work_start
             available_today = (work_end - dt).total_seconds() // 60
             if available_today <= 0:
-                dt = datetime.datetime.combine(self.next_workday(dt.date()), datetime.time(9,0))
+                dt = datetime.datetime.combine(self.next_workday(dt.date()), WORK_DAY_START)
                 continue
             work_this_day = min(minutes_left, available_today)
             dt += datetime.timedelta(minutes=work_this_day)
             minutes_left -= work_this_day
         return dt
 
-    def work_minutes_between(self, start_datetime, end_datetime):
+    def _work_minutes_between_by_day(self, start_datetime, end_datetime):
         dt = start_datetime
         total = 0
         while dt < end_datetime:
             if not self.is_workday(dt.date()):
-                dt = datetime.datetime.combine(self.next_workday(dt.date()), datetime.time(9,0))
+                dt = datetime.datetime.combine(self.next_workday(dt.date()), WORK_DAY_START)
                 continue
-            work_start = datetime.datetime.combine(dt.date(), datetime.time(9,0))
+            work_start = datetime.datetime.combine(dt.date(), WORK_DAY_START)
             work_end = work_start + datetime.timedelta(hours=self.work_hours_per_day)
             if dt < work_start:
                 dt = work_start
             if dt >= work_end:
-                dt = datetime.datetime.combine(self.next_workday(dt.date()), datetime.time(9,0))
+                dt = datetime.datetime.combine(self.next_workday(dt.date()), WORK_DAY_START)
                 continue
             next_dt = min(work_end, end_datetime)
             total += (next_dt - dt).total_seconds() // 60
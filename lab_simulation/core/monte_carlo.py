@@ -0,0 +1,145 @@
+# Monte Carlo replications of the calendar scheduler using triangular step durations
+import concurrent.futures
+import datetime
+import math
+import numpy as np
+from .analytics import summarize_completion
+from .compiled_workflow import compile_workflow
+from .lab_calendar import get_calendar
+from .simulation_calendar import LabSimulationWithCalendar, get_batch_size
+
+PERCENTILES = (10, 50, 90)
+MIN_TIME_COLUMN = 'Min Time (min)'
+MAX_TIME_COLUMN = 'Max Time (min)'
+UNIT_MINUTES = {'minutes': 1, 'hours': 60}
+
+def step_ranges_from_config(config, work_hours_per_day=7):
+    """
+    (min, most_likely, max) durations in working minutes for each step in a load_config() config, keyed by step name.
+    Steps measured in days are converted using work_hours_per_day.
+    """
+    ranges = {}
+    for step in (config.get('workflow_steps') or {}).values():
+        duration = step.get('duration') or {}
+        if not duration:
+            continue
+        unit = step.get('unit', 'minutes')
+        factor = work_hours_per_day * 60 if unit == 'days' else UNIT_MINUTES.get(unit, 1)
+        ranges[step['name']] = tuple(duration[k] * factor for k in ('min', 'most_likely', 'max'))
+    return ranges
+
+def triangular_ranges(workflow_steps, ranges=None, spread=None):
+    """
+    (min, most_likely, max) minutes for each workflow step.
+    Uses, in order: `ranges` by step name, the optional 'Min Time (min)'/'Max Time (min)' CSV columns,
+    `spread=(low, high)` as fractions of 'Time (min)', and finally the fixed 'Time (min)'.
+    """
+    ranges = ranges or {}
+    result = {}
+    for row in compile_workflow(workflow_steps).rows:
+        step = row['Step Name']
+        most_likely = float(row['Time (min)'])
+        if step in ranges:
+            result[step] = tuple(float(v) for v in ranges[step])
+        elif row.get(MIN_TIME_COLUMN) and row.get(MAX_TIME_COLUMN):
+            result[step] = (float(row[MIN_TIME_COLUMN]), most_likely, float(row[MAX_TIME_COLUMN]))
+        elif spread:
+            result[step] = (most_likely * (1 - spread[0]), most_likely, most_likely * (1 + spread[1]))
+        else:
+            result[step] = (most_likely, most_likely, most_likely)
+    return result
+
+def sample_triangular(rng, low, mode, high, size):
+    """Vectorized triangular draws by inverse CDF; low == high gives the constant."""
+    low, mode, high = (np.asarray(v, dtype=float) for v in (low, mode, high))
+    u = rng.random(size)
+    width = high - low
+    split = np.divide(mode - low, width, out=np.zeros(np.broadcast(low, width).shape), where=width > 0)
+    left = low + np.sqrt(u * width * (mode - low))
+    right = high - np.sqrt((1 - u) * width * (high - mode))
+    return np.where(u < split, left, right)
+
+def batch_counts(workflow_steps, sample_count, batching):
+    """Number of batches each step forms for sample_count samples."""
+    counts = {}
+    for row in compile_workflow(workflow_steps).rows:
+        batch_size = get_batch_size(row['Step Name'], batching)
+        counts[row['Step Name']] = math.ceil(sample_count / batch_size) if batch_size >= 1 else 0
+    return counts
+
+def sample_durations(rng, ranges, counts):
+    """
+    Draw every batch duration of one replication in a single RNG call.
+    Returns {step name: int array of per-batch minutes}.
+    """
+    steps = list(counts)
+    width = max(counts.values(), default=0)
+    low, mode, high = (np.array([ranges[s][i] for s in steps])[:, None] for i in range(3))
+    block = np.rint(sample_triangular(rng, low, mode, high, (len(steps), width))).astype(np.int64)
+    np.maximum(block, 0, out=block)
+    return {step: block[i, :counts[step]] for i, step in enumerate(steps)}
+
+def run_replication(seed, workflow_steps, sample_count, start_date, ranges, calendar, sim_kwargs):
+    """Run one seeded replication; returns (days_to_50, days_to_100, date_50, date_100)."""
+    rng = np.random.default_rng(seed)
+    sim = LabSimulationWithCalendar(calendar=calendar, **sim_kwargs)
+    durations = sample_durations(rng, ranges, batch_counts(workflow_steps, sample_count, sim.batching))
+    schedule = sim.simulate_schedule(workflow_steps, sample_count, start_date, durations=durations)
+    summary = summarize_completion(schedule, calendar, sim_start_date=start_date)
+    return summary['business_days_to_50'], summary['business_days_to_100'], summary['date_50'], summary['date_100']
+
+# Replication inputs installed once per worker process
+_worker_inputs = {}
+
+def _init_worker(inputs):
+    _worker_inputs.update(inputs)
+
+def _run_in_worker(seed):
+    return run_replication(seed, **_worker_inputs)
+
+def _percentiles(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return {f'p{p}': None for p in PERCENTILES}
+    return {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+def _date_percentiles(dates):
+    ordinals = [d.toordinal() for d in dates if d is not None]
+    if not ordinals:
+        return {f'p{p}': None for p in PERCENTILES}
+    picked = np.percentile(ordinals, PERCENTILES, method='nearest')
+    return {f'p{p}': datetime.date.fromordinal(int(v)) for p, v in zip(PERCENTILES, picked)}
+
+def run_monte_carlo(workflow_steps, sample_count, start_date, replications=100, seed=0, workers=1,
+                    ranges=None, spread=None, calendar=None, **sim_kwargs):
+    """
+    Run seeded replications of LabSimulationWithCalendar with triangular step durations.
+    sim_kwargs are passed to LabSimulationWithCalendar (n_tech, n_sci, batching, equipment).
+    Each replication gets its own child seed, so results do not depend on the number of workers.
+    Returns P10/P50/P90 of business days and dates to 50% and 100% of samples complete.
+    """
+    # Compile once; every replication reuses the step ids and dependency arrays
+    workflow_steps = compile_workflow(workflow_steps)
+    inputs = {
+        'workflow_steps': workflow_steps,
+        'sample_count': sample_count,
+        'start_date': start_date,
+        'ranges': triangular_ranges(workflow_steps, ranges, spread),
+        'calendar': calendar or get_calendar(country='US', work_hours_per_day=7),
+        'sim_kwargs': sim_kwargs,
+    }
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+    if workers <= 1:
+        outcomes = [run_replication(s, **inputs) for s in seeds]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(inputs,)) as pool:
+            outcomes = list(pool.map(_run_in_worker, seeds, chunksize=max(1, replications // (workers * 4))))
+    days_50, days_100, dates_50, dates_100 = zip(*outcomes) if outcomes else ((), (), (), ())
+    return {
+        'replications': replications,
+        'business_days_to_50': _percentiles(days_50),
+        'business_days_to_100': _percentiles(days_100),
+        'date_50': _date_percentiles(dates_50),
+        'date_100': _date_percentiles(dates_100),
+        'outcomes': outcomes,
+    }
@@ -0,0 +1,204 @@
+# Many projects scheduled in one pass through shared staff and equipment pools
+import heapq
+import itertools
+from .compiled_workflow import compile_workflow
+from .event_sinks import MemorySink
+from .schedule import ROLE_CODES, to_minutes
+from .simulation_calendar import ROLE_MAP, LabSimulationWithCalendar, get_batch_policy, get_batch_size
+from lab_simulation.resources.pools import ResourcePool
+
+class Project:
+    """
+    One client project: sample_count samples through a workflow, available from `arrival` (a datetime).
+    Where several batches could start at the same time on the same resources, higher priority goes first.
+    batching overrides the scheduler's batching settings for this project.
+    """
+    def __init__(self, name, workflow_steps, sample_count, arrival, priority=0, batching=None):
+        self.name = name
+        self.workflow = compile_workflow(workflow_steps)
+        self.sample_count = sample_count
+        self.arrival = arrival
+        self.priority = priority
+        self.batching = batching
+
+    def __repr__(self):
+        return f"<Project {self.name} x{self.sample_count} from {self.arrival:%Y-%m-%d %H:%M}, priority {self.priority}>"
+
+class _ResourceQueue:
+    """
+    Batches waiting for one (staff pool, equipment pool) pair.
+    pending: (ready_time, -priority, seq, batch) for batches still waiting on their samples
+    ready: (-priority, ready_time, seq, batch) for batches only waiting on the resources
+    """
+    def __init__(self, staff_pool, eq_pool):
+        self.staff_pool = staff_pool
+        self.eq_pool = eq_pool
+        self.pending = []
+        self.ready = []
+
+    def add(self, ready_time, priority, seq, batch):
+        heapq.heappush(self.pending, (ready_time, -priority, seq, batch))
+
+    def best(self):
+        """(effective start, -priority, seq) of the batch this queue would start next, or None when empty."""
+        free = max(self.staff_pool.next_available(), self.eq_pool.next_available())
+        while self.pending and self.pending[0][0] <= free:
+            ready_time, neg_priority, seq, batch = heapq.heappop(self.pending)
+            heapq.heappush(self.ready, (neg_priority, ready_time, seq, batch))
+        if self.ready:
+            neg_priority, _, seq, _ = self.ready[0]
+            return free, neg_priority, seq
+        if self.pending:
+            ready_time, neg_priority, seq, _ = self.pending[0]
+            return ready_time, neg_priority, seq
+        return None
+
+    def pop(self):
+        if self.ready:
+            _, ready_time, _, batch = heapq.heappop(self.ready)
+        else:
+            ready_time, _, _, batch = heapq.heappop(self.pending)
+        return ready_time, batch
+
+class _ProjectState:
+    """Static step plan and running state of one project."""
+    def __init__(self, project, default_batching):
+        self.project = project
+        self.batching = project.batching if project.batching is not None else default_batching
+        self.batch_policy = get_batch_policy(self.batching)
+        workflow = project.workflow
+        self.step_order = [row['Step Name'] for row in workflow.rows]
+        self.step_nodes = workflow.row_nodes.tolist()
+        dependencies = [workflow.dep_ids[workflow.dep_ptr[n]:workflow.dep_ptr[n + 1]].tolist() for n in range(len(workflow))]
+        # Same rules as simulate_schedule: a dependency resolves to the first scheduled occurrence of its step
+        # in an earlier row, and a row with an unresolved dependency (or batch size < 1) is never scheduled
+        self.sources = []
+        first_row = {}
+        for row, node in enumerate(self.step_nodes):
+            deps = dependencies[node]
+            if get_batch_size(self.step_order[row], self.batching) < 1 or any(d not in first_row for d in deps):
+                self.sources.append(None)
+                continue
+            self.sources.append(list(dict.fromkeys(first_row[d] for d in deps)))
+            first_row.setdefault(node, row)
+        self.dependents = [[] for _ in self.step_order]
+        self.waiting = [0]*len(self.step_order)
+        for row, sources in enumerate(self.sources):
+            for src in sources or []:
+                self.dependents[src].append(row)
+                self.waiting[row] += 1
+        # Planned end times of a source row, by sample, kept until its last dependent row is released
+        self.end_times = {}
+        self.unreleased = {row: len(self.dependents[row]) for row in first_row.values() if self.dependents[row]}
+        self.remaining = [0]*len(self.step_order)
+        self.sink = MemorySink()
+        self.sink.open(self.step_order, project.sample_count)
+
+class MultiProjectSimulation(LabSimulationWithCalendar):
+    """
+    Schedules many projects at once through one set of staff (n_tech, n_sci) and equipment pools.
+    Batches are formed per project step exactly as in simulate_schedule, as soon as the step's dependencies are
+    planned. They are then dispatched in global order of effective start, the time when the batch's samples,
+    a staff member and an equipment unit are all free, so projects compete for the same resources.
+    Ties go to higher priority, then to the batch released first.
+    The effective starts live in a lazy heap with one current entry per resource queue: an entry is re-keyed
+    when it is popped after its resources have become busier, and superseded entries are dropped, so heap work
+    grows linearly with the number of batches however many projects are in flight.
+    """
+    def simulate_projects(self, projects):
+        """Returns {project name: ScheduleTable}, in the order the projects were given."""
+        states = [_ProjectState(p, self.batching) for p in projects]
+        if not states:
+            return {}
+        origin = min(p.arrival for p in projects)
+        self.pools = {
+            'tech': ResourcePool('tech', self.n_tech, origin),
+            'sci': ResourcePool('sci', self.n_sci, origin),
+        }
+        queues = {}
+        heap = []
+        # The one heap entry per queue that is still current; any other entry for the queue is dropped when popped
+        live = {}
+        seq = itertools.count()
+
+        def push(queue_key):
+            best = queues[queue_key].best()
+            if best != live.get(queue_key):
+                live[queue_key] = best
+                if best is not None:
+                    heapq.heappush(heap, (best, queue_key))
+
+        def release(state, row):
+            # Form the row's batches and queue them on their resources
+            project = state.project
+            step = state.step_order[row]
+            node = state.step_nodes[row]
+            workflow = project.workflow
+            role = ROLE_MAP.get(workflow.task_types[node].lower(), 'tech')
+            eq_pool = self.get_equipment_pool(step, origin)
+            queue_key = (role, eq_pool.name)
+            if queue_key not in queues:
+                queues[queue_key] = _ResourceQueue(self.pools[role], eq_pool)
+            sources = state.sources[row]
+            if sources:
+                pick = max if state.batch_policy == 'all' else min
+                dep_ends = [state.end_times[src] for src in sources]
+                ready_queue = sorted((pick(ends[idx] for ends in dep_ends), idx) for idx in range(project.sample_count))
+                for src in sources:
+                    state.unreleased[src] -= 1
+                    if state.unreleased[src] == 0:
+                        del state.end_times[src]
+            else:
+                ready_queue = [(project.arrival, idx) for idx in range(project.sample_count)]
+            if row in state.unreleased:
+                state.end_times[row] = [None]*project.sample_count
+            batch_size = get_batch_size(step, state.batching)
+            duration = int(workflow.durations[node])
+            for i in range(0, len(ready_queue), batch_size):
+                ready_batch = ready_queue[i:i + batch_size]
+                ready_time = ready_batch[-1][0] if state.batch_policy == 'all' else ready_batch[0][0]
+                batch = (state, row, [idx for _, idx in ready_batch], duration, role)
+                queues[queue_key].add(ready_time, project.priority, next(seq), batch)
+                state.remaining[row] += 1
+            if state.remaining[row]:
+                push(queue_key)
+            else:
+                finish(state, row)
+
+        def finish(state, row):
+            for dependent in state.dependents[row]:
+                state.waiting[dependent] -= 1
+                if state.waiting[dependent] == 0:
+                    release(state, dependent)
+
+        for state in states:
+            for row, sources in enumerate(state.sources):
+                if sources == []:
+                    release(state, row)
+
+        while heap:
+            key, queue_key = heapq.heappop(heap)
+            if key != live[queue_key]:
+                continue
+            queue = queues[queue_key]
+            if queue.best() != key:
+                # Its resources got busier since it was keyed (another queue dispatched on a shared pool)
+                push(queue_key)
+                continue
+            ready_time, (state, row, batch, duration, role) = queue.pop()
+            idx_staff, staff_ready = queue.staff_pool.acquire()
+            idx_eq, eq_ready = queue.eq_pool.acquire()
+            planned_start = self.calendar.add_work_minutes(max(ready_time, staff_ready, eq_ready), 0)
+            planned_end = self.calendar.add_work_minutes(planned_start, duration)
+            queue.staff_pool.release(idx_staff, planned_end)
+            queue.eq_pool.release(idx_eq, planned_end)
+            state.sink.write_batch(row, batch, to_minutes(planned_start), to_minutes(planned_end), duration, ROLE_CODES[role])
+            end_times = state.end_times.get(row)
+            if end_times is not None:
+                for idx in batch:
+                    end_times[idx] = planned_end
+            push(queue_key)
+            state.remaining[row] -= 1
+            if state.remaining[row] == 0:
+                finish(state, row)
+        return {state.project.name: state.sink.close() for state in states}
@@ -1,8 +1,6 @@
-import csv
-import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
-from networkx.drawing.nx_agraph import graphviz_layout
+import argparse
+import numpy as np
+from lab_simulation.core.compiled_workflow import START, STOP, compile_workflow, load_workflow
 
 # Color map for process types
 PROCESS_COLORS = {
@@ -15,117 +13,187 @@ PROCESS_COLORS = {
     'start': 'gray',
     'stop': 'gray',
 }
+NODE_WIDTH, NODE_HEIGHT = 1.6, 1.2
+# Distance between grid cells, in data units, so boxes never overlap
+SPACING = (2.0, 2.0)
+# Inches per grid cell, and the largest figure side drawn
+CELL_INCHES = (2.0, 2.0)
+MAX_FIGURE_INCHES = 120
 
 def read_workflow_csv(path):
-    steps = {}
-    edges = set()
-    with open(path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            step = row['Step Name']
-            steps[step] = row
-            # Next Task edges
-            next_tasks = [x.strip() for x in row['Next Task'].replace(';', ',').split(',') if x.strip() and x.strip().lower() != 'none']
-            for nxt in next_tasks:
-                edges.add((step, nxt))
-            # Dependency edges (for joins)
-            dependencies = [x.strip() for x in row['Dependencies'].replace(';', ',').split(',') if x.strip() and x.strip().lower() != 'none']
-            for dep in dependencies:
-                edges.add((dep, step))
-    # Add start/stop nodes
-    if 'Sample Entry' in steps:
-        edges.add(('START', 'Sample Entry'))
-        steps['START'] = {'Step Name': 'START', 'Task Type': 'start', 'Time (min)': '0'}
-    if 'Report' in steps:
-        edges.add(('Report', 'STOP'))
-        steps['STOP'] = {'Step Name': 'STOP', 'Task Type': 'stop', 'Time (min)': '0'}
-    return steps, edges
+    """(steps, edges) as the original script returned them: {name: row} with START/STOP, and the set of network edges."""
+    workflow = load_workflow(path)
+    steps = {workflow.steps[n]: workflow.row(n) for n in range(workflow.n_defined)}
+    for name in (START, STOP):
+        if name in workflow.index:
+            steps[name] = {'Step Name': name, 'Task Type': name.lower(), 'Time (min)': '0'}
+    return steps, set(workflow.edges())
 
-def compute_pert_times(G, steps):
-    # Forward pass (early start/finish)
-    es = {n: 0 for n in G.nodes}
-    ef = {n: 0 for n in G.nodes}
-    for n in nx.topological_sort(G):
-        duration = int(steps[n].get('Time (min)', '0')) if n in steps else 0
-        es[n] = max([ef[p] for p in G.predecessors(n)] or [0])
-        ef[n] = es[n] + duration
-    # Backward pass (late start/finish)
-    max_ef = max(ef.values())
-    lf = {n: max_ef for n in G.nodes}
-    ls = {n: max_ef for n in G.nodes}
-    for n in reversed(list(nx.topological_sort(G))):
-        duration = int(steps[n].get('Time (min)', '0')) if n in steps else 0
-        lf[n] = min([ls[s] for s in G.successors(n)] or [max_ef])
-        ls[n] = lf[n] - duration
-    # Slack
-    slack = {n: ls[n] - es[n] for n in G.nodes}
-    return es, ef, ls, lf, slack
+def _as_workflow(workflow, edges=None):
+    # The (steps, edges) pair from read_workflow_csv: the edges follow from the rows, so only the rows are compiled
+    if edges is not None:
+        return compile_workflow([row for name, row in workflow.items() if name not in (START, STOP)])
+    return compile_workflow(workflow)
 
-def find_critical_path(G, steps):
-    # Assign durations
-    durations = {n: int(steps[n].get('Time (min)', '0')) for n in G.nodes if n in steps}
-    # Use networkx's dag_longest_path for critical path
-    cp = nx.algorithms.dag.dag_longest_path(G, weight=lambda u, v, d: durations.get(u, 0))
-    return cp
+def compute_pert_times(workflow):
+    """(es, ef, ls, lf, slack) dicts keyed by step name, read from the compiled workflow."""
+    workflow = _as_workflow(workflow)
+    return tuple({name: int(values[n]) for n, name in enumerate(workflow.steps)}
+                 for values in (workflow.es, workflow.ef, workflow.ls, workflow.lf, workflow.slack))
 
-def assign_grid_positions(G):
+def find_critical_path(workflow):
+    """Critical path as a list of step names, START to STOP."""
+    return _as_workflow(workflow).critical_names()
+
+def assign_grid_positions(workflow):
     # Assign nodes to grid positions by topological order and layer
-    layers = list(nx.topological_generations(G))
     pos = {}
-    for y, layer in enumerate(layers):
+    for y, layer in enumerate(workflow.generations()):
         for x, node in enumerate(layer):
             pos[node] = (x, -y)  # left-to-right, top-to-bottom
     return pos
 
-def draw_pert_node(ax, x, y, width, height, label, duration, es, ef, ls, lf, slack, color, is_critical):
-    # Draw rectangle
-    rect = Rectangle((x - width/2, y - height/2), width, height, linewidth=2 if is_critical else 1, edgecolor='crimson' if is_critical else 'black', facecolor=color, zorder=2)
-    ax.add_patch(rect)
-    # Draw horizontal lines
-    ax.plot([x - width/2, x + width/2], [y + height/6, y + height/6], color='black', lw=1, zorder=3)
-    ax.plot([x - width/2, x + width/2], [y - height/6, y - height/6], color='black', lw=1, zorder=3)
-    # Draw vertical lines
-    ax.plot([x - width/6, x - width/6], [y + height/2, y - height/2], color='black', lw=1, zorder=3)
-    ax.plot([x + width/6, x + width/6], [y + height/2, y - height/2], color='black', lw=1, zorder=3)
-    # Top row: ES | Dur | EF
-    ax.text(x - width/3, y + height/3, f"{es}", ha='center', va='center', fontsize=8, zorder=4)
-    ax.text(x, y + height/3, f"{duration}", ha='center', va='center', fontsize=8, zorder=4)
-    ax.text(x + width/3, y + height/3, f"{ef}", ha='center', va='center', fontsize=8, zorder=4)
-    # Middle row: Label
-    ax.text(x, y, label, ha='center', va='center', fontsize=9, fontweight='bold', zorder=4)
-    # Bottom row: LS | Slack | LF
-    ax.text(x - width/3, y - height/3, f"{ls}", ha='center', va='center', fontsize=8, zorder=4)
-    ax.text(x, y - height/3, f"{slack}", ha='center', va='center', fontsize=8, zorder=4)
-    ax.text(x + width/3, y - height/3, f"{lf}", ha='center', va='center', fontsize=8, zorder=4)
+def _edge_segments(xy, sources, targets, width, height):
+    """Edge segments clipped to the node boxes, as (start points, end points)."""
+    start, end = xy[sources], xy[targets]
+    d = end - start
+    with np.errstate(divide='ignore'):
+        # Fraction of the centre-to-centre vector that lies inside one box
+        inside = np.minimum(np.where(d[:, 0] != 0, width / 2 / np.abs(d[:, 0]), np.inf),
+                            np.where(d[:, 1] != 0, height / 2 / np.abs(d[:, 1]), np.inf))
+    inside = np.minimum(inside, 0.5)[:, None]
+    return start + d * inside, end - d * inside
+
+def _arrow_heads(tips, tails, size):
+    """One triangle per edge, pointing from tail to tip."""
+    d = tips - tails
+    length = np.hypot(d[:, 0], d[:, 1])[:, None]
+    u = np.divide(d, length, out=np.zeros_like(d), where=length > 0)
+    normal = np.stack([-u[:, 1], u[:, 0]], axis=1)
+    back = tips - u * size
+    return np.stack([tips, back + normal * size / 2.5, back - normal * size / 2.5], axis=1)
 
-def plot_network(steps, edges):
-    G = nx.DiGraph()
-    G.add_nodes_from(steps.keys())
-    G.add_edges_from(edges)
-    pos = assign_grid_positions(G)
-    es, ef, ls, lf, slack = compute_pert_times(G, steps)
-    cp = find_critical_path(G, steps)
-    fig, ax = plt.subplots(figsize=(max(14, 2*len(pos)), 10))
-    # Draw edges first
-    for u, v in G.edges:
-        x1, y1 = pos[u]
-        x2, y2 = pos[v]
-        color = 'crimson' if u in cp and v in cp and cp.index(v) == cp.index(u) + 1 else 'black'
-        ax.annotate('', xy=(x2, y2), xytext=(x1, y1), arrowprops=dict(arrowstyle='->', color=color, lw=2 if color=='crimson' else 1), zorder=1)
-    # Draw nodes as rectangles with lines
-    width, height = 1.6, 1.2
-    for node in G.nodes:
-        ttype = steps.get(node, {}).get('Task Type', '').lower()
-        color = PROCESS_COLORS.get(ttype, 'white')
-        duration = steps[node].get('Time (min)', '') if node in steps else ''
-        draw_pert_node(ax, pos[node][0], pos[node][1], width, height, node, duration, es[node], ef[node], ls[node], lf[node], slack[node], color, node in cp)
-    ax.set_xlim(min(x for x, y in pos.values()) - 1, max(x for x, y in pos.values()) + 1)
-    ax.set_ylim(min(y for x, y in pos.values()) - 1, max(y for x, y in pos.values()) + 1)
+def draw_network(ax, workflow, pos=None, width=NODE_WIDTH, height=NODE_HEIGHT):
+    """
+    Draw the PERT network on ax with a fixed number of artists: one PatchCollection for the node boxes,
+    LineCollections for the cell grid and the edges, a PolyCollection for arrow heads, and one text per node.
+    PERT values come precomputed from the compiled workflow.
+    """
+    from matplotlib.collections import LineCollection, PatchCollection, PolyCollection
+    from matplotlib.patches import Rectangle
+    pos = pos or assign_grid_positions(workflow)
+    n = len(workflow)
+    xy = np.array([pos[node] for node in range(n)], dtype=float).reshape(n, 2) * SPACING
+    x, y = xy[:, 0], xy[:, 1]
+    critical = np.zeros(n, dtype=bool)
+    critical[workflow.critical_path] = True
+    cp_edges = set(zip(workflow.critical_path.tolist(), workflow.critical_path[1:].tolist()))
+    # Edges first, underneath the boxes
+    sources = np.repeat(np.arange(n), np.diff(workflow.succ_ptr))
+    targets = workflow.succ_ids.astype(np.intp)
+    on_cp = np.array([(u, v) in cp_edges for u, v in zip(sources.tolist(), targets.tolist())], dtype=bool)
+    tails, tips = _edge_segments(xy, sources, targets, width, height)
+    edge_colors = np.where(on_cp, 'crimson', 'black')
+    ax.add_collection(LineCollection(np.stack([tails, tips], axis=1), colors=edge_colors, linewidths=np.where(on_cp, 2, 1), zorder=1))
+    ax.add_collection(PolyCollection(_arrow_heads(tips, tails, 0.15), facecolors=edge_colors, edgecolors='none', zorder=1))
+    # Node boxes
+    colors = [PROCESS_COLORS.get(t.lower(), 'white') for t in workflow.task_types]
+    boxes = [Rectangle((bx - width/2, by - height/2), width, height) for bx, by in xy.tolist()]
+    ax.add_collection(PatchCollection(boxes, facecolors=colors, edgecolors=np.where(critical, 'crimson', 'black'),
+                                      linewidths=np.where(critical, 2, 1), zorder=2))
+    # Cell grid: two horizontal and two vertical lines per node
+    w, h = width/2, height/2
+    grid = np.concatenate([
+        np.stack([np.stack([x - w, y + h/3], 1), np.stack([x + w, y + h/3], 1)], 1),
+        np.stack([np.stack([x - w, y - h/3], 1), np.stack([x + w, y - h/3], 1)], 1),
+        np.stack([np.stack([x - w/3, y + h], 1), np.stack([x - w/3, y - h], 1)], 1),
+        np.stack([np.stack([x + w/3, y + h], 1), np.stack([x + w/3, y - h], 1)], 1),
+    ])
+    ax.add_collection(LineCollection(grid, colors='black', linewidths=1, zorder=3))
+    if n:
+        ax.set_xlim(x.min() - SPACING[0] / 2, x.max() + SPACING[0] / 2)
+        ax.set_ylim(y.min() - SPACING[1] / 2, y.max() + SPACING[1] / 2)
+    # Equal scaling keeps the arrow heads, drawn in data units, undistorted
+    ax.set_aspect('equal')
+    # One text per node (ES | Dur | EF, label, LS | Slack | LF), sized so its rows and columns fall in the cells
+    layout = _cell_text_layout(ax, width, height)
+    for node, (nx_, ny_) in enumerate(xy.tolist()):
+        row = workflow.row(node)
+        # START/STOP show a zero duration; undefined names show none
+        duration = row.get('Time (min)', '') if row else ('0' if workflow.task_types[node] else '')
+        _node_text(ax, nx_, ny_, workflow.steps[node], duration, workflow.es[node], workflow.ef[node],
+                   workflow.ls[node], workflow.lf[node], workflow.slack[node], layout)
     ax.axis('off')
-    plt.title('Traditional Project Network Diagram (PERT/CPM Nodes, Critical Path Highlighted)')
-    plt.tight_layout()
-    plt.show()
+    ax.set_title('Traditional Project Network Diagram (PERT/CPM Nodes, Critical Path Highlighted)')
+
+def _cell_text_layout(ax, width, height):
+    """(fontsize, linespacing, characters per column) that fit a node's text to its cell grid at the current scale."""
+    ax.apply_aspect()
+    (x0, y0), (x1, y1) = ax.transData.transform([(0, 0), (width / 3, height / 3)])
+    points = 72 / ax.figure.dpi
+    cell_width, cell_height = abs(x1 - x0) * points, abs(y1 - y0) * points
+    fontsize = max(1.0, min(8.0, cell_height / 1.5))
+    # Monospace glyphs are 0.6 em wide; matplotlib spaces lines by about 1.2 em times linespacing
+    return fontsize, cell_height / (1.2 * fontsize), max(1, int(cell_width / (0.6 * fontsize)))
+
+def _node_text(ax, x, y, label, duration, es, ef, ls, lf, slack, layout):
+    fontsize, linespacing, columns = layout
+    top = ''.join(f"{value!s:^{columns}}" for value in (es, duration, ef))
+    bottom = ''.join(f"{value!s:^{columns}}" for value in (ls, slack, lf))
+    ax.text(x, y, f"{top}\n{label}\n{bottom}", ha='center', va='center', multialignment='center',
+            family='monospace', fontsize=fontsize, linespacing=linespacing, zorder=4)
+
+def draw_pert_node(ax, x, y, width, height, label, duration, es, ef, ls, lf, slack, color, is_critical):
+    """
+    One node drawn on its own: box, cell grid and a single text. Set the axes limits first, since the text is sized
+    to the box at the current scale. draw_network draws whole workflows with shared collections instead.
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.patches import Rectangle
+    ax.add_patch(Rectangle((x - width/2, y - height/2), width, height, linewidth=2 if is_critical else 1,
+                           edgecolor='crimson' if is_critical else 'black', facecolor=color, zorder=2))
+    w, h = width/2, height/2
+    ax.add_collection(LineCollection([[(x - w, y + h/3), (x + w, y + h/3)], [(x - w, y - h/3), (x + w, y - h/3)],
+                                      [(x - w/3, y + h), (x - w/3, y - h)], [(x + w/3, y + h), (x + w/3, y - h)]],
+                                     colors='black', linewidths=1, zorder=3))
+    _node_text(ax, x, y, label, duration, es, ef, ls, lf, slack, _cell_text_layout(ax, width, height))
+
+def _figure_size(pos):
+    cols = max((x for x, y in pos.values()), default=0) + 1
+    rows = -min((y for x, y in pos.values()), default=0) + 1
+    return (min(MAX_FIGURE_INCHES, max(8, CELL_INCHES[0] * cols)), min(MAX_FIGURE_INCHES, max(6, CELL_INCHES[1] * rows)))
+
+def plot_network(workflow, edges=None, path=None, show=None, dpi=100):
+    """
+    Draw the network diagram of a compiled workflow (or rows), or of the (steps, edges) pair from read_workflow_csv
+    passed as two arguments. path: save to this file (format from the extension, e.g. .png or .svg)
+    without a GUI backend; show: open a window (default: only when not saving). Returns the figure.
+    """
+    workflow = _as_workflow(workflow, edges)
+    pos = assign_grid_positions(workflow)
+    show = path is None if show is None else show
+    if show:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=_figure_size(pos))
+    else:
+        # A bare Figure renders headless through the Agg/SVG canvases
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=_figure_size(pos))
+    # The axes carry no ticks or labels, so a fixed margin replaces tight_layout's extra text layout pass;
+    # it is set first because the node texts are sized to the final axes
+    fig.subplots_adjust(left=0.01, right=0.99, bottom=0.01, top=0.95)
+    ax = fig.add_subplot()
+    draw_network(ax, workflow, pos)
+    if path:
+        fig.savefig(path, dpi=dpi)
+    if show:
+        plt.show()
+    return fig
 
 if __name__ == '__main__':
-    steps, edges = read_workflow_csv('Rock_Workflow_CLEAN.csv')
-    plot_network(steps, edges)
+    parser = argparse.ArgumentParser(description='Draw the PERT/CPM network diagram of a workflow CSV.')
+    parser.add_argument('csv', nargs='?', default='Rock_Workflow_CLEAN.csv')
+    parser.add_argument('--output', help='save to this PNG/SVG file instead of opening a window')
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args()
+    plot_network(load_workflow(args.csv), path=args.output, dpi=args.dpi)
@@ -0,0 +1,171 @@
+# Deadline-driven search for the smallest staffing and batch sizes, using the calendar scheduler
+import concurrent.futures
+from .analytics import summarize_completion
+from .compiled_workflow import compile_workflow
+from .lab_calendar import get_calendar
+from .simulation_calendar import LabSimulationWithCalendar
+
+def max_batch_sizes(workflow_steps):
+    """{step name: largest allowed batch} from the 'Batch?' and 'Max Batch Size' columns."""
+    sizes = {}
+    for row in compile_workflow(workflow_steps).rows:
+        can_batch = (row.get('Batch?') or '').strip().lower() == 'yes'
+        size = (row.get('Max Batch Size') or '').strip()
+        sizes[row['Step Name']] = int(size) if can_batch and size else 1
+    return sizes
+
+def evaluate(n_tech, n_sci, batch_sizes, workflow_steps, sample_count, start_date, calendar, batch_policy, equipment):
+    """Business days until every sample is complete (None if some never finish)."""
+    batching = {'enabled': True, 'default_batch_size': 1, 'batch_policy': batch_policy, 'steps': dict(batch_sizes)}
+    sim = LabSimulationWithCalendar(calendar=calendar, n_tech=n_tech, n_sci=n_sci, batching=batching, equipment=equipment)
+    schedule = sim.simulate_schedule(workflow_steps, sample_count, start_date)
+    return summarize_completion(schedule, calendar, sim_start_date=start_date, percentiles=(100,))['business_days_to_100']
+
+# Evaluation inputs installed once per worker process
+_worker_inputs = {}
+
+def _init_worker(inputs):
+    _worker_inputs.update(inputs)
+
+def _evaluate_in_worker(candidate):
+    n_tech, n_sci, batch_sizes = candidate
+    return evaluate(n_tech, n_sci, batch_sizes, **_worker_inputs)
+
+def _probes(lo, hi, count):
+    """Up to `count` evenly spaced points strictly inside (lo, hi)."""
+    gap = hi - lo - 1
+    if gap <= 0:
+        return []
+    count = min(count, gap)
+    return sorted({lo + (gap + 1) * (i + 1) // (count + 1) for i in range(count)})
+
+class DeadlineOptimizer:
+    """
+    Finds the fewest staff (tech + sci), then the smallest batch size per step, that still finish every sample
+    within deadline_days business days.
+    Assumes more staff and larger batches never finish later, so each search is a bisection; the answer always
+    meets the deadline, and is minimal where that assumption holds. With workers > 1
+    every round probes several points at once (multi-section) in a process pool.
+    Results are cached by candidate, and `simulations` counts the scheduler runs actually made.
+    """
+    def __init__(self, workflow_steps, sample_count, start_date, deadline_days, equipment=None, calendar=None,
+                 batch_policy='all', max_tech=10, max_sci=10, workers=1):
+        self.workflow = compile_workflow(workflow_steps)
+        self.deadline_days = deadline_days
+        self.max_tech = max_tech
+        self.max_sci = max_sci
+        self.workers = max(1, workers)
+        self.batch_limits = max_batch_sizes(self.workflow)
+        self.inputs = {
+            'workflow_steps': self.workflow,
+            'sample_count': sample_count,
+            'start_date': start_date,
+            'calendar': calendar or get_calendar(country='US', work_hours_per_day=7),
+            'batch_policy': batch_policy,
+            'equipment': equipment or [],
+        }
+        self.results = {}
+        self.simulations = 0
+        self._pool = None
+
+    def days(self, candidates):
+        """Business days to completion for each (n_tech, n_sci, batch_sizes) candidate, run in parallel."""
+        keys = [(t, s, tuple(sorted(b.items()))) for t, s, b in candidates]
+        todo = list(dict.fromkeys(k for k in keys if k not in self.results))
+        if todo:
+            self.simulations += len(todo)
+            args = [(t, s, dict(b)) for t, s, b in todo]
+            if self._pool is None:
+                outcomes = [evaluate(t, s, b, **self.inputs) for t, s, b in args]
+            else:
+                outcomes = list(self._pool.map(_evaluate_in_worker, args))
+            self.results.update(zip(todo, outcomes))
+        return [self.results[k] for k in keys]
+
+    def meets(self, days):
+        return days is not None and days <= self.deadline_days
+
+    def _smallest(self, lo, hi, candidate):
+        """
+        Smallest x in [lo, hi] whose candidate(x) meets the deadline, given that candidate(hi) does.
+        Each round evaluates `workers` probes together and keeps the bracket around the boundary.
+        """
+        while hi > lo:
+            probes = _probes(lo - 1, hi, self.workers)
+            outcomes = self.days([candidate(x) for x in probes])
+            passing = [x for x, d in zip(probes, outcomes) if self.meets(d)]
+            failing = [x for x, d in zip(probes, outcomes) if not self.meets(d)]
+            if passing:
+                hi = min(passing)
+            lo = max([lo] + [x + 1 for x in failing if x < hi])
+        return hi
+
+    def optimize_staff(self, batch_sizes):
+        """
+        Minimal (n_tech, n_sci) by total headcount. The minimal sci count usually does not rise as techs are added,
+        so each tech count searches only below the previous answer, and stops once it cannot beat the best total.
+        That cap is checked first; where an extra tech makes it miss (staffing is not strictly monotone), that tech
+        count searches the full sci range instead.
+        """
+        (top,) = self.days([(self.max_tech, self.max_sci, batch_sizes)])
+        if not self.meets(top):
+            return None
+        # Fewest techs that can make it at all, with every scientist available
+        first_tech = self._smallest(1, self.max_tech, lambda t: (t, self.max_sci, batch_sizes))
+        best = None
+        sci_cap = self.max_sci
+        for n_tech in range(first_tech, self.max_tech + 1):
+            if best is not None and n_tech + 1 >= sum(best):
+                break
+            (days,) = self.days([(n_tech, sci_cap, batch_sizes)])
+            if self.meets(days):
+                n_sci = self._smallest(1, sci_cap, lambda s: (n_tech, s, batch_sizes))
+            else:
+                (days,) = self.days([(n_tech, self.max_sci, batch_sizes)])
+                if not self.meets(days):
+                    continue
+                n_sci = self._smallest(1, self.max_sci, lambda s: (n_tech, s, batch_sizes))
+            sci_cap = n_sci
+            if best is None or n_tech + n_sci < sum(best):
+                best = (n_tech, n_sci)
+        return best
+
+    def optimize_batches(self, n_tech, n_sci, batch_sizes):
+        """
+        Shrink each step's batch, in workflow order, to the smallest size that still meets the deadline.
+        Completion time is not monotone in batch size (a larger batch can finish later), so the bisection finds
+        a size that passes with every probed smaller size failing: a local optimum, not necessarily the global smallest.
+        """
+        sizes = dict(batch_sizes)
+        for step, limit in sizes.items():
+            if limit <= 1:
+                continue
+            sizes[step] = self._smallest(1, limit, lambda b: (n_tech, n_sci, dict(sizes, **{step: b})))
+        return sizes
+
+    def run(self):
+        """
+        Returns {'feasible', 'n_tech', 'n_sci', 'batch_sizes', 'business_days_to_100', 'deadline_days', 'simulations'}.
+        Staffing is searched with every step at its largest batch; infeasible if even max staff misses the deadline.
+        """
+        if self.workers > 1:
+            self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                                initargs=(self.inputs,))
+        try:
+            staff = self.optimize_staff(self.batch_limits)
+            if staff is None:
+                (days,) = self.days([(self.max_tech, self.max_sci, self.batch_limits)])
+                return {'feasible': False, 'n_tech': self.max_tech, 'n_sci': self.max_sci, 'batch_sizes': self.batch_limits,
+                        'business_days_to_100': days, 'deadline_days': self.deadline_days, 'simulations': self.simulations}
+            batch_sizes = self.optimize_batches(staff[0], staff[1], self.batch_limits)
+            (days,) = self.days([(staff[0], staff[1], batch_sizes)])
+            if not self.meets(days):
+                # Each search only keeps evaluated passing points, so this should not happen; never report a miss as feasible
+                batch_sizes = self.batch_limits
+                (days,) = self.days([(staff[0], staff[1], batch_sizes)])
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        return {'feasible': self.meets(days), 'n_tech': staff[0], 'n_sci': staff[1], 'batch_sizes': batch_sizes,
+                'business_days_to_100': days, 'deadline_days': self.deadline_days, 'simulations': self.simulations}
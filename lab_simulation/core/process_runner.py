@@ -4,45 +4,57 @@ from lab_simulation.resources.staff import Staff
 from lab_simulation.processes.steps import Step
 
 
+def pick_equipment(eq_keys, equipment_objs):
+    """
+    Least-loaded eligible unit among eq_keys (busy plus queued requests per unit of capacity).
+    Ties go to the earliest listed key. Returns (key, equipment) or (None, None).
+    """
+    best_key, best = None, None
+    for key in eq_keys or []:
+        eq = equipment_objs.get(key)
+        if eq is not None and (best is None or eq.load() < best.load()):
+            best_key, best = key, eq
+    return best_key, best
+
+
+def equipment_stats(equipment_objs):
+    """{key: queue statistics} for every unit."""
+    return {key: eq.queue_stats() for key, eq in equipment_objs.items()}
+
+
 def run_step(env, step: Step, equipment_objs, staff_objs, sample_count=1, metrics=None):
-    eq_keys = step.equipment_required
-    staff_skill = step.required_skills[0] if step.required_skills else None
     duration = step.duration.get('most_likely', 1)
     batch_size = min(step.max_batch_size, sample_count) if step.can_batch else 1
-    # For each batch
+    # Dispatch every batch up front; each queues on the unit that is least loaded when it is sent
+    batches = []
     for i in range(0, sample_count, batch_size):
-        eq = None
-        eq_key_used = None
-        # Use the first available equipment in the list
-        if eq_keys:
-            for key in eq_keys:
-                if key in equipment_objs:
-                    eq = equipment_objs[key]
-                    eq_key_used = key
-                    break
-        staff = None
-        if staff_skill:
-            # Find available staff with required skill
-            for s in staff_objs.values():
-                if staff_skill in s.skills:
-                    staff = s
-                    break
+        eq_key, eq = pick_equipment(step.equipment_required, equipment_objs)
+        req = eq.request() if eq else None
+        batches.append(env.process(_run_batch(env, step, i // batch_size + 1, duration, eq_key, eq, req, metrics)))
+    yield env.all_of(batches)
+    # (Staff allocation is modeled by workflow_engine.WorkflowEngine)
+    # (Supplies, outputs, etc. can be added)
+
+
+def _run_batch(env, step, batch_no, duration, eq_key, eq, req, metrics):
+    queued = env.now
+    if eq:
+        with req:
+            yield req
+            eq.granted(req)
+            start = env.now
+            yield from eq.run(duration)
+    else:
         start = env.now
-        # Simulate process
-        if eq:
-            yield env.process(eq.use(duration))
-        else:
-            yield env.timeout(duration)
-        end = env.now
-        if metrics is not None:
-            metrics.append({
-                'step': step.name,
-                'batch': i // batch_size + 1,
-                'start': start,
-                'end': end,
-                'equipment': eq_key_used,
-                'duration': end - start
-            })
-        # (Staff allocation not modeled in detail yet)
-        # (Supplies, outputs, etc. can be added)
-        # print(f"Step {step.name} completed batch {i//batch_size+1}")
+        yield env.timeout(duration)
+    end = env.now
+    if metrics is not None:
+        metrics.append({
+            'step': step.name,
+            'batch': batch_no,
+            'queued': queued,
+            'start': start,
+            'end': end,
+            'equipment': eq_key,
+            'duration': end - start
+        })
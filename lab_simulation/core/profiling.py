@@ -0,0 +1,110 @@
+# Opt-in hot-path counters for the calendar scheduler, and per-run cProfile/tracemalloc capture
+import cProfile
+import time
+import tracemalloc
+
+class CalendarProfiler:
+    """
+    Stands in for a LabCalendar during a profiled run, counting add_work_minutes calls, the time spent in them
+    and the non-working minutes they skip (wall-clock span minus working minutes added).
+    Every other attribute is the wrapped calendar's.
+    """
+    def __init__(self, calendar):
+        self.calendar = calendar
+        self.calls = 0
+        self.seconds = 0.0
+        self.minutes_skipped = 0
+
+    def add_work_minutes(self, start_datetime, minutes):
+        t = time.perf_counter()
+        end = self.calendar.add_work_minutes(start_datetime, minutes)
+        self.seconds += time.perf_counter() - t
+        self.calls += 1
+        if minutes > 0:
+            self.minutes_skipped += int((end - start_datetime).total_seconds() // 60 - minutes)
+        return end
+
+    def __getattr__(self, name):
+        return getattr(self.calendar, name)
+
+def _wait_minutes(ready, available):
+    # Minutes a ready batch waited for a resource (0 if the resource was already free)
+    return max(0, int((available - ready).total_seconds() // 60))
+
+class SchedulerProfile:
+    """
+    Counters for one simulate_schedule run, per step:
+      seconds: wall time spent scheduling the step
+      batches, queue_pops: batches formed and ready-queue entries popped into them
+      calendar_calls, calendar_seconds, minutes_skipped: calendar work for the step
+      staff_wait_minutes, equipment_wait_minutes: how long ready batches waited for a free staff member / unit
+    step() closes the previous step and opens the next; to_dict() gives the JSON-ready result.
+    """
+    STEP_COUNTERS = ('batches', 'queue_pops', 'staff_wait_minutes', 'equipment_wait_minutes')
+
+    def __init__(self, calendar, sample_count):
+        self.calendar = CalendarProfiler(calendar)
+        self.sample_count = sample_count
+        self.steps = []
+        self.resumed_from = 0
+        self.seconds = None
+        self._started = time.perf_counter()
+        self._current = None
+
+    def step(self, step_id, name):
+        self._close_step()
+        self._current = dict({'step_id': step_id, 'step': name}, **{c: 0 for c in self.STEP_COUNTERS})
+        self._marks = (time.perf_counter(), self.calendar.calls, self.calendar.seconds, self.calendar.minutes_skipped)
+        return self._current
+
+    def batch(self, size, ready_time, staff_ready, eq_ready):
+        current = self._current
+        current['batches'] += 1
+        current['queue_pops'] += size
+        current['staff_wait_minutes'] += _wait_minutes(ready_time, staff_ready)
+        current['equipment_wait_minutes'] += _wait_minutes(ready_time, eq_ready)
+
+    def _close_step(self):
+        current = self._current
+        if current is None:
+            return
+        started, calls, seconds, skipped = self._marks
+        current['seconds'] = time.perf_counter() - started
+        current['calendar_calls'] = self.calendar.calls - calls
+        current['calendar_seconds'] = self.calendar.seconds - seconds
+        current['minutes_skipped'] = self.calendar.minutes_skipped - skipped
+        self.steps.append(current)
+        self._current = None
+
+    def finish(self):
+        self._close_step()
+        self.seconds = time.perf_counter() - self._started
+        return self.to_dict()
+
+    def to_dict(self):
+        totals = {c: sum(s[c] for s in self.steps) for c in self.STEP_COUNTERS + ('calendar_calls', 'minutes_skipped')}
+        return {
+            'samples': self.sample_count,
+            'seconds': self.seconds,
+            'resumed_from': self.resumed_from,
+            'calendar_seconds': self.calendar.seconds,
+            'totals': totals,
+            'steps': self.steps,
+        }
+
+def capture(prof_path, fn, *args, **kwargs):
+    """
+    Call fn under cProfile and tracemalloc, writing the pstats dump to prof_path.
+    Returns (fn's result, {'seconds', 'peak_mb', 'prof'}).
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    t = time.perf_counter()
+    try:
+        result = profiler.runcall(fn, *args, **kwargs)
+        seconds = time.perf_counter() - t
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    profiler.dump_stats(prof_path)
+    return result, {'seconds': seconds, 'peak_mb': round(peak / 2**20, 2), 'prof': prof_path}
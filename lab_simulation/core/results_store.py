@@ -0,0 +1,151 @@
+# SQLite store of scenario results keyed by input content, so sweeps only simulate what changed
+import datetime
+import hashlib
+import io
+import json
+import sqlite3
+import numpy as np
+from .schedule import ScheduleTable
+
+# Bump when scheduler changes would alter results for the same inputs, so older entries stop matching
+STORE_VERSION = 1
+SCHEDULE_COLUMNS = ('sample', 'step', 'start', 'end', 'duration', 'role')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    scenario TEXT NOT NULL,
+    params TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedules (
+    key TEXT PRIMARY KEY REFERENCES runs(key),
+    steps TEXT NOT NULL,
+    sample_count INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sweeps (
+    sweep TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL REFERENCES runs(key),
+    created TEXT NOT NULL,
+    PRIMARY KEY (sweep, position)
+);
+"""
+
+def _json(value):
+    return json.dumps(value, sort_keys=True, default=lambda v: v.isoformat() if hasattr(v, 'isoformat') else str(v))
+
+def run_key(workflow_steps, lab_config, calendar_settings, params):
+    """
+    SHA-256 over everything that determines a scenario's result: the workflow rows (a CompiledWorkflow
+    or list of dicts), the lab config, the calendar settings and the scenario's resolved parameters.
+    """
+    rows = getattr(workflow_steps, 'rows', workflow_steps)
+    text = _json([STORE_VERSION, [dict(r) for r in rows], lab_config, calendar_settings, params])
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _decode_summary(text):
+    # Milestone dates go in as ISO strings and come back as dates
+    row = json.loads(text)
+    for k, v in row.items():
+        if k.startswith('date_') and v is not None:
+            row[k] = datetime.date.fromisoformat(v)
+    return row
+
+def _pack_schedule(schedule):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **{c: getattr(schedule, c) for c in SCHEDULE_COLUMNS})
+    return buffer.getvalue()
+
+def _unpack_schedule(steps, sample_count, data):
+    arrays = np.load(io.BytesIO(data))
+    return ScheduleTable(json.loads(steps), sample_count, *(arrays[c] for c in SCHEDULE_COLUMNS))
+
+class ResultsStore:
+    """
+    Scenario summaries, and optionally their full schedules, in one SQLite file.
+    Results are keyed by run_key(); every run_scenarios invocation is also recorded as a named sweep
+    listing the keys of its scenarios in order, so sweeps can be compared after the fact.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, key):
+        """The stored summary row for key, or None."""
+        found = self._db.execute('SELECT summary FROM runs WHERE key = ?', (key,)).fetchone()
+        return _decode_summary(found[0]) if found else None
+
+    def schedule(self, key):
+        """The stored ScheduleTable for key, or None if the run was stored without one."""
+        found = self._db.execute('SELECT steps, sample_count, data FROM schedules WHERE key = ?', (key,)).fetchone()
+        return _unpack_schedule(*found) if found else None
+
+    def has_schedule(self, key):
+        return self._db.execute('SELECT 1 FROM schedules WHERE key = ?', (key,)).fetchone() is not None
+
+    def put(self, key, row, params, schedule=None):
+        with self._db:
+            self._db.execute('INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)',
+                             (key, row['scenario'], _json(params), _json(row), datetime.datetime.now().isoformat(timespec='seconds')))
+            if schedule is not None:
+                self._db.execute('INSERT OR REPLACE INTO schedules VALUES (?, ?, ?, ?)',
+                                 (key, json.dumps(schedule.steps), schedule.sample_count, _pack_schedule(schedule)))
+
+    def record_sweep(self, sweep, keys):
+        """Name the ordered list of run keys that made up one sweep (replacing an earlier sweep of that name)."""
+        created = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._db:
+            self._db.execute('DELETE FROM sweeps WHERE sweep = ?', (sweep,))
+            self._db.executemany('INSERT INTO sweeps VALUES (?, ?, ?, ?)', [(sweep, i, key, created) for i, key in enumerate(keys)])
+
+    def sweeps(self):
+        """[{'sweep', 'created', 'scenarios'}], oldest first."""
+        found = self._db.execute('SELECT sweep, MIN(created), COUNT(*) FROM sweeps GROUP BY sweep ORDER BY MIN(created), sweep')
+        return [{'sweep': s, 'created': c, 'scenarios': n} for s, c, n in found]
+
+    def sweep_results(self, sweep):
+        """The summary rows of one sweep in scenario order, each with its 'key'."""
+        found = self._db.execute('SELECT runs.key, runs.summary FROM sweeps JOIN runs ON runs.key = sweeps.key '
+                                 'WHERE sweep = ? ORDER BY position', (sweep,))
+        return [dict(_decode_summary(summary), key=key) for key, summary in found]
+
+    def history(self, scenario):
+        """Every stored result for a scenario name, oldest first, each with its 'key', 'params' and 'created'."""
+        found = self._db.execute('SELECT key, params, summary, created FROM runs WHERE scenario = ? ORDER BY created, key', (scenario,))
+        return [dict(_decode_summary(summary), key=key, params=json.loads(params), created=created)
+                for key, params, summary, created in found]
+
+    def compare_sweeps(self, base, other, metric='days_to_100'):
+        """
+        Scenarios of two sweeps matched by name: [{'scenario', 'base', 'other', 'delta', 'changed'}] in base order,
+        then scenarios only in other. base/other are the metric's values (None when missing),
+        delta is other - base where both are numbers, and changed is whether the inputs differ.
+        """
+        base_rows = {r['scenario']: r for r in self.sweep_results(base)}
+        other_rows = {r['scenario']: r for r in self.sweep_results(other)}
+        comparison = []
+        for name in list(base_rows) + [n for n in other_rows if n not in base_rows]:
+            a, b = base_rows.get(name), other_rows.get(name)
+            va = a.get(metric) if a else None
+            vb = b.get(metric) if b else None
+            comparison.append({
+                'scenario': name,
+                'base': va,
+                'other': vb,
+                'delta': vb - va if isinstance(va, (int, float)) and isinstance(vb, (int, float)) else None,
+                'changed': a is None or b is None or a['key'] != b['key'],
+            })
+        return comparison
@@ -0,0 +1,146 @@
+# Columnar schedule representation for the calendar scheduler
+import array
+import datetime
+import numpy as np
+
+# Times are stored as whole minutes since EPOCH
+EPOCH = datetime.datetime(1970, 1, 1)
+MINUTES_PER_DAY = 24 * 60
+ROLES = ('tech', 'sci')
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+def to_minutes(dt):
+    return (dt - EPOCH) // datetime.timedelta(minutes=1)
+
+def from_minutes(minutes):
+    return EPOCH + datetime.timedelta(minutes=int(minutes))
+
+def day_to_date(day):
+    """Convert a day number (minutes // MINUTES_PER_DAY) back to a date."""
+    return datetime.date.fromordinal(EPOCH.toordinal() + int(day))
+
+class ScheduleTable:
+    """
+    Planned schedule with one row per sample-step, stored as parallel NumPy arrays:
+    sample (int32), step (int16 index into `steps`), start/end (int64 minutes since EPOCH),
+    duration (int32 minutes) and role (int8 index into ROLES).
+    Rows are in scheduling order, so each sample's rows are in the order its steps were planned.
+    """
+    def __init__(self, steps, sample_count, sample, step, start, end, duration, role):
+        self.steps = list(steps)
+        self.sample_count = sample_count
+        self.sample = np.asarray(sample, dtype=np.int32)
+        self.step = np.asarray(step, dtype=np.int16)
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.duration = np.asarray(duration, dtype=np.int32)
+        self.role = np.asarray(role, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.sample)
+
+    def __repr__(self):
+        return f"<ScheduleTable {self.sample_count} samples, {len(self.steps)} steps, {len(self)} rows>"
+
+    @classmethod
+    def from_sample_events(cls, sample_events):
+        """Build a table from the {sample_idx: [event dict, ...]} view."""
+        step_ids = {}
+        builder = ScheduleBuilder([], len(sample_events))
+        for idx, events in sample_events.items():
+            for e in events:
+                if e['step'] not in step_ids:
+                    step_ids[e['step']] = len(builder.steps)
+                    builder.steps.append(e['step'])
+                builder.add_batch(step_ids[e['step']], (idx,), to_minutes(e['planned_start']), to_minutes(e['planned_end']),
+                                  e['duration'], ROLE_CODES.get(e['staff_role'], 0))
+        return builder.build()
+
+    def to_sample_events(self):
+        """Rebuild the {sample_idx: [ {step, planned_start, planned_end, duration, staff_role}, ... ]} view."""
+        sample_events = {i: [] for i in range(self.sample_count)}
+        times = {}
+        for sample, step, start, end, duration, role in zip(self.sample.tolist(), self.step.tolist(), self.start.tolist(),
+                                                            self.end.tolist(), self.duration.tolist(), self.role.tolist()):
+            if start not in times:
+                times[start] = from_minutes(start)
+            if end not in times:
+                times[end] = from_minutes(end)
+            sample_events[sample].append({
+                'step': self.steps[step],
+                'planned_start': times[start],
+                'planned_end': times[end],
+                'duration': duration,
+                'staff_role': ROLES[role]
+            })
+        return sample_events
+
+    def events_for(self, sample_idx):
+        """Event dicts for a single sample."""
+        rows = np.flatnonzero(self.sample == sample_idx)
+        return [{
+            'step': self.steps[self.step[r]],
+            'planned_start': from_minutes(self.start[r]),
+            'planned_end': from_minutes(self.end[r]),
+            'duration': int(self.duration[r]),
+            'staff_role': ROLES[self.role[r]]
+        } for r in rows]
+
+    def last_end_by_sample(self):
+        """Latest planned end (minutes) of each sample; samples without events get -1."""
+        last = np.full(self.sample_count, -1, dtype=np.int64)
+        np.maximum.at(last, self.sample, self.end)
+        return last
+
+    def first_end(self):
+        """Earliest planned end (minutes), or None for an empty schedule."""
+        return int(self.end.min()) if len(self) else None
+
+    def start_days(self):
+        return self.start // MINUTES_PER_DAY
+
+    def end_days(self):
+        return self.end // MINUTES_PER_DAY
+
+def as_schedule(schedule):
+    """Accept either a ScheduleTable or the sample_events dict view."""
+    return schedule if isinstance(schedule, ScheduleTable) else ScheduleTable.from_sample_events(schedule)
+
+class ScheduleBuilder:
+    """Append-only builder the scheduler fills one batch at a time."""
+    def __init__(self, steps, sample_count):
+        self.steps = list(steps)
+        self.sample_count = sample_count
+        self._sample = array.array('i')
+        self._step = array.array('h')
+        self._start = array.array('q')
+        self._end = array.array('q')
+        self._duration = array.array('i')
+        self._role = array.array('b')
+
+    def add_batch(self, step_id, samples, start, end, duration, role_code):
+        n = len(samples)
+        self._sample.extend(samples)
+        self._step.extend((step_id,)*n)
+        self._start.extend((start,)*n)
+        self._end.extend((end,)*n)
+        self._duration.extend((duration,)*n)
+        self._role.extend((role_code,)*n)
+
+    def __len__(self):
+        return len(self._sample)
+
+    def truncate(self, rows):
+        """Drop every row after the first `rows`."""
+        for values in (self._sample, self._step, self._start, self._end, self._duration, self._role):
+            del values[rows:]
+
+    def build(self):
+        return ScheduleTable(self.steps, self.sample_count,
+                             _column(self._sample, np.int32), _column(self._step, np.int16),
+                             _column(self._start, np.int64), _column(self._end, np.int64),
+                             _column(self._duration, np.int32), _column(self._role, np.int8))
+
+def _column(values, dtype):
+    # Copy, so the builder can keep growing after a table is built
+    return np.frombuffer(values, dtype=dtype).copy() if len(values) else np.empty(0, dtype=dtype)
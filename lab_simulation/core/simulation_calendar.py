@@ -1,5 +1,11 @@
 import datetime
+import heapq
 from .lab_calendar import LabCalendar
+from .compiled_workflow import compile_workflow
+from .event_sinks import MemorySink, ScheduleStats
+from .profiling import SchedulerProfile
+from .schedule import ROLE_CODES, to_minutes
+from lab_simulation.resources.pools import ResourcePool
 from collections import defaultdict, deque
 
 ROLE_MAP = {
@@ -22,124 +28,217 @@ def get_batch_policy(batching):
     return batching.get('batch_policy', 'all')
 
 class LabSimulationWithCalendar:
-    def __init__(self, calendar=None, n_tech=2, n_sci=2, batching=None, equipment=None):
+    def __init__(self, calendar=None, n_tech=2, n_sci=2, batching=None, equipment=None, profiling=False):
         self.calendar = calendar or LabCalendar()
         self.n_tech = n_tech
         self.n_sci = n_sci
         self.batching = batching or {}
         self.equipment = equipment or []
         self.events = []  # (sample_id, step, planned_start, planned_end)
+        self.schedule = None  # ScheduleTable of the last in-memory run
+        self.stats = None  # ScheduleStats of the last run
+        self.pools = {}
+        self.checkpoints = None  # per-step scheduler state kept by incremental runs
+        self.resumed_from = None  # step index the last incremental run resumed at
+        self.profiling = profiling
+        self.profile = None  # SchedulerProfile.to_dict() of the last run, when profiling
 
-    def get_equipment_quantity(self, step_name):
+    def get_equipment(self, step_name):
         # Match equipment by step name (case-insensitive substring match)
         for eq in self.equipment:
             if eq['name'].lower() in step_name.lower() or step_name.lower() in eq['name'].lower():
-                return eq.get('quantity', 1)
-        return 1
+                return eq
+        return None
+
+    def get_equipment_quantity(self, step_name):
+        eq = self.get_equipment(step_name)
+        return eq.get('quantity', 1) if eq else 1
 
-    def simulate_sample_set(self, workflow_steps, sample_count, start_date=None):
+    def get_equipment_pool(self, step_name, start_date):
+        # Steps sharing an instrument share its pool; other steps get a single unit of their own
+        eq = self.get_equipment(step_name)
+        key = ('equipment', eq['name']) if eq else ('step', step_name)
+        if key not in self.pools:
+            self.pools[key] = ResourcePool(key[1], eq.get('quantity', 1) if eq else 1, start_date)
+        return self.pools[key]
+
+    def simulate_sample_set(self, workflow_steps, sample_count, start_date=None, durations=None):
         """
         Simulate the planned schedule for a set of samples, respecting lab calendar constraints.
-        workflow_steps: list of dicts with keys: 'Step Name', 'Time (min)', 'Previous Task', 'Next Task'
+        workflow_steps: list of dicts with keys: 'Step Name', 'Time (min)', 'Previous Task', 'Next Task', or a CompiledWorkflow
         sample_count: number of samples to simulate
         start_date: datetime.datetime for simulation start
+        durations: optional {step name: per-batch durations in minutes}, overriding 'Time (min)' batch by batch
+        Returns {sample_idx: [ {step, planned_start, planned_end, duration, staff_role}, ... ]}.
+        """
+        self.events = self.simulate_schedule(workflow_steps, sample_count, start_date, durations).to_sample_events()
+        return self.events
+
+    def _step_signature(self, workflow, step, node, dependencies, durations):
+        # Everything that can change how one step is scheduled, given the state it starts from
+        eq = self.get_equipment(step)
+        role = ROLE_MAP.get(workflow.task_types[node].lower(), 'tech')
+        batch_durations = durations.get(step) if durations else None
+        return (step, tuple(dependencies[node]), workflow.task_types[node], int(workflow.durations[node]),
+                get_batch_size(step, self.batching), role, self.n_tech if role == 'tech' else self.n_sci,
+                (eq['name'], eq.get('quantity', 1)) if eq else None,
+                tuple(int(d) for d in batch_durations) if batch_durations is not None else None)
+
+    def _checkpoint(self, step_end_times, builder, stats):
+        return {
+            'pools': {key: pool.copy() for key, pool in self.pools.items()},
+            # Finished end-time lists are never modified, so a shallow copy is enough
+            'step_end_times': dict(step_end_times),
+            'rows': len(builder),
+            'stats': stats.copy(),
+        }
+
+    def simulate_schedule(self, workflow_steps, sample_count, start_date=None, durations=None, sink=None, incremental=False):
+        """
+        Same as simulate_sample_set, but returns the schedule as a columnar ScheduleTable.
+        Times are kept as whole minutes.
+        sink: optional EventSink that receives each batch as it is scheduled; the return value is then sink.close().
+        Summary accumulators for the run are kept in self.stats either way.
+        incremental: checkpoint the scheduler state before every step (in-memory runs only). A later incremental
+        run with the same workflow, samples, start date, calendar and batch policy resumes from the checkpoint
+        of the first step whose parameters (batch size, staff count, equipment, durations) changed.
+        With profiling enabled, per-step counters for the run are left in self.profile (see SchedulerProfile).
         """
         if start_date is None:
             start_date = datetime.datetime.combine(datetime.date.today(), datetime.time(9,0))
-        # Build step dependency graph
-        step_map = {row['Step Name']: row for row in workflow_steps}
-        dependencies = {row['Step Name']: [d.strip() for d in row['Dependencies'].replace(';', ',').split(',') if d.strip() and d.strip().lower() != 'none'] for row in workflow_steps}
-        step_order = [row['Step Name'] for row in workflow_steps]
-        # Resource pools
-        tech_available = [start_date]*self.n_tech
-        sci_available = [start_date]*self.n_sci
-        # For each sample, track when each step can start
-        sample_events = {i: [] for i in range(sample_count)}
-        # Track when each sample is ready for each step
-        step_ready_times = {step: [start_date]*sample_count for step in step_order}
-        # For batching
-        batch_policy = get_batch_policy(self.batching)
-        for step in step_order:
-            batch_size = get_batch_size(step, self.batching)
-            ttype = step_map[step]['Task Type'].lower()
-            role = ROLE_MAP.get(ttype, 'tech')
-            duration = int(step_map[step]['Time (min)'])
-            # Equipment constraint
-            eq_quantity = self.get_equipment_quantity(step)
-            eq_available = [start_date]*eq_quantity
-            # For each batch
-            sample_idxs = list(range(sample_count))
-            completed = set()
-            while len(completed) < sample_count:
-                # Find samples ready for this step (dependencies met and not already processed)
-                ready_now = []
-                for idx in sample_idxs:
-                    if idx in completed:
-                        continue
-                    # Only consider sample ready if all dependencies are completed
-                    if dependencies[step]:
-                        dep_ends = []
-                        all_deps_done = True
-                        for dep in dependencies[step]:
-                            dep_event = next((e for e in sample_events[idx] if e['step']==dep), None)
-                            if dep_event is not None:
-                                dep_ends.append(dep_event['planned_end'])
-                            else:
-                                all_deps_done = False
-                                break
-                        if not all_deps_done:
-                            continue
-                        ready_time = max(dep_ends) if batch_policy == 'all' else min(dep_ends)
-                        ready_now.append((idx, ready_time))
-                    else:
-                        ready_now.append((idx, start_date))
-                # Sort by ready_time, take up to batch_size
-                ready_now.sort(key=lambda x: x[1])
-                batch = [idx for idx, _ in ready_now[:batch_size]]
-                if not batch:
-                    # If no samples are ready, advance time to the next soonest ready_time
-                    if ready_now:
-                        soonest = min(rt for _, rt in ready_now)
-                        for i in range(len(tech_available if role=='tech' else sci_available)):
-                            if role == 'tech':
-                                if tech_available[i] < soonest:
-                                    tech_available[i] = soonest
-                            else:
-                                if sci_available[i] < soonest:
-                                    sci_available[i] = soonest
-                    break
-                # Use the latest ready_time in the batch for 'all', earliest for 'min'
-                if batch_policy == 'all':
-                    batch_ready_time = max(ready_now[i][1] for i in range(len(batch)))
-                else:
-                    batch_ready_time = min(ready_now[i][1] for i in range(len(batch)))
-                # Assign staff
-                if role == 'tech':
-                    idx_staff = min(range(self.n_tech), key=lambda i: tech_available[i])
-                    staff_ready = tech_available[idx_staff]
+        profile = SchedulerProfile(self.calendar, sample_count) if self.profiling else None
+        calendar = profile.calendar if profile else self.calendar
+        # Integer step ids and dependency lists from the compiled workflow
+        workflow = compile_workflow(workflow_steps)
+        step_order = [row['Step Name'] for row in workflow.rows]
+        step_nodes = workflow.row_nodes.tolist()
+        dependencies = [workflow.dep_ids[workflow.dep_ptr[n]:workflow.dep_ptr[n + 1]].tolist() for n in range(len(workflow))]
+        # Resource pools, shared by every step of the run
+        self.pools = {
+            'tech': ResourcePool('tech', self.n_tech, start_date),
+            'sci': ResourcePool('sci', self.n_sci, start_date),
+        }
+        # Planned events go to the sink as each batch is scheduled
+        in_memory = sink is None
+        incremental = incremental and in_memory
+        sink = MemorySink() if in_memory else sink
+        sink.open(step_order, sample_count)
+        try:
+            stats = self.stats = ScheduleStats(step_order, sample_count)
+            # Planned end time of each finished step, indexed by sample, kept until its last dependent step
+            step_end_times = {}
+            first_step = 0
+            if incremental:
+                run_key = (tuple(step_order), sample_count, start_date, id(self.calendar), get_batch_policy(self.batching))
+                signatures = [self._step_signature(workflow, step, step_nodes[i], dependencies, durations) for i, step in enumerate(step_order)]
+                previous = self.checkpoints
+                if previous is not None and previous['run_key'] == run_key:
+                    first_step = next((i for i, (a, b) in enumerate(zip(signatures, previous['signatures'])) if a != b), len(step_order))
+                if first_step:
+                    # Resume from the state entering the first changed step
+                    state = previous['states'][first_step]
+                    builder = previous['builder']
+                    builder.truncate(state['rows'])
+                    sink.builder = builder
+                    stats = self.stats = state['stats'].copy()
+                    step_end_times = dict(state['step_end_times'])
+                    for key, pool in state['pools'].items():
+                        # A pool whose size changed was unused so far (its first user is a changed step), so it starts fresh
+                        if key not in ('tech', 'sci') or pool.capacity == self.pools[key].capacity:
+                            self.pools[key] = pool.copy()
+                    states = previous['states'][:first_step]
                 else:
-                    idx_staff = min(range(self.n_sci), key=lambda i: sci_available[i])
-                    staff_ready = sci_available[idx_staff]
-                # Assign equipment
-                idx_eq = min(range(eq_quantity), key=lambda i: eq_available[i])
-                eq_ready = eq_available[idx_eq]
-                planned_start = max(batch_ready_time, staff_ready, eq_ready)
-                planned_start = self.calendar.add_work_minutes(planned_start, 0)
-                planned_end = self.calendar.add_work_minutes(planned_start, duration)
-                # Update resource availability
-                if role == 'tech':
-                    tech_available[idx_staff] = planned_end
+                    states = []
+                self.checkpoints = {'run_key': run_key, 'signatures': signatures, 'states': states, 'builder': sink.builder}
+                self.resumed_from = first_step
+                if profile:
+                    profile.resumed_from = first_step
+            last_use = {}
+            for i, node in enumerate(step_nodes):
+                for dep in dependencies[node]:
+                    last_use[dep] = i
+            # For batching
+            batch_policy = get_batch_policy(self.batching)
+            for step_id, step in enumerate(step_order):
+                if step_id < first_step:
+                    continue
+                if profile:
+                    profile.step(step_id, step)
+                if incremental:
+                    states.append(self._checkpoint(step_end_times, sink.builder, stats))
+                node = step_nodes[step_id]
+                batch_size = get_batch_size(step, self.batching)
+                ttype = workflow.task_types[node].lower()
+                role = ROLE_MAP.get(ttype, 'tech')
+                duration = int(workflow.durations[node])
+                batch_durations = durations.get(step) if durations else None
+                staff_pool = self.pools[role]
+                # Equipment constraint
+                eq_pool = self.get_equipment_pool(step, start_date)
+                # A step is ready for every sample or for none of them: each earlier
+                # step either scheduled all samples or was never reached.
+                deps = dependencies[node]
+                ready = all(dep in step_end_times for dep in deps)
+                dep_ends = [step_end_times[dep] for dep in deps] if ready else None
+                for dep in deps:
+                    if last_use[dep] == step_id:
+                        step_end_times.pop(dep, None)
+                if not ready:
+                    continue
+                # Ready queue ordered by (ready_time, sample index)
+                if deps:
+                    pick = max if batch_policy == 'all' else min
+                    ready_queue = [(pick(ends[idx] for ends in dep_ends), idx) for idx in range(sample_count)]
+                    heapq.heapify(ready_queue)
                 else:
-                    sci_available[idx_staff] = planned_end
-                eq_available[idx_eq] = planned_end
-                for idx in batch:
-                    sample_events[idx].append({
-                        'step': step,
-                        'planned_start': planned_start,
-                        'planned_end': planned_end,
-                        'duration': duration,
-                        'staff_role': role
-                    })
-                    completed.add(idx)
-        self.events = sample_events
-        return sample_events
+                    ready_queue = [(start_date, idx) for idx in range(sample_count)]
+                if ready_queue and batch_size < 1:
+                    # No batch can be formed; advance staff to the soonest ready_time
+                    staff_pool.advance_to(ready_queue[0][0])
+                    continue
+                end_times = [None]*sample_count
+                batch_no = 0
+                while ready_queue:
+                    # Take up to batch_size samples in ready_time order
+                    ready_batch = [heapq.heappop(ready_queue) for _ in range(min(batch_size, len(ready_queue)))]
+                    batch = [idx for _, idx in ready_batch]
+                    # Use the latest ready_time in the batch for 'all', earliest for 'min'
+                    if batch_policy == 'all':
+                        batch_ready_time = ready_batch[-1][0]
+                    else:
+                        batch_ready_time = ready_batch[0][0]
+                    # Assign the staff member and equipment unit that free up first
+                    idx_staff, staff_ready = staff_pool.acquire()
+                    idx_eq, eq_ready = eq_pool.acquire()
+                    if profile:
+                        profile.batch(len(batch), batch_ready_time, staff_ready, eq_ready)
+                    planned_start = max(batch_ready_time, staff_ready, eq_ready)
+                    planned_start = calendar.add_work_minutes(planned_start, 0)
+                    if batch_durations is not None:
+                        duration = int(batch_durations[batch_no])
+                    batch_no += 1
+                    planned_end = calendar.add_work_minutes(planned_start, duration)
+                    # Update resource availability
+                    staff_pool.release(idx_staff, planned_end)
+                    eq_pool.release(idx_eq, planned_end)
+                    start_minutes, end_minutes = to_minutes(planned_start), to_minutes(planned_end)
+                    sink.write_batch(step_id, batch, start_minutes, end_minutes, duration, ROLE_CODES[role])
+                    stats.add_batch(step_id, batch, start_minutes, end_minutes)
+                    for idx in batch:
+                        end_times[idx] = planned_end
+                # Dependencies resolve to the first occurrence of a step
+                if last_use.get(node, -1) > step_id:
+                    step_end_times.setdefault(node, end_times)
+            if incremental:
+                # State after the last step, so an unchanged rerun resumes at the end
+                states.append(self._checkpoint(step_end_times, sink.builder, stats))
+            result = sink.close()
+        except BaseException:
+            # Cancelled or failed: let the sink release its file without producing a result
+            sink.abort()
+            raise
+        if profile:
+            self.profile = profile.finish()
+        if in_memory:
+            self.schedule = result
+        return result
@@ -0,0 +1,113 @@
+# Background what-if simulations with an LRU result cache, for interactive front ends
+import collections
+import concurrent.futures
+import hashlib
+import json
+import threading
+from .analytics import DailyActivity, summarize_completion
+from .compiled_workflow import load_workflow
+from .lab_calendar import get_calendar
+from .simulation_calendar import LabSimulationWithCalendar
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def run_simulation(workflow_file, n_tech, n_sci, batching, sample_count, start_date, equipment):
+    """
+    Simulate one what-if with its own simulator instance and return a small, JSON-ready result:
+    {'summary': summarize_completion() with ISO dates, 'days': day numbers, 'percent_complete': per day}.
+    """
+    calendar = get_calendar(country='US', work_hours_per_day=7)
+    sim = LabSimulationWithCalendar(calendar=calendar, n_tech=n_tech, n_sci=n_sci, batching=batching, equipment=equipment)
+    schedule = sim.simulate_schedule(load_workflow(workflow_file), sample_count=sample_count, start_date=start_date)
+    summary = summarize_completion(schedule, calendar, sim_start_date=start_date)
+    activity = DailyActivity.from_schedule(schedule)
+    return {
+        'summary': {k: v.isoformat() if hasattr(v, 'isoformat') else v for k, v in summary.items()},
+        'days': activity.day_numbers().tolist(),
+        'percent_complete': activity.percent_complete().tolist(),
+    }
+
+class SimulationService:
+    """
+    Runs simulations in a worker pool and keeps the last cache_size results, least recently used evicted first.
+    Runs are keyed by the workflow file's SHA-256, staffing, batching, sample count, start date and equipment.
+    A request for a key that is cached or already running reuses it instead of starting another run.
+    Every run builds its own simulator, so concurrent requests share no simulator state.
+    The service is thread-safe; executor defaults to a process pool of `workers`.
+    """
+    def __init__(self, workers=2, cache_size=64, executor=None):
+        self.workers = workers
+        self.cache_size = cache_size
+        self._executor = executor
+        self._results = collections.OrderedDict()
+        self._running = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def key(self, workflow_file, n_tech, n_sci, batching, sample_count, start_date, equipment=None):
+        """Cache key for a run, as a JSON string (so front ends can keep it client-side)."""
+        return json.dumps([file_digest(workflow_file), n_tech, n_sci, batching or {}, sample_count,
+                           start_date.isoformat(), equipment or []], sort_keys=True)
+
+    def submit(self, workflow_file, n_tech, n_sci, batching, sample_count, start_date, equipment=None):
+        """Start the run in the background unless it is cached or running; returns its key."""
+        key = self.key(workflow_file, n_tech, n_sci, batching, sample_count, start_date, equipment)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return key
+            if key in self._running:
+                self.hits += 1
+                return key
+            self.misses += 1
+            self._errors.pop(key, None)
+            future = self._running[key] = self._pool().submit(run_simulation, workflow_file, n_tech, n_sci, batching,
+                                                               sample_count, start_date, equipment)
+        future.add_done_callback(lambda f: self._store(key, f))
+        return key
+
+    def _store(self, key, future):
+        with self._lock:
+            self._running.pop(key, None)
+            error = future.exception() if not future.cancelled() else concurrent.futures.CancelledError()
+            if error is not None:
+                self._errors[key] = error
+                return
+            self._results[key] = future.result()
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def result(self, key):
+        """The run's result, or None while it is still running. A failed run raises its error once (and can then be resubmitted)."""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+            if key in self._running:
+                return None
+            if key in self._errors:
+                raise self._errors.pop(key)
+        raise KeyError('Unknown or evicted simulation; submit it again')
+
+    def run(self, *args, **kwargs):
+        """submit() and wait for the result."""
+        key = self.submit(*args, **kwargs)
+        with self._lock:
+            future = self._running.get(key)
+        # The done callback may not have stored the result yet, so read it from the future
+        return future.result() if future is not None else self.result(key)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,177 @@
+# Concurrent SimPy execution of a configured workflow DAG
+import simpy
+from lab_simulation.core.process_runner import equipment_stats, pick_equipment
+from lab_simulation.resources.equipment import Equipment
+from lab_simulation.resources.staff import Staff
+from lab_simulation.processes.steps import Step
+
+MINUTES_PER_UNIT = {'minutes': 1, 'hours': 60, 'days': 24 * 60}
+
+def step_minutes(step, minutes_per_day=24 * 60):
+    """Most likely duration of a step in simulation minutes."""
+    duration = step.duration.get('most_likely', 1)
+    if step.unit == 'days':
+        return duration * minutes_per_day
+    return duration * MINUTES_PER_UNIT.get(step.unit, 1)
+
+def step_predecessors(step_objs, dependencies=None):
+    """
+    {step key: [predecessor keys]} from the config's workflow_dependencies list
+    plus each step's own `dependencies`, in step order.
+    """
+    preds = {key: [] for key in step_objs}
+    for key, step in step_objs.items():
+        for dep in step.dependencies:
+            if dep in preds and dep not in preds[key]:
+                preds[key].append(dep)
+    for link in dependencies or []:
+        src, dst = link.get('from_step'), link.get('to_step')
+        if src in preds and dst in preds and src not in preds[dst]:
+            preds[dst].append(src)
+    return preds
+
+class StaffPool:
+    """Staff members in a FilterStore; a request takes the first free member with the skill."""
+    def __init__(self, env, staff_objs):
+        self.env = env
+        self.staff = list(staff_objs.values())
+        self.store = simpy.FilterStore(env, capacity=max(1, len(self.staff)))
+        self.store.items.extend(self.staff)
+
+    def can_staff(self, skill, level='basic'):
+        return any(s.has_skill(skill, level) for s in self.staff)
+
+    def get(self, skill, level='basic'):
+        return self.store.get(lambda s: s.has_skill(skill, level))
+
+    def put(self, staff):
+        return self.store.put(staff)
+
+class WorkflowEngine:
+    """
+    Runs every step of a workflow for sample_count samples at once.
+    Each step has a dispatcher that forms batches as samples finish all predecessor steps,
+    and every batch runs as its own process, so independent batches and branches (e.g. XRF and XRD)
+    proceed in parallel, limited only by equipment capacity and staff with the required skill.
+    External-lab steps use no lab staff or equipment. Times are minutes.
+    """
+    def __init__(self, env, step_objs, equipment_objs, staff_objs, dependencies=None, sample_count=1, minutes_per_day=24 * 60):
+        self.env = env
+        self.steps = step_objs
+        self.equipment = equipment_objs
+        self.staff = StaffPool(env, staff_objs)
+        self.sample_count = sample_count
+        self.minutes_per_day = minutes_per_day
+        self.preds = step_predecessors(step_objs, dependencies)
+        self.succs = {key: [] for key in step_objs}
+        for key, preds in self.preds.items():
+            for p in preds:
+                self.succs[p].append(key)
+        self.metrics = []
+        # Samples ready for each step, and how many predecessors each sample has finished per step
+        self._ready = {key: simpy.Store(env) for key in step_objs}
+        self._done_preds = {key: [0]*sample_count for key in step_objs}
+        self._pending_sinks = [sum(1 for key in step_objs if not self.succs[key])]*sample_count
+        # Succeeds with the sample's finish time once every final step has processed it
+        self.sample_done = [env.event() for _ in range(sample_count)]
+        self.completion_times = [None]*sample_count
+
+    @classmethod
+    def from_config(cls, env, config, sample_count=1, **kwargs):
+        """Build steps, equipment (incl. instruments) and staff from a load_config() config."""
+        equipment_objs = {}
+        for section in ('equipment', 'instruments'):
+            for key, conf in (config.get(section) or {}).items():
+                equipment_objs[key] = Equipment(env, conf.get('name', key), conf)
+        staff_objs = {k: Staff(env, v.get('name', k), v) for k, v in (config.get('staff') or {}).items()}
+        step_objs = {k: Step(v.get('name', k), v) for k, v in (config.get('workflow_steps') or {}).items()}
+        return cls(env, step_objs, equipment_objs, staff_objs, config.get('workflow_dependencies'), sample_count, **kwargs)
+
+    def start(self):
+        """Start every step dispatcher and release all samples into the root steps."""
+        for key in self.steps:
+            self.env.process(self._dispatch(key))
+        for key, preds in self.preds.items():
+            if not preds:
+                for idx in range(self.sample_count):
+                    self._ready[key].put(idx)
+        return self.env.all_of(self.sample_done)
+
+    def run(self):
+        """Simulate to completion; returns the per-batch metrics."""
+        done = self.start()
+        self.env.run(until=done)
+        return self.metrics
+
+    def _batch_size(self, step):
+        return max(1, min(step.max_batch_size, self.sample_count)) if step.can_batch else 1
+
+    def _dispatch(self, key):
+        step = self.steps[key]
+        batch_size = self._batch_size(step)
+        remaining = self.sample_count
+        batch_no = 0
+        while remaining:
+            # Wait for a full batch, or for the last samples
+            batch = []
+            for _ in range(min(batch_size, remaining)):
+                batch.append((yield self._ready[key].get()))
+            remaining -= len(batch)
+            batch_no += 1
+            # Queue on the least-loaded eligible unit now, so batches sent together spread across twins
+            eq_key, eq = (None, None) if step.external_lab else pick_equipment(step.equipment_required, self.equipment)
+            req = eq.request() if eq else None
+            self.env.process(self._run_batch(key, step, batch_no, batch, eq_key, eq, req))
+
+    def equipment_stats(self):
+        """{equipment key: queue statistics} for every unit."""
+        return equipment_stats(self.equipment)
+
+    def _run_batch(self, key, step, batch_no, samples, eq_key, eq, req):
+        duration = step_minutes(step, self.minutes_per_day)
+        skill = step.required_skills[0] if step.required_skills and not step.external_lab else None
+        # Steps whose skill nobody has run unstaffed rather than waiting forever
+        if skill and not self.staff.can_staff(skill, step.skill_level):
+            skill = None
+        queued = self.env.now
+        staff = None
+        if eq:
+            with req:
+                yield req
+                eq.granted(req)
+                if skill:
+                    staff = yield self.staff.get(skill, step.skill_level)
+                start = self.env.now
+                yield from eq.run(duration)
+        else:
+            if skill:
+                staff = yield self.staff.get(skill, step.skill_level)
+            start = self.env.now
+            yield self.env.timeout(duration)
+        if staff is not None:
+            yield self.staff.put(staff)
+        end = self.env.now
+        self.metrics.append({
+            'step': step.name,
+            'batch': batch_no,
+            'samples': len(samples),
+            'queued': queued,
+            'start': start,
+            'end': end,
+            'equipment': eq_key,
+            'staff': staff.name if staff is not None else None,
+            'duration': end - start
+        })
+        for idx in samples:
+            self._finish(key, idx)
+
+    def _finish(self, key, idx):
+        if not self.succs[key]:
+            self._pending_sinks[idx] -= 1
+            if self._pending_sinks[idx] == 0:
+                self.completion_times[idx] = self.env.now
+                self.sample_done[idx].succeed(self.env.now)
+        for nxt in self.succs[key]:
+            self._done_preds[nxt][idx] += 1
+            if self._done_preds[nxt][idx] == len(self.preds[nxt]):
+                self._ready[nxt].put(idx)
@@ -1,9 +1,10 @@
-import csv
 from collections import defaultdict
+from .compiled_workflow import load_workflow
 
 class WorkflowStep:
     def __init__(self, row):
         self.name = row['Step Name']
+        # Each row keeps its own links exactly as written
         self.prev = [x.strip() for x in row['Previous Task'].split(';') if x.strip()]
         self.deps = [x.strip() for x in row['Dependencies'].split(';') if x.strip()]
         self.next = [x.strip() for x in row['Next Task'].split(';') if x.strip()]
@@ -18,12 +19,8 @@ class WorkflowStep:
         return f"<WorkflowStep {self.name}>"
 
 def parse_workflow_csv(path):
-    steps = []
-    with open(path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            steps.append(WorkflowStep(row))
-    return steps
+    # The rows come from the shared compiled workflow, so the CSV is read once per process
+    return [WorkflowStep(row) for row in load_workflow(path).rows]
 
 def build_workflow_graph(steps):
     graph = defaultdict(list)
@@ -5,7 +5,8 @@ class Equipment:
     def __init__(self, env, name, config=None):
         self.env = env
         self.name = name
-        self.resource = simpy.Resource(env, capacity=config.get('capacity', 1) if config else 1)
+        # Capacity may be quoted in hand-edited configs
+        self.resource = simpy.Resource(env, capacity=int(config.get('capacity', 1)) if config else 1)
         self.state = 'idle'
         self.config = config or {}
         # Timing parameters
@@ -27,17 +28,53 @@ class Equipment:
         self.automation_level = self.config.get('automation_level')
         self.requires_supervision = self.config.get('requires_supervision', True)
         self.samples_processed = 0
+        # Queue statistics
+        self.requests = 0
+        self.total_wait = 0
+        self.max_queue = 0
+        self.busy_time = 0
+
+    def load(self):
+        """Busy plus queued requests per unit of capacity."""
+        return (len(self.resource.users) + len(self.resource.queue)) / self.resource.capacity
+
+    def request(self):
+        """A request on self.resource that feeds the queue statistics; call granted() once it is granted."""
+        req = self.resource.request()
+        req.requested_at = self.env.now
+        self.requests += 1
+        self.max_queue = max(self.max_queue, len(self.resource.queue))
+        return req
+
+    def granted(self, req):
+        self.total_wait += self.env.now - req.requested_at
+
+    def queue_stats(self):
+        capacity_time = self.env.now * self.resource.capacity
+        return {
+            'requests': self.requests,
+            'mean_wait': self.total_wait / self.requests if self.requests else 0,
+            'max_queue': self.max_queue,
+            'busy_time': self.busy_time,
+            'utilization': self.busy_time / capacity_time if capacity_time else 0
+        }
 
     def use(self, duration):
-        with self.resource.request() as req:
+        with self.request() as req:
             yield req
-            self.state = 'running'
-            yield self.env.timeout(duration)
+            self.granted(req)
+            yield from self.run(duration)
+
+    def run(self, duration):
+        # Caller already holds a unit of self.resource
+        self.state = 'running'
+        yield self.env.timeout(duration)
+        self.busy_time += duration
+        self.state = 'idle'
+        self.samples_processed += 1
+        # Maintenance check
+        if self.max_samples_before_maintenance and self.samples_processed >= self.max_samples_before_maintenance:
+            self.state = 'maintenance'
+            yield self.env.timeout(self.maintenance_duration_hours * 60)  # hours to minutes
+            self.samples_processed = 0
             self.state = 'idle'
-            self.samples_processed += 1
-            # Maintenance check
-            if self.max_samples_before_maintenance and self.samples_processed >= self.max_samples_before_maintenance:
-                self.state = 'maintenance'
-                yield self.env.timeout(self.maintenance_duration_hours * 60)  # hours to minutes
-                self.samples_processed = 0
-                self.state = 'idle'
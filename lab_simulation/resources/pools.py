@@ -0,0 +1,52 @@
+# Priority-queue resource pools for the calendar scheduler
+import heapq
+
+class ResourcePool:
+    """
+    A pool of interchangeable units (staff or instrument units) ordered by the time each unit becomes free.
+    acquire/release are O(log k); ties go to the lowest unit index.
+    """
+    def __init__(self, name, capacity, available_at):
+        self.name = name
+        self.capacity = capacity
+        # Equal times with increasing unit indexes already form a valid heap
+        self._heap = [(available_at, unit) for unit in range(capacity)]
+
+    def acquire(self):
+        """Take the unit that frees up first. Returns (unit, available_at)."""
+        if not self._heap:
+            raise ValueError(f"Resource pool '{self.name}' has no free units")
+        available_at, unit = heapq.heappop(self._heap)
+        return unit, available_at
+
+    def release(self, unit, available_at):
+        """Return a unit to the pool, busy until available_at."""
+        heapq.heappush(self._heap, (available_at, unit))
+
+    def copy(self):
+        pool = ResourcePool.__new__(ResourcePool)
+        pool.name = self.name
+        pool.capacity = self.capacity
+        pool._heap = list(self._heap)
+        return pool
+
+    def next_available(self):
+        return self._heap[0][0]
+
+    def advance_to(self, when):
+        """Make no unit available before `when`."""
+        self._heap = [(max(t, when), unit) for t, unit in self._heap]
+        heapq.heapify(self._heap)
+
+    def availability(self):
+        """Free time of every unit, indexed by unit."""
+        times = [None]*self.capacity
+        for t, unit in self._heap:
+            times[unit] = t
+        return times
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __repr__(self):
+        return f"<ResourcePool {self.name} x{self.capacity}>"
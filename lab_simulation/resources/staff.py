@@ -1,12 +1,16 @@
 # Staff base class
 import simpy
 
+# Ordered skill levels used in the lab config
+SKILL_LEVELS = {'none': 0, 'basic': 1, 'intermediate': 2, 'expert': 3}
+
 class Staff:
-    def __init__(self, env, name, config=None):
+    def __init__(self, env, name, config=None, skills=None):
         self.env = env
         self.name = name
         self.config = config or {}
-        self.skills = self.config.get('skills', {})
+        # skills: {skill: {'level': ...}} as in the lab config, or a plain list of skill names
+        self.skills = skills if skills is not None else self.config.get('skills', {})
         self.role = self.config.get('role')
         self.experience_years = self.config.get('experience_years', 0)
         self.efficiency_factor = self.config.get('efficiency_factor', 1.0)
@@ -16,3 +20,17 @@ class Staff:
         self.sick_days_per_year = self.config.get('sick_days_per_year', 0)
         self.training_days_per_year = self.config.get('training_days_per_year', 0)
         self.full_time_equivalent = self.config.get('full_time_equivalent', 1.0)
+
+    def skill_level(self, skill):
+        """Level name for skill ('none' if the staff member lacks it)."""
+        if isinstance(self.skills, dict):
+            entry = self.skills.get(skill)
+            if entry is None:
+                return 'none'
+            return entry.get('level', 'basic') if isinstance(entry, dict) else str(entry)
+        return 'basic' if skill in self.skills else 'none'
+
+    def has_skill(self, skill, level='basic'):
+        """True if the skill is held at `level` or above; level 'none' in the config means not held."""
+        have = SKILL_LEVELS.get(self.skill_level(skill), 0)
+        return have > 0 and have >= SKILL_LEVELS.get(level, 1)
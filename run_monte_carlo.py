@@ -0,0 +1,41 @@
+import argparse
+import datetime
+import os
+from lab_simulation.core.compiled_workflow import load_workflow
+from lab_simulation.core.config_loader import load_config
+from lab_simulation.core.lab_calendar import get_calendar
+from lab_simulation.core.monte_carlo import run_monte_carlo, step_ranges_from_config
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo completion-date distribution using triangular step durations.')
+    parser.add_argument('--sim-config', default='sim_config.yaml')
+    parser.add_argument('--replications', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (0 = one per CPU)')
+    parser.add_argument('--spread', type=float, nargs=2, metavar=('LOW', 'HIGH'),
+                        help="fractions below/above 'Time (min)' for steps without an explicit range, e.g. 0.2 0.5")
+    parser.add_argument('--config', help='take (min, most_likely, max) ranges for matching step names from this lab config')
+    args = parser.parse_args()
+
+    sim_config = load_config(args.sim_config)
+    workflow_steps = load_workflow(sim_config.get('workflow_file', 'Rock_Workflow_CLEAN.csv'))
+    lab_config = load_config(sim_config.get('lab_config_file', 'lab_config.yaml'))
+    staff = sim_config.get('staff', {'tech': 2, 'sci': 2})
+    start_date = datetime.datetime.strptime(sim_config.get('start_date', '2025-06-18 09:00'), '%Y-%m-%d %H:%M')
+    calendar = get_calendar(country='US', work_hours_per_day=7)
+    ranges = step_ranges_from_config(load_config(args.config), calendar.work_hours_per_day) if args.config else None
+
+    report = run_monte_carlo(
+        workflow_steps, sim_config.get('samples', 100), start_date,
+        replications=args.replications, seed=args.seed, workers=args.workers or os.cpu_count(),
+        ranges=ranges, spread=args.spread, calendar=calendar,
+        n_tech=staff['tech'], n_sci=staff['sci'], batching=sim_config.get('batching', {}), equipment=lab_config['equipment'],
+    )
+    print(f"\nMonte Carlo Summary ({report['replications']} replications):")
+    print("Milestone,P10,P50,P90")
+    for key in ('business_days_to_50', 'business_days_to_100', 'date_50', 'date_100'):
+        values = report[key]
+        print(f"{key},{values['p10']},{values['p50']},{values['p90']}")
+
+if __name__ == "__main__":
+    main()
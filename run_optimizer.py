@@ -0,0 +1,48 @@
+import argparse
+import datetime
+import os
+from lab_simulation.core.compiled_workflow import load_workflow
+from lab_simulation.core.config_loader import load_config
+from lab_simulation.core.lab_calendar import get_calendar
+from lab_simulation.core.optimizer import DeadlineOptimizer
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the smallest staffing and batch sizes that meet the project deadline.')
+    parser.add_argument('--sim-config', default='sim_config.yaml')
+    parser.add_argument('--config', default='rock_analysis_configs.txt', help='lab config providing project.deadline_days')
+    parser.add_argument('--deadline', type=int, help='deadline in business days (overrides project.deadline_days)')
+    parser.add_argument('--max-tech', type=int, default=10)
+    parser.add_argument('--max-sci', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (0 = one per CPU)')
+    args = parser.parse_args()
+
+    sim_config = load_config(args.sim_config)
+    deadline = args.deadline
+    if deadline is None:
+        deadline = (load_config(args.config).get('project') or {}).get('deadline_days')
+    if deadline is None:
+        parser.error('no deadline: pass --deadline or set project.deadline_days in --config')
+    workflow_steps = load_workflow(sim_config.get('workflow_file', 'Rock_Workflow_CLEAN.csv'))
+    lab_config = load_config(sim_config.get('lab_config_file', 'lab_config.yaml'))
+    start_date = datetime.datetime.strptime(sim_config.get('start_date', '2025-06-18 09:00'), '%Y-%m-%d %H:%M')
+
+    optimizer = DeadlineOptimizer(
+        workflow_steps, sim_config.get('samples', 100), start_date, deadline,
+        equipment=lab_config['equipment'], calendar=get_calendar(country='US', work_hours_per_day=7),
+        batch_policy=(sim_config.get('batching') or {}).get('batch_policy', 'all'),
+        max_tech=args.max_tech, max_sci=args.max_sci, workers=args.workers or os.cpu_count(),
+    )
+    result = optimizer.run()
+    print(f"\nDeadline: {result['deadline_days']} business days")
+    if result['feasible']:
+        print(f"Staff: {result['n_tech']} tech, {result['n_sci']} sci")
+    else:
+        print(f"Infeasible: {result['n_tech']} tech, {result['n_sci']} sci still miss the deadline")
+    print(f"Business days to 100%: {result['business_days_to_100']}")
+    print("Batch sizes:")
+    for step, size in result['batch_sizes'].items():
+        print(f"  {step}: {size}")
+    print(f"Simulations: {result['simulations']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,236 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import sys
 import yaml
-import csv
 import datetime
-from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.analytics import summarize_completion
+from lab_simulation.core.compiled_workflow import load_workflow
+from lab_simulation.core.config_loader import load_config
+from lab_simulation.core.lab_calendar import get_calendar
+from lab_simulation.core.profiling import capture
+from lab_simulation.core.results_store import ResultsStore, run_key
 from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
-from run_burn_plots import summarize_completion
 
-def run_scenarios(scenarios_file='scenarios.yaml', sim_config_file='sim_config.yaml'):
-    with open(sim_config_file, 'r') as f:
-        sim_config = yaml.safe_load(f)
+SUMMARY_HEADER = "Scenario,Tech,Sci,BusinessDaysTo50,BusinessDaysTo100,Date50,Date100"
+CALENDAR_SETTINGS = {'country': 'US', 'work_hours_per_day': 7}
+
+# Inputs shared by every scenario, installed once per worker process
+_worker_inputs = {}
+
+def load_inputs(sim_config_file='sim_config.yaml'):
+    """Load the sim config, workflow CSV and lab config shared by all scenarios."""
+    sim_config = load_config(sim_config_file)
     workflow_file = sim_config.get('workflow_file', 'Rock_Workflow_CLEAN.csv')
     lab_config_file = sim_config.get('lab_config_file', 'lab_config.yaml')
-    with open(workflow_file, newline='', encoding='utf-8') as csvfile:
-        reader = list(csv.DictReader(csvfile))
-        workflow_steps = [row for row in reader]
-    with open(lab_config_file, 'r') as f:
-        lab_config = yaml.safe_load(f)
+    workflow_steps = load_workflow(workflow_file)
+    lab_config = load_config(lab_config_file)
+    return sim_config, workflow_steps, lab_config
+
+def scenario_name(scenario):
+    staff = scenario['staff']
+    return scenario.get('name', f"tech{staff['tech']}_sci{staff['sci']}")
+
+def _file_name(scenario):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', scenario_name(scenario))
+
+def _file_prefix(directory, scenario):
+    return os.path.join(directory, _file_name(scenario))
+
+def check_file_names(scenarios):
+    """
+    Raise ValueError if two scenarios would write the same profile or chart files, e.g. 'a/b' and 'a_b'.
+    Names are compared case-insensitively, as some filesystems do.
+    """
+    seen = {}
+    for scenario in scenarios:
+        name = _file_name(scenario)
+        if name.casefold() in seen:
+            raise ValueError(f"scenarios {seen[name.casefold()]!r} and {scenario_name(scenario)!r} would both write files "
+                             f"named {name!r}; rename one")
+        seen[name.casefold()] = scenario_name(scenario)
+
+def scenario_params(scenario, sim_config):
+    """The scenario's staffing, sample count, start date and batching, with sim_config defaults filled in."""
+    return {
+        'staff': scenario['staff'],
+        'samples': scenario.get('samples', sim_config.get('samples', 100)),
+        'start_date': scenario.get('start_date', sim_config.get('start_date', '2025-06-18 09:00')),
+        'batching': scenario.get('batching', sim_config.get('batching', {})),
+    }
+
+def _render_charts(schedule, calendar, scenario, charts_dir, chart_formats):
+    # Plotting is only imported by runs that draw charts
+    from visualize_burn import render_burn_charts
+    render_burn_charts(schedule, calendar, _file_prefix(charts_dir, scenario), formats=chart_formats)
+
+def run_scenario(scenario, sim_config, workflow_steps, lab_config, profile_dir=None, charts_dir=None, chart_formats=('png',),
+                 keep_schedule=False):
+    """
+    Simulate one scenario and return its summary row (or (row, ScheduleTable) with keep_schedule).
+    profile_dir: run the simulation under cProfile and tracemalloc, writing <scenario>.prof (pstats)
+    and <scenario>.json (scheduler counters, wall time and peak memory) there.
+    charts_dir: render the burn charts headlessly to <scenario>_sample_burn.<fmt> and <scenario>_project_burn.<fmt>
+    there, for each of chart_formats.
+    """
+    # Cached per process, so every scenario in a worker shares it
+    calendar = get_calendar(**CALENDAR_SETTINGS)
+    params = scenario_params(scenario, sim_config)
+    staff = params['staff']
+    sample_count = params['samples']
+    start_date = datetime.datetime.strptime(params['start_date'], '%Y-%m-%d %H:%M')
+    batching = params['batching']
+    sim = LabSimulationWithCalendar(
+        calendar=calendar,
+        n_tech=staff['tech'],
+        n_sci=staff['sci'],
+        batching=batching,
+        equipment=lab_config['equipment'],
+        profiling=profile_dir is not None
+    )
+    if profile_dir is None:
+        schedule = sim.simulate_schedule(workflow_steps, sample_count=sample_count, start_date=start_date)
+    else:
+        prefix = _file_prefix(profile_dir, scenario)
+        schedule, run = capture(prefix + '.prof', sim.simulate_schedule, workflow_steps, sample_count=sample_count, start_date=start_date)
+        with open(prefix + '.json', 'w', encoding='utf-8') as f:
+            json.dump(dict(run, scheduler=sim.profile), f, indent=2)
+    summary = summarize_completion(schedule, calendar, sim_start_date=start_date)
+    if charts_dir is not None:
+        _render_charts(schedule, calendar, scenario, charts_dir, chart_formats)
+    row = {
+        'scenario': scenario_name(scenario),
+        'tech': staff['tech'],
+        'sci': staff['sci'],
+        'days_to_50': summary['business_days_to_50'],
+        'days_to_100': summary['business_days_to_100'],
+        'date_50': summary['date_50'],
+        'date_100': summary['date_100'],
+    }
+    return (row, schedule) if keep_schedule else row
+
+def format_row(r):
+    return f"{r['scenario']},{r['tech']},{r['sci']},{r['days_to_50']},{r['days_to_100']},{r['date_50']},{r['date_100']}"
+
+def _init_worker(sim_config, workflow_steps, lab_config, options):
+    _worker_inputs.update(options, sim_config=sim_config, workflow_steps=workflow_steps, lab_config=lab_config)
+
+def _run_in_worker(index, scenario):
+    return index, run_scenario(scenario, **_worker_inputs)
+
+def iter_scenario_results(scenarios, sim_config, workflow_steps, lab_config, workers=1, **options):
+    """
+    Yield (index, row) for each scenario as soon as it finishes.
+    With workers > 1 scenarios run in a process pool; the inputs are shipped to each worker once.
+    options: profile_dir, charts_dir, chart_formats and keep_schedule, passed on to run_scenario.
+    """
+    if options.get('profile_dir') is not None or options.get('charts_dir') is not None:
+        check_file_names(scenarios)
+    if workers <= 1:
+        for index, scenario in enumerate(scenarios):
+            yield index, run_scenario(scenario, sim_config, workflow_steps, lab_config, **options)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(sim_config, workflow_steps, lab_config, options)) as pool:
+        futures = [pool.submit(_run_in_worker, index, scenario) for index, scenario in enumerate(scenarios)]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+def run_scenarios(scenarios_file='scenarios.yaml', sim_config_file='sim_config.yaml', workers=1, stream=None, output=None, profile_dir=None,
+                  charts_dir=None, chart_formats=('png',), store=None, sweep=None, store_schedules=False):
+    """
+    Run every scenario in scenarios_file and print the summary table in scenario order.
+    stream: file object that receives each summary row as soon as its scenario finishes
+    output: optional CSV path for the final, ordered table
+    profile_dir: optional directory for per-scenario profiles (see run_scenario)
+    charts_dir: optional directory for per-scenario burn charts in chart_formats (see run_scenario)
+    store: optional ResultsStore path. Scenarios whose inputs (workflow, lab config, calendar settings and
+    scenario parameters) already have a stored result are not simulated again; new results are added, and the
+    run is recorded as sweep `sweep` (default: the current time). Profiling always simulates; charts reuse a
+    stored result only if its schedule was stored too, which store_schedules enables.
+    """
     with open(scenarios_file, 'r') as f:
         scenarios = yaml.safe_load(f)['scenarios']
-    results = []
-    for scenario in scenarios:
-        staff = scenario['staff']
-        sample_count = scenario.get('samples', sim_config.get('samples', 100))
-        start_date = datetime.datetime.strptime(scenario.get('start_date', sim_config.get('start_date', '2025-06-18 09:00')), '%Y-%m-%d %H:%M')
-        batching = scenario.get('batching', sim_config.get('batching', {}))
-        sim = LabSimulationWithCalendar(
-            calendar=LabCalendar(country='US', work_hours_per_day=7),
-            n_tech=staff['tech'],
-            n_sci=staff['sci'],
-            batching=batching,
-            equipment=lab_config['equipment']
-        )
-        sample_events = sim.simulate_sample_set(workflow_steps, sample_count=sample_count, start_date=start_date)
-        summary = summarize_completion(sample_events, LabCalendar(country='US', work_hours_per_day=7), sim_start_date=start_date)
-        results.append({
-            'scenario': scenario.get('name', f"tech{staff['tech']}_sci{staff['sci']}"),
-            'tech': staff['tech'],
-            'sci': staff['sci'],
-            'days_to_50': summary['business_days_to_50'],
-            'days_to_100': summary['business_days_to_100'],
-            'date_50': summary['date_50'],
-            'date_100': summary['date_100'],
-        })
+    if profile_dir or charts_dir:
+        check_file_names(scenarios)
+    sim_config, workflow_steps, lab_config = load_inputs(sim_config_file)
+    for directory in (profile_dir, charts_dir):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    results = [None]*len(scenarios)
+    store = ResultsStore(store) if store else None
+    params = [scenario_params(scenario, sim_config) for scenario in scenarios]
+    keys = [run_key(workflow_steps, lab_config, CALENDAR_SETTINGS, p) for p in params] if store else None
+    todo = []
+    done = 0
+
+    def report(row, note=''):
+        if stream is not None:
+            stream.write(f"[{done}/{len(scenarios)}] {format_row(row)}{note}\n")
+            stream.flush()
+
+    try:
+        for index, scenario in enumerate(scenarios):
+            cached = store.get(keys[index]) if store and profile_dir is None else None
+            if cached is not None and charts_dir is not None:
+                schedule = store.schedule(keys[index])
+                if schedule is None:
+                    cached = None
+                else:
+                    _render_charts(schedule, get_calendar(**CALENDAR_SETTINGS), scenario, charts_dir, chart_formats)
+            if cached is None:
+                todo.append(index)
+                continue
+            # The name is not part of the key, so a renamed scenario still reuses its result
+            results[index] = dict(cached, scenario=scenario_name(scenario))
+            done += 1
+            report(results[index], ' (stored)')
+        keep_schedule = bool(store and store_schedules)
+        finished = iter_scenario_results([scenarios[i] for i in todo], sim_config, workflow_steps, lab_config, workers,
+                                         profile_dir=profile_dir, charts_dir=charts_dir, chart_formats=chart_formats,
+                                         keep_schedule=keep_schedule)
+        for position, row in finished:
+            index = todo[position]
+            schedule = None
+            if keep_schedule:
+                row, schedule = row
+            results[index] = row
+            if store:
+                store.put(keys[index], row, params[index], schedule)
+            done += 1
+            report(row)
+        if store:
+            store.record_sweep(sweep or datetime.datetime.now().isoformat(timespec='seconds'), keys)
+    finally:
+        if store:
+            store.close()
     print("\nScenario Summary Table:")
-    print("Scenario,Tech,Sci,BusinessDaysTo50,BusinessDaysTo100,Date50,Date100")
+    print(SUMMARY_HEADER)
     for r in results:
-        print(f"{r['scenario']},{r['tech']},{r['sci']},{r['days_to_50']},{r['days_to_100']},{r['date_50']},{r['date_100']}")
+        print(format_row(r))
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(SUMMARY_HEADER + "\n")
+            for r in results:
+                f.write(format_row(r) + "\n")
+    return results
 
 if __name__ == "__main__":
-    run_scenarios()
+    parser = argparse.ArgumentParser(description='Run the scenarios in a scenario file and summarize completion times.')
+    parser.add_argument('--scenarios', default='scenarios.yaml')
+    parser.add_argument('--sim-config', default='sim_config.yaml')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (0 = one per CPU)')
+    parser.add_argument('--output', help='write the summary table to this CSV file')
+    parser.add_argument('--profile', metavar='DIR', help='write cProfile/tracemalloc and scheduler counters per scenario to DIR')
+    parser.add_argument('--charts', metavar='DIR', help='render each scenario\'s burn charts to DIR without a display')
+    parser.add_argument('--chart-format', action='append', choices=('png', 'svg', 'pdf'),
+                        help='chart file format (repeatable; default png)')
+    parser.add_argument('--store', metavar='DB', help='SQLite results store: reuse stored results and add new ones')
+    parser.add_argument('--sweep', help='name this run in the store (default: the current time)')
+    parser.add_argument('--store-schedules', action='store_true', help='also store each new full schedule')
+    args = parser.parse_args()
+    run_scenarios(args.scenarios, args.sim_config, workers=args.workers or os.cpu_count(), stream=sys.stderr, output=args.output,
+                  profile_dir=args.profile, charts_dir=args.charts, chart_formats=tuple(args.chart_format or ('png',)),
+                  store=args.store, sweep=args.sweep, store_schedules=args.store_schedules)
@@ -0,0 +1,27 @@
+import csv
+import pytest
+from lab_simulation.core import compiled_workflow, config_loader
+from workflow_fixture import WORKFLOW_COLUMNS, WORKFLOW_ROWS
+
+
+@pytest.fixture(autouse=True)
+def private_caches(tmp_path, monkeypatch):
+    # Keep test runs out of the user's cache directory
+    monkeypatch.setattr(compiled_workflow, 'CACHE_DIR', str(tmp_path / 'workflow_cache'))
+    monkeypatch.setattr(config_loader, 'CACHE_DIR', str(tmp_path / 'config_cache'))
+
+
+@pytest.fixture
+def workflow_csv(tmp_path):
+    path = tmp_path / 'Rock_Workflow_CLEAN.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(WORKFLOW_COLUMNS)
+        writer.writerows(WORKFLOW_ROWS)
+    return str(path)
+
+
+@pytest.fixture
+def workflow_steps(workflow_csv):
+    with open(workflow_csv, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
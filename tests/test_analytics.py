@@ -0,0 +1,54 @@
+import datetime
+from lab_simulation.core.analytics import DailyActivity, completion_curve, milestone_dates, summarize_completion
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+
+
+def event(step, end):
+    return {'step': step, 'planned_start': end - datetime.timedelta(hours=1), 'planned_end': end, 'duration': 60, 'staff_role': 'tech'}
+
+
+def test_summary_counts_business_days_to_each_percentile():
+    cal = LabCalendar(holiday_list=[datetime.date(2025, 7, 4)])
+    # Samples finish Mon 30 Jun, Tue 1 Jul, Thu 3 Jul and Mon 7 Jul
+    finish = [datetime.datetime(2025, 6, 30, 12), datetime.datetime(2025, 7, 1, 12), datetime.datetime(2025, 7, 3, 12), datetime.datetime(2025, 7, 7, 12)]
+    sample_events = {i: [event('A', end - datetime.timedelta(hours=2)), event('B', end)] for i, end in enumerate(finish)}
+    summary = summarize_completion(sample_events, cal, sim_start_date=START, percentiles=(25, 50, 90, 100))
+    assert summary['date_25'] == datetime.date(2025, 6, 30)
+    assert summary['date_50'] == datetime.date(2025, 7, 1)
+    assert summary['date_90'] == summary['date_100'] == datetime.date(2025, 7, 7)
+    # 4 July is a holiday, weekends are skipped
+    assert summary['business_days_to_100'] == 5
+    assert list(summary) == ['business_days_to_25', 'business_days_to_50', 'business_days_to_90', 'business_days_to_100',
+                             'date_25', 'date_50', 'date_90', 'date_100']
+
+
+def test_table_stats_and_dict_agree(workflow_steps):
+    cal = LabCalendar(holiday_list=[])
+    sim = LabSimulationWithCalendar(calendar=cal, n_tech=2, n_sci=1, batching={'enabled': True, 'default_batch_size': 3})
+    schedule = sim.simulate_schedule(workflow_steps, 20, START)
+    expected = summarize_completion(schedule, cal, sim_start_date=START, percentiles=(10, 50, 100))
+    assert summarize_completion(sim.stats, cal, sim_start_date=START, percentiles=(10, 50, 100)) == expected
+    assert summarize_completion(schedule.to_sample_events(), cal, sim_start_date=START, percentiles=(10, 50, 100)) == expected
+    days, done = completion_curve(schedule)
+    assert done[-1] == 20 and list(done) == sorted(done)
+    assert milestone_dates(schedule, (0,))[0] <= expected['date_10']
+
+
+def test_daily_activity_counts_each_indexed_day():
+    sample_events = {
+        0: [event('A', datetime.datetime(2025, 7, 1, 12)), event('B', datetime.datetime(2025, 7, 7, 12))],
+        1: [event('A', datetime.datetime(2025, 7, 3, 12))],
+    }
+    # B runs from 1 July to 7 July
+    sample_events[0][1]['planned_start'] = datetime.datetime(2025, 7, 1, 13)
+    activity = DailyActivity.from_schedule(sample_events)
+    assert activity.steps == ['A', 'B']
+    assert activity.dates() == [datetime.date(2025, 7, 1), datetime.date(2025, 7, 3), datetime.date(2025, 7, 7)]
+    assert activity.day_numbers().tolist() == [0, 2, 6]
+    assert activity.active.tolist() == [[1, 1, 0], [1, 1, 1]]
+    assert activity.cumulative_activity().tolist() == [[1, 2, 2], [1, 2, 3]]
+    assert activity.completed.tolist() == [[1, 1, 0], [0, 0, 1]]
+    assert activity.percent_complete()[-1] == 100
@@ -0,0 +1,77 @@
+import datetime
+import os
+import pytest
+from lab_simulation.core import compiled_workflow
+from lab_simulation.core.compiled_workflow import compile_workflow, load_workflow
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
+
+
+def test_ids_adjacency_and_pert(workflow_steps):
+    workflow = compile_workflow(workflow_steps)
+    assert workflow.steps[:workflow.n_defined] == [row['Step Name'] for row in workflow_steps]
+    assert workflow.steps[workflow.n_defined:] == ['START', 'STOP']
+    report = workflow.index['Report']
+    assert workflow.dependencies(report) == workflow_steps[-1]['Dependencies'].split(';')
+    assert workflow.steps[workflow.topo_order[0]] == 'START'
+    position = {n: i for i, n in enumerate(workflow.topo_order.tolist())}
+    assert all(position[workflow.index[u]] < position[workflow.index[v]] for u, v in workflow.edges())
+    # Critical path follows durations and has no slack
+    assert all(workflow.slack[n] == 0 for n in workflow.critical_path)
+    assert workflow.ef[workflow.index['STOP']] == workflow.durations[workflow.critical_path].sum()
+
+
+def test_critical_path_ends_at_the_latest_finish():
+    def row(name, minutes, deps):
+        return {'Step Name': name, 'Previous Task': deps, 'Dependencies': deps, 'Next Task': '', 'Task Type': 'Prep', 'Time (min)': str(minutes)}
+    # B starts before D but finishes last, and no zero-length terminal follows either
+    workflow = compile_workflow([row('A', 10, ''), row('B', 100, 'A'), row('C', 1, 'A'), row('D', 5, 'C')])
+    assert workflow.critical_names() == ['A', 'B']
+    assert workflow.slack.tolist() == [0, 0, 94, 94]
+
+
+def test_load_workflow_caches_by_content_hash(workflow_csv, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    workflow = load_workflow(workflow_csv, cache_dir=str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 1
+    # A fresh process reads the pickle instead of recompiling
+    monkeypatch.setattr(compiled_workflow, '_MEMO', {})
+    monkeypatch.setattr(compiled_workflow.CompiledWorkflow, 'from_csv_text', None)
+    again = load_workflow(workflow_csv, cache_dir=str(cache_dir))
+    assert again.steps == workflow.steps and (again.es == workflow.es).all()
+
+
+def test_network_diagram_exports_headless_with_batched_artists(tmp_path, workflow_csv):
+    from lab_simulation.core.network_diagram_from_csv import plot_network
+    workflow = load_workflow(workflow_csv, cache_dir=str(tmp_path / 'cache'))
+    fig = plot_network(workflow, path=str(tmp_path / 'network.png'))
+    plot_network(workflow, path=str(tmp_path / 'network.svg'))
+    assert (tmp_path / 'network.png').read_bytes()[:4] == b'\x89PNG'
+    assert b'<svg' in (tmp_path / 'network.svg').read_bytes()
+    # Edges, arrow heads, boxes and cell grid are one collection each, however large the workflow
+    (ax,) = fig.axes
+    assert len(ax.collections) == 4 and not ax.patches and not ax.lines
+    assert len(ax.texts) == len(workflow)
+
+
+
+def test_network_diagram_keeps_the_original_script_helpers(tmp_path, workflow_csv):
+    from lab_simulation.core import network_diagram_from_csv as diagram
+    steps, edges = diagram.read_workflow_csv(workflow_csv)
+    assert ('START', 'Sample Entry') in edges and ('Report', 'STOP') in edges
+    assert steps['STOP'] == {'Step Name': 'STOP', 'Task Type': 'stop', 'Time (min)': '0'}
+    workflow = load_workflow(workflow_csv)
+    es, ef, ls, lf, slack = diagram.compute_pert_times(workflow)
+    assert es['Report'] == 625 and lf['STOP'] == 715 and slack['Micronizing'] == 460
+    assert diagram.find_critical_path(workflow) == ['START', 'Sample Entry', 'Rock Cutting', 'Thin Section', 'Report']
+    fig = diagram.plot_network(steps, edges, path=str(tmp_path / 'network.png'))
+    assert len(fig.axes[0].texts) == len(steps)
+
+def test_scheduler_runs_workflows_whose_next_task_links_loop(workflow_steps):
+    # A rework link from Report back to Data Review makes the network cyclic; scheduling only follows Dependencies
+    looped = [dict(row, **{'Next Task': 'Data Review'}) if row['Step Name'] == 'Report' else row for row in workflow_steps]
+    sim = LabSimulationWithCalendar(calendar=LabCalendar(holiday_list=[]), n_tech=2, n_sci=1)
+    events = sim.simulate_sample_set(looped, 5, datetime.datetime(2025, 6, 30, 9, 0))
+    assert all(len(steps) == len(looped) for steps in events.values())
+    with pytest.raises(ValueError):
+        compile_workflow(looped).critical_path
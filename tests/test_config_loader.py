@@ -1,3 +1,5 @@
+import os
+from lab_simulation.core import config_loader
 from lab_simulation.core.config_loader import load_config
 
 def test_load_rock_analysis_config():
@@ -10,3 +12,41 @@ def test_load_rock_analysis_config():
     print('Equipment:', list(config['equipment'].keys()))
     print('Staff:', list(config['staff'].keys()))
     print('Workflow steps:', list(config['workflow_steps'].keys()))
+
+
+def test_cached_loads_are_copies_and_follow_edits(tmp_path, monkeypatch):
+    path = tmp_path / 'lab.yaml'
+    path.write_text('# comment\nequipment:\n  - name: XRF1\n    quantity: 1\n')
+    first = load_config(str(path))
+    first['equipment'].append('changed')
+    assert load_config(str(path)) == {'equipment': [{'name': 'XRF1', 'quantity': 1}]}
+    (snapshot,) = os.listdir(config_loader.CACHE_DIR)
+    assert snapshot.startswith('lab.yaml-') and snapshot.endswith('.pkl')
+    # A new process (empty memo) reads the disk snapshot instead of parsing
+    monkeypatch.setattr(config_loader, '_SNAPSHOTS', {})
+    monkeypatch.setattr(config_loader, '_parse', None)
+    assert load_config(str(path))['equipment'][0]['name'] == 'XRF1'
+    monkeypatch.undo()
+    # Editing the file changes mtime/size, so the snapshot is rebuilt
+    mtime = os.stat(path).st_mtime_ns
+    path.write_text('equipment:\n  - name: XRD1\n    quantity: 2\n')
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+    assert load_config(str(path))['equipment'][0]['name'] == 'XRD1'
+
+
+def test_damaged_snapshots_are_rebuilt(tmp_path, monkeypatch):
+    path = tmp_path / 'lab.yaml'
+    path.write_text('equipment:\n  - name: XRF1\n    quantity: 1\n')
+    load_config(str(path))
+    (snapshot,) = [os.path.join(config_loader.CACHE_DIR, name) for name in os.listdir(config_loader.CACHE_DIR)]
+    # A truncated body fails the length/SHA-256 check
+    with open(snapshot, 'r+b') as f:
+        f.truncate(os.path.getsize(snapshot) - 1)
+    monkeypatch.setattr(config_loader, '_SNAPSHOTS', {})
+    assert load_config(str(path))['equipment'][0]['name'] == 'XRF1'
+    # A body that matches its header but does not unpickle is deleted and rewritten from the file
+    key = config_loader._file_key(str(path))
+    config_loader._write_snapshot(key, b'not a pickle', None)
+    monkeypatch.setattr(config_loader, '_SNAPSHOTS', {})
+    assert load_config(str(path))['equipment'][0]['name'] == 'XRF1'
+    assert config_loader._read_snapshot(key, None) != b'not a pickle'
@@ -0,0 +1,82 @@
+import csv
+import datetime
+import json
+import threading
+import numpy as np
+import pytest
+from lab_simulation.core.event_sinks import BinarySink, CsvSink, JsonlSink, ProgressSink, SimulationCancelled, read_binary_schedule
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.schedule import ScheduleBuilder
+from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+BATCHING = {'enabled': True, 'default_batch_size': 3}
+
+
+def make_sim():
+    return LabSimulationWithCalendar(calendar=LabCalendar(holiday_list=[]), n_tech=2, n_sci=2, batching=BATCHING)
+
+
+def test_file_sinks_stream_the_same_schedule(workflow_steps, tmp_path):
+    sim = make_sim()
+    schedule = sim.simulate_schedule(workflow_steps, 10, START)
+    binary = sim.simulate_schedule(workflow_steps, 10, START, sink=BinarySink(str(tmp_path / 'run.bin')))
+    loaded = read_binary_schedule(binary)
+    assert loaded.steps == schedule.steps
+    assert loaded.to_sample_events() == schedule.to_sample_events()
+
+    sim.simulate_schedule(workflow_steps, 10, START, sink=CsvSink(str(tmp_path / 'run.csv')))
+    with open(tmp_path / 'run.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(schedule)
+    assert rows[0]['planned_start'] == START.isoformat()
+
+    sim.simulate_schedule(workflow_steps, 10, START, sink=JsonlSink(str(tmp_path / 'run.jsonl')))
+    with open(tmp_path / 'run.jsonl', encoding='utf-8') as f:
+        batches = [json.loads(line) for line in f]
+    assert sum(len(b['samples']) for b in batches) == len(schedule)
+
+
+def test_stats_match_the_full_schedule(workflow_steps, tmp_path):
+    sim = make_sim()
+    schedule = sim.simulate_schedule(workflow_steps, 10, START)
+    in_memory = sim.stats
+    sim.simulate_schedule(workflow_steps, 10, START, sink=BinarySink(str(tmp_path / 'run.bin')))
+    assert np.array_equal(sim.stats.last_end_by_sample(), schedule.last_end_by_sample())
+    assert sim.stats.step_counts() == in_memory.step_counts()
+    assert sim.stats.step_counts()['XRF Scan'] == {'batches': 4, 'samples': 10}
+    last = max(e['planned_end'] for events in schedule.to_sample_events().values() for e in events)
+    assert sim.stats.milestone_dates()[100] == last.date()
+
+
+def test_progress_sink_reports_and_cancels(workflow_steps, monkeypatch):
+    reports = []
+    sink = ProgressSink(lambda done, total, partial: reports.append((done, total, len(partial()))), interval=0)
+    schedule = make_sim().simulate_schedule(workflow_steps, 10, START, sink=sink)
+    assert schedule.to_sample_events() == make_sim().simulate_schedule(workflow_steps, 10, START).to_sample_events()
+    assert [r[2] for r in reports] == [r[0] for r in reports]
+    assert reports[-1][0] == len(schedule)
+
+    # Counts alone never build a partial table; only close() builds the result
+    builds = []
+    build = ScheduleBuilder.build
+    monkeypatch.setattr(ScheduleBuilder, 'build', lambda self: builds.append(len(self)) or build(self))
+    counts = []
+    sink = ProgressSink(lambda done, total, partial: counts.append(done), interval=0)
+    make_sim().simulate_schedule(workflow_steps, 10, START, sink=sink)
+    assert len(counts) > 2 and builds == [counts[-1]]
+
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(SimulationCancelled):
+        make_sim().simulate_schedule(workflow_steps, 10, START, sink=ProgressSink(cancel=cancel))
+
+
+def test_failed_run_aborts_file_sink(workflow_steps, tmp_path):
+    path = tmp_path / 'run.csv'
+    sink = CsvSink(str(path))
+    # No per-batch durations for the second step, so the run fails after the first step has been written
+    with pytest.raises(IndexError):
+        make_sim().simulate_schedule(workflow_steps, 10, START, durations={'Rock Cutting': []}, sink=sink)
+    assert sink._file is None
+    assert not path.exists()
@@ -0,0 +1,58 @@
+import concurrent.futures
+import datetime
+import pickle
+from lab_simulation.core.lab_calendar import LabCalendar, get_calendar
+
+HOLIDAYS = [datetime.date(2025, 7, 4), datetime.date(2025, 12, 25), datetime.date(2026, 1, 1)]
+
+
+def test_add_work_minutes_skips_evenings_weekends_and_holidays():
+    cal = LabCalendar(work_hours_per_day=7, holiday_list=HOLIDAYS)
+    # Thursday 3 July 2025, 15:00: one hour left today, Friday is a holiday
+    start = datetime.datetime(2025, 7, 3, 15, 0)
+    assert cal.add_work_minutes(start, 60) == datetime.datetime(2025, 7, 3, 16, 0)
+    assert cal.add_work_minutes(start, 61) == datetime.datetime(2025, 7, 7, 9, 1)
+    assert cal.add_work_minutes(start, 0) == start
+    assert cal.work_minutes_between(start, datetime.datetime(2025, 7, 7, 9, 1)) == 61
+
+
+def test_index_matches_day_by_day_walk():
+    cal = LabCalendar(work_hours_per_day=7.5, holiday_list=HOLIDAYS)
+    start = datetime.datetime(2025, 6, 27, 7, 0)
+    for step in range(0, 60 * 24 * 400, 2999):
+        dt = start + datetime.timedelta(minutes=step)
+        for minutes in (1, 450, 451, 40 * 450 + 13):
+            assert cal.add_work_minutes(dt, minutes) == cal._add_work_minutes_by_day(dt, minutes)
+        end = dt + datetime.timedelta(minutes=step // 3 + 1)
+        if dt.time() >= datetime.time(9, 0) or dt.date() != end.date():
+            assert cal.work_minutes_between(dt, end) == cal._work_minutes_between_by_day(dt, end)
+
+
+def test_index_extends_backwards_and_across_years():
+    cal = LabCalendar(holiday_list=[])
+    late = datetime.datetime(2030, 3, 1, 10, 0)
+    early = datetime.datetime(2024, 3, 1, 10, 0)
+    assert cal.add_work_minutes(late, 420) == datetime.datetime(2030, 3, 4, 10, 0)
+    assert cal.work_minutes_between(early, late) == cal._work_minutes_between_by_day(early, late)
+
+
+def test_get_calendar_is_shared_and_loads_country_holidays():
+    cal = get_calendar(country='US', work_hours_per_day=7)
+    assert get_calendar(country='US', work_hours_per_day=7) is cal
+    assert get_calendar(country='US', work_hours_per_day=8) is not cal
+    assert not cal.is_workday(datetime.date(2025, 7, 4))
+    assert not cal.is_workday(datetime.date(2031, 12, 25))
+    assert cal.is_workday(datetime.date(2025, 7, 3))
+    assert datetime.date(2025, 7, 4) in cal.holidays
+
+
+def test_shared_calendar_is_safe_across_threads():
+    # Threads starting in different years extend and rebuild the same lazily built index and holiday sets
+    cal = LabCalendar(country='US')
+    starts = [datetime.datetime(year, 3, 3, 10, 0) for year in range(2035, 2023, -1)] * 4
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda dt: cal.add_work_minutes(dt, 420 * 300), starts))
+    expected = LabCalendar(country='US')
+    assert results == [expected._add_work_minutes_by_day(dt, 420 * 300) for dt in starts]
+    # The lock is rebuilt when a calendar is sent to worker processes
+    assert pickle.loads(pickle.dumps(cal)).add_work_minutes(starts[0], 60) == expected.add_work_minutes(starts[0], 60)
@@ -0,0 +1,36 @@
+import datetime
+import numpy as np
+from lab_simulation.core.config_loader import load_config
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.monte_carlo import run_monte_carlo, sample_triangular, step_ranges_from_config
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+
+
+def test_sample_triangular_stays_in_range():
+    rng = np.random.default_rng(1)
+    draws = sample_triangular(rng, [[10], [5]], [[20], [5]], [[40], [5]], (2, 10000))
+    assert draws[0].min() >= 10 and draws[0].max() <= 40
+    assert abs(np.median(draws[0]) - 22.7) < 1
+    assert (draws[1] == 5).all()
+
+
+def test_config_ranges_convert_days_to_working_minutes():
+    ranges = step_ranges_from_config(load_config('rock_analysis_configs.txt'), work_hours_per_day=7)
+    assert ranges['XRF Elemental Analysis'] == (8, 10, 15)
+    assert ranges['CT Scanning'] == (3 * 420, 5 * 420, 10 * 420)
+
+
+def test_replications_are_seeded_and_spread_out(workflow_steps):
+    kwargs = dict(replications=6, seed=3, spread=(0.2, 0.5), calendar=LabCalendar(holiday_list=[]), n_tech=2, n_sci=2)
+    first = run_monte_carlo(workflow_steps, 12, START, **kwargs)
+    second = run_monte_carlo(workflow_steps, 12, START, **kwargs)
+    assert first['outcomes'] == second['outcomes']
+    days = first['business_days_to_100']
+    assert days['p10'] <= days['p50'] <= days['p90']
+
+
+def test_fixed_durations_give_a_single_outcome(workflow_steps):
+    report = run_monte_carlo(workflow_steps, 12, START, replications=3, calendar=LabCalendar(holiday_list=[]), n_tech=2, n_sci=2)
+    assert len(set(report['outcomes'])) == 1
+    assert report['date_100']['p10'] == report['date_100']['p90']
@@ -0,0 +1,83 @@
+import datetime
+import heapq
+from lab_simulation.core.analytics import summarize_completion
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core import multi_project
+from lab_simulation.core.multi_project import MultiProjectSimulation, Project
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+BATCHING = {'enabled': True, 'steps': {'XRF Scan': 10, 'XRD Scan': 6}, 'default_batch_size': 2}
+
+
+def make_sim(**kwargs):
+    return MultiProjectSimulation(calendar=LabCalendar(holiday_list=[]), batching=BATCHING, **kwargs)
+
+
+def test_every_project_sample_runs_every_step_after_its_dependencies(workflow_steps):
+    projects = [Project('a', workflow_steps, 12, START), Project('b', workflow_steps, 7, START + datetime.timedelta(days=3), priority=2)]
+    schedules = make_sim(n_tech=2, n_sci=1).simulate_projects(projects)
+    assert list(schedules) == ['a', 'b']
+    for project in projects:
+        sample_events = schedules[project.name].to_sample_events()
+        assert len(sample_events) == project.sample_count
+        for events in sample_events.values():
+            assert sorted(e['step'] for e in events) == sorted(row['Step Name'] for row in workflow_steps)
+            ends = {e['step']: e['planned_end'] for e in events}
+            for e in events:
+                assert e['planned_start'] >= project.arrival
+                row = next(r for r in workflow_steps if r['Step Name'] == e['step'])
+                for dep in [d.strip() for d in row['Dependencies'].split(';') if d.strip()]:
+                    assert e['planned_start'] >= ends[dep]
+
+
+def test_projects_share_resources_and_priority_breaks_ties(workflow_steps):
+    alone = make_sim(n_tech=1, n_sci=1).simulate_projects([Project('only', workflow_steps, 20, START)])['only']
+    schedules = make_sim(n_tech=1, n_sci=1).simulate_projects(
+        [Project('low', workflow_steps, 20, START), Project('high', workflow_steps, 20, START, priority=5)])
+    last_end = {name: int(table.end.max()) for name, table in schedules.items()}
+    # Competing for the same staff delays at least one project, and the urgent one finishes first
+    assert max(last_end.values()) > int(alone.end.max())
+    assert last_end['high'] <= last_end['low']
+    calendar = LabCalendar(holiday_list=[])
+    high = summarize_completion(schedules['high'], calendar, sim_start_date=START)
+    assert high['date_100'] is not None
+
+
+def batch_intervals(table, role):
+    # Rows of one batch are written together, so a batch is a run of rows with the same step, start and end
+    keys = list(zip(table.step.tolist(), table.start.tolist(), table.end.tolist(), table.role.tolist()))
+    return [(k[1], k[2]) for i, k in enumerate(keys) if k[3] == role and (i == 0 or keys[i - 1] != k)]
+
+
+def test_staff_never_double_booked(workflow_steps):
+    projects = [Project(f'p{i}', workflow_steps, 5 + i, START + datetime.timedelta(hours=i), priority=i % 3) for i in range(12)]
+    schedules = make_sim(n_tech=2, n_sci=2).simulate_projects(projects)
+    for role in (0, 1):
+        spans = [span for table in schedules.values() for span in batch_intervals(table, role)]
+        for start, _ in spans:
+            assert sum(1 for s, e in spans if s <= start < e) <= 2
+
+
+class CountingHeapq:
+    def __init__(self):
+        self.ops = 0
+
+    def heappush(self, heap, item):
+        self.ops += 1
+        heapq.heappush(heap, item)
+
+    def heappop(self, heap):
+        self.ops += 1
+        return heapq.heappop(heap)
+
+
+def test_heap_work_grows_linearly_with_batches(workflow_steps, monkeypatch):
+    ops_per_batch = []
+    for count in (20, 80):
+        counter = CountingHeapq()
+        monkeypatch.setattr(multi_project, 'heapq', counter)
+        projects = [Project(f'p{i}', workflow_steps, 5 + i % 7, START + datetime.timedelta(hours=3*i), priority=i % 3) for i in range(count)]
+        schedules = make_sim(n_tech=3, n_sci=2).simulate_projects(projects)
+        batches = sum(len(batch_intervals(table, 0)) + len(batch_intervals(table, 1)) for table in schedules.values())
+        ops_per_batch.append(counter.ops / batches)
+    assert ops_per_batch[1] < 1.5 * ops_per_batch[0]
@@ -0,0 +1,42 @@
+import datetime
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core import optimizer
+from lab_simulation.core.optimizer import DeadlineOptimizer, evaluate, max_batch_sizes
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+
+
+def test_finds_smallest_staff_meeting_deadline(workflow_steps):
+    calendar = LabCalendar(holiday_list=[])
+    limits = max_batch_sizes(workflow_steps)
+    grid = {(t, s): evaluate(t, s, limits, workflow_steps, 60, START, calendar, 'all', [])
+            for t in range(1, 5) for s in range(1, 5)}
+    # Only the larger tech counts make the tightest deadline
+    deadline = min(grid.values())
+    optimizer = DeadlineOptimizer(workflow_steps, 60, START, deadline, calendar=calendar, max_tech=4, max_sci=4)
+    result = optimizer.run()
+    assert result['feasible']
+    fewest = min(t + s for (t, s), days in grid.items() if days <= deadline)
+    assert result['n_tech'] + result['n_sci'] == fewest
+    assert result['business_days_to_100'] <= deadline
+    assert all(1 <= result['batch_sizes'][step] <= limit for step, limit in limits.items())
+    assert result['simulations'] == len(optimizer.results)
+
+
+def test_reports_infeasible_deadline(workflow_steps):
+    result = DeadlineOptimizer(workflow_steps, 60, START, 0, calendar=LabCalendar(holiday_list=[]), max_tech=3, max_sci=3).run()
+    assert not result['feasible'] and result['simulations'] == 1
+
+
+def test_extra_tech_that_misses_the_sci_cap_is_searched_in_full(workflow_steps, monkeypatch):
+    # Staffing that is not monotone: with 2 techs the 1-tech answer (3 sci) misses, and only 4 sci pass
+    def fake_evaluate(n_tech, n_sci, batch_sizes, **inputs):
+        passes = (n_tech == 1 and n_sci >= 3) or (n_tech == 2 and n_sci >= 4) or n_tech >= 3
+        return 10 if passes else 20
+    monkeypatch.setattr(optimizer, 'evaluate', fake_evaluate)
+    search = DeadlineOptimizer(workflow_steps, 60, START, 15, calendar=LabCalendar(holiday_list=[]), max_tech=4, max_sci=5)
+    assert search.optimize_staff({'Report': 1}) == (1, 3)
+    assert search.results[(2, 3, (('Report', 1),))] == 20
+    assert search.results[(2, 5, (('Report', 1),))] == 10
+    result = search.run()
+    assert result['feasible'] and result['business_days_to_100'] <= 15
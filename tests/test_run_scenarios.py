@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import pytest
+import run_scenarios
+from lab_simulation.core.results_store import ResultsStore
+
+
+def write_inputs(tmp_path, workflow_csv):
+    shutil.copy(workflow_csv, tmp_path / 'workflow.csv')
+    (tmp_path / 'lab_config.yaml').write_text("equipment:\n  - name: XRF1\n    quantity: 1\n")
+    (tmp_path / 'sim_config.yaml').write_text(
+        "samples: 12\nstart_date: '2025-06-30 09:00'\n"
+        "batching: {enabled: true, default_batch_size: 3}\n"
+        f"workflow_file: {tmp_path / 'workflow.csv'}\nlab_config_file: {tmp_path / 'lab_config.yaml'}\n")
+    (tmp_path / 'scenarios.yaml').write_text(
+        "scenarios:\n"
+        "  - {name: 'small', staff: {tech: 1, sci: 1}}\n"
+        "  - {name: 'large', staff: {tech: 3, sci: 2}}\n"
+        "  - {staff: {tech: 2, sci: 1}, samples: 5}\n")
+
+
+def test_parallel_sweep_matches_sequential(tmp_path, workflow_csv):
+    write_inputs(tmp_path, workflow_csv)
+    args = (str(tmp_path / 'scenarios.yaml'), str(tmp_path / 'sim_config.yaml'))
+    sequential = run_scenarios.run_scenarios(*args)
+    stream = io.StringIO()
+    parallel = run_scenarios.run_scenarios(*args, workers=2, stream=stream, output=str(tmp_path / 'summary.csv'))
+    assert parallel == sequential
+    assert [r['scenario'] for r in parallel] == ['small', 'large', 'tech2_sci1']
+    assert len(stream.getvalue().splitlines()) == 3
+    with open(tmp_path / 'summary.csv', encoding='utf-8') as f:
+        assert f.read().splitlines()[1].startswith('small,1,1,')
+
+
+def test_profile_writes_counters_and_pstats(tmp_path, workflow_csv):
+    write_inputs(tmp_path, workflow_csv)
+    profile_dir = tmp_path / 'profiles'
+    rows = run_scenarios.run_scenarios(str(tmp_path / 'scenarios.yaml'), str(tmp_path / 'sim_config.yaml'), profile_dir=str(profile_dir))
+    assert rows == run_scenarios.run_scenarios(str(tmp_path / 'scenarios.yaml'), str(tmp_path / 'sim_config.yaml'))
+    with open(profile_dir / 'small.json', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['peak_mb'] >= 0 and report['scheduler']['samples'] == 12
+    assert pstats.Stats(str(profile_dir / 'small.prof')).total_calls > 0
+    assert (profile_dir / 'tech2_sci1.json').exists()
+
+
+def test_scenarios_sharing_file_names_are_rejected_before_running(tmp_path, workflow_csv):
+    write_inputs(tmp_path, workflow_csv)
+    (tmp_path / 'scenarios.yaml').write_text(
+        "scenarios:\n"
+        "  - {name: 'a/b', staff: {tech: 1, sci: 1}}\n"
+        "  - {name: 'A_b', staff: {tech: 2, sci: 1}}\n")
+    with pytest.raises(ValueError, match="'a/b' and 'A_b'"):
+        run_scenarios.run_scenarios(str(tmp_path / 'scenarios.yaml'), str(tmp_path / 'sim_config.yaml'), charts_dir=str(tmp_path / 'charts'))
+    assert not (tmp_path / 'charts').exists()
+    # Without profiles or charts nothing is written per scenario, so the names are fine
+    assert len(run_scenarios.run_scenarios(str(tmp_path / 'scenarios.yaml'), str(tmp_path / 'sim_config.yaml'))) == 2
+
+
+def test_entry_points_import_without_side_effects(tmp_path):
+    # Run from an empty directory: importing must not read configs, simulate or load plotting/holiday packages
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import sys, run_scenarios, run_burn_plots, visualize_burn; "
+            "print(','.join(m for m in ('matplotlib', 'holidays', 'pandas') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=repo))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+
+
+def test_charts_render_headless_in_worker_processes(tmp_path, workflow_csv):
+    write_inputs(tmp_path, workflow_csv)
+    charts = tmp_path / 'charts'
+    run_scenarios.run_scenarios(str(tmp_path / 'scenarios.yaml'), str(tmp_path / 'sim_config.yaml'), workers=2,
+                                charts_dir=str(charts), chart_formats=('png', 'svg'))
+    names = sorted(p.name for p in charts.iterdir())
+    assert names == sorted(f'{scenario}_{chart}.{fmt}' for scenario in ('small', 'large', 'tech2_sci1')
+                           for chart in ('sample_burn', 'project_burn') for fmt in ('png', 'svg'))
+    assert (charts / 'small_project_burn.png').read_bytes()[:4] == b'\x89PNG'
+
+
+def test_store_reuses_unchanged_scenarios(tmp_path, workflow_csv, monkeypatch):
+    write_inputs(tmp_path, workflow_csv)
+    args = (str(tmp_path / 'scenarios.yaml'), str(tmp_path / 'sim_config.yaml'))
+    db = str(tmp_path / 'results.db')
+    first = run_scenarios.run_scenarios(*args, store=db, sweep='first', store_schedules=True)
+
+    # Change one scenario; only that one is simulated again
+    scenarios = tmp_path / 'scenarios.yaml'
+    scenarios.write_text(scenarios.read_text().replace('tech: 3, sci: 2', 'tech: 1, sci: 2'))
+    simulated = []
+    run_one = run_scenarios.run_scenario
+
+    def counting_run(scenario, *a, **kw):
+        simulated.append(run_scenarios.scenario_name(scenario))
+        return run_one(scenario, *a, **kw)
+    monkeypatch.setattr(run_scenarios, 'run_scenario', counting_run)
+    second = run_scenarios.run_scenarios(*args, store=db, sweep='second')
+    assert simulated == ['large']
+    assert second[0] == first[0] and second[2] == first[2]
+    assert second == run_scenarios.run_scenarios(*args)
+
+    with ResultsStore(db) as store:
+        assert [s['sweep'] for s in store.sweeps()] == ['first', 'second']
+        comparison = store.compare_sweeps('first', 'second')
+        assert [c['changed'] for c in comparison] == [False, True, False]
+        assert comparison[1]['delta'] == second[1]['days_to_100'] - first[1]['days_to_100']
+        stored = store.schedule(store.sweep_results('first')[0]['key'])
+        assert stored.sample_count == 12 and len(stored) > 0
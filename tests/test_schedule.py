@@ -0,0 +1,29 @@
+import datetime
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.schedule import ScheduleTable, from_minutes
+from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+
+
+def simulate(workflow_steps, sample_count=15):
+    sim = LabSimulationWithCalendar(calendar=LabCalendar(holiday_list=[]), n_tech=2, n_sci=1,
+                                    batching={'enabled': True, 'default_batch_size': 4})
+    return sim, sim.simulate_schedule(workflow_steps, sample_count, START)
+
+
+def test_columnar_schedule_rebuilds_sample_events(workflow_steps):
+    sim, schedule = simulate(workflow_steps)
+    sample_events = sim.simulate_sample_set(workflow_steps, 15, START)
+    assert len(schedule) == 15 * len(workflow_steps)
+    assert schedule.to_sample_events() == sample_events
+    assert schedule.events_for(3) == sample_events[3]
+    assert ScheduleTable.from_sample_events(sample_events).to_sample_events() == sample_events
+
+
+def test_last_end_by_sample(workflow_steps):
+    sim, schedule = simulate(workflow_steps)
+    sample_events = schedule.to_sample_events()
+    last = schedule.last_end_by_sample()
+    assert [from_minutes(m) for m in last] == [max(e['planned_end'] for e in events) for events in sample_events.values()]
+    assert schedule.start.dtype.name == 'int64' and schedule.step.dtype.name == 'int16'
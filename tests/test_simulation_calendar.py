@@ -0,0 +1,110 @@
+import datetime
+from lab_simulation.core.lab_calendar import LabCalendar
+from lab_simulation.core.simulation_calendar import LabSimulationWithCalendar
+from lab_simulation.resources.pools import ResourcePool
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+BATCHING = {'enabled': True, 'steps': {'XRF Scan': 10, 'XRD Scan': 6}, 'default_batch_size': 2, 'batch_policy': 'min'}
+
+
+def make_sim(**kwargs):
+    kwargs.setdefault('calendar', LabCalendar(holiday_list=[]))
+    return LabSimulationWithCalendar(**kwargs)
+
+
+def test_every_sample_runs_every_step_after_its_dependencies(workflow_steps):
+    sim = make_sim(n_tech=2, n_sci=1, batching=BATCHING)
+    sample_events = sim.simulate_sample_set(workflow_steps, sample_count=25, start_date=START)
+    step_names = [row['Step Name'] for row in workflow_steps]
+    assert len(sample_events) == 25
+    for events in sample_events.values():
+        assert [e['step'] for e in events] == step_names
+        ends = {e['step']: e['planned_end'] for e in events}
+        for e in events:
+            row = next(r for r in workflow_steps if r['Step Name'] == e['step'])
+            deps = [d.strip() for d in row['Dependencies'].split(';') if d.strip()]
+            # 'min' policy: a batch may start once any dependency is done
+            if deps:
+                assert e['planned_start'] >= min(ends[d] for d in deps)
+            assert e['planned_end'] >= e['planned_start']
+
+
+def test_batches_respect_batch_size(workflow_steps):
+    sim = make_sim(n_tech=3, n_sci=3, batching=BATCHING)
+    sample_events = sim.simulate_sample_set(workflow_steps, sample_count=40, start_date=START)
+    batches = {}
+    for events in sample_events.values():
+        for e in events:
+            key = (e['step'], e['planned_start'], e['planned_end'])
+            batches[key] = batches.get(key, 0) + 1
+    xrf_batches = [n for (step, _, _), n in batches.items() if step == 'XRF Scan']
+    assert max(xrf_batches) <= 10
+    assert sum(xrf_batches) == 40
+
+
+def test_unknown_dependency_skips_step(workflow_steps):
+    rows = [dict(r) for r in workflow_steps]
+    rows[-1]['Dependencies'] = 'Missing Step'
+    sim = make_sim(n_tech=1, n_sci=1)
+    sample_events = sim.simulate_sample_set(rows, sample_count=3, start_date=START)
+    assert all(e['step'] != 'Report' for events in sample_events.values() for e in events)
+
+
+def test_resource_pool_hands_out_earliest_free_unit():
+    pool = ResourcePool('tech', 3, START)
+    unit, ready = pool.acquire()
+    assert (unit, ready) == (0, START)
+    pool.release(unit, START + datetime.timedelta(hours=1))
+    assert pool.acquire() == (1, START)
+    assert pool.availability()[0] == START + datetime.timedelta(hours=1)
+
+
+def test_steps_sharing_equipment_contend_for_it(workflow_steps):
+    rows = [dict(r) for r in workflow_steps]
+    # Run both scans on the same single-unit instrument
+    equipment = [{'name': 'Scan', 'quantity': 1}]
+    sim = make_sim(n_tech=3, n_sci=3, batching=BATCHING, equipment=equipment)
+    sample_events = sim.simulate_sample_set(rows, sample_count=20, start_date=START)
+    runs = sorted({(e['planned_start'], e['planned_end']) for events in sample_events.values() for e in events if e['step'] in ('XRF Scan', 'XRD Scan')})
+    for (_, end), (next_start, _) in zip(runs, runs[1:]):
+        assert next_start >= end
+    assert sim.pools[('equipment', 'Scan')].capacity == 1
+
+
+def test_incremental_run_resumes_at_first_changed_step(workflow_steps):
+    def tables_equal(a, b):
+        return all((getattr(a, c) == getattr(b, c)).all() for c in ('sample', 'step', 'start', 'end', 'duration', 'role'))
+
+    batching = {'enabled': True, 'default_batch_size': 3, 'steps': {'Report': 10}}
+    sim = make_sim(batching=batching)
+    sim.simulate_schedule(workflow_steps, 30, START, incremental=True)
+    assert sim.resumed_from == 0
+    # Only the last step's batch size changes
+    sim.batching = {'enabled': True, 'default_batch_size': 3, 'steps': {'Report': 4}}
+    resumed = sim.simulate_schedule(workflow_steps, 30, START, incremental=True)
+    assert sim.resumed_from == len(workflow_steps) - 1
+    fresh = make_sim(batching=sim.batching)
+    assert tables_equal(resumed, fresh.simulate_schedule(workflow_steps, 30, START))
+    assert sim.stats.step_counts() == fresh.stats.step_counts()
+    # More scientists first matter at the first scientist step
+    sim.n_sci = 3
+    first_sci = next(i for i, row in enumerate(workflow_steps) if row['Task Type'] == 'data analysis')
+    resumed = sim.simulate_schedule(workflow_steps, 30, START, incremental=True)
+    assert sim.resumed_from == first_sci
+    assert tables_equal(resumed, make_sim(batching=sim.batching, n_sci=3).simulate_schedule(workflow_steps, 30, START))
+
+
+def test_profiling_counts_batches_and_calendar_calls(workflow_steps):
+    plain = make_sim(n_tech=2, n_sci=1, batching=BATCHING)
+    expected = plain.simulate_schedule(workflow_steps, sample_count=30, start_date=START).to_sample_events()
+    assert plain.profile is None
+    sim = make_sim(n_tech=2, n_sci=1, batching=BATCHING, profiling=True)
+    assert sim.simulate_schedule(workflow_steps, sample_count=30, start_date=START).to_sample_events() == expected
+    profile = sim.profile
+    assert [s['step'] for s in profile['steps']] == [row['Step Name'] for row in workflow_steps]
+    xrf = next(s for s in profile['steps'] if s['step'] == 'XRF Scan')
+    assert xrf['batches'] == 3 and xrf['queue_pops'] == 30
+    # Two add_work_minutes calls per batch
+    assert profile['totals']['calendar_calls'] == 2 * profile['totals']['batches']
+    assert profile['totals']['queue_pops'] == 30 * len(workflow_steps)
+    assert all(s[k] >= 0 for s in profile['steps'] for k in ('seconds', 'minutes_skipped', 'staff_wait_minutes'))
@@ -0,0 +1,41 @@
+import concurrent.futures
+import datetime
+import pytest
+from lab_simulation.core.simulation_service import SimulationService
+
+START = datetime.datetime(2025, 6, 30, 9, 0)
+BATCHING = {'enabled': True, 'default_batch_size': 2}
+EQUIPMENT = [{'name': 'XRF1', 'quantity': 1}]
+
+
+def test_repeated_requests_are_served_from_cache(workflow_csv):
+    service = SimulationService(cache_size=2, executor=concurrent.futures.ThreadPoolExecutor(max_workers=2))
+    try:
+        first = service.run(workflow_csv, 2, 1, BATCHING, 20, START, EQUIPMENT)
+        assert first['summary']['business_days_to_100'] > 0
+        assert first['percent_complete'][-1] == pytest.approx(100)
+        assert service.run(workflow_csv, 2, 1, dict(BATCHING), 20, START, EQUIPMENT) == first
+        assert (service.hits, service.misses) == (1, 1)
+        # Two more what-ifs push the least recently used one out
+        service.run(workflow_csv, 3, 1, BATCHING, 20, START, EQUIPMENT)
+        service.run(workflow_csv, 4, 1, BATCHING, 20, START, EQUIPMENT)
+        key = service.key(workflow_csv, 2, 1, BATCHING, 20, START, EQUIPMENT)
+        with pytest.raises(KeyError):
+            service.result(key)
+    finally:
+        service.close()
+
+
+def test_concurrent_requests_share_one_run(workflow_csv):
+    service = SimulationService(workers=2)
+    try:
+        keys = [service.submit(workflow_csv, 1, 1, BATCHING, 30, START, EQUIPMENT) for _ in range(3)]
+        other = service.submit(workflow_csv, 1, 1, BATCHING, 60, START, EQUIPMENT)
+        assert len(set(keys)) == 1 and other != keys[0]
+        assert service.misses == 2 and service.hits == 2
+        small = service.run(workflow_csv, 1, 1, BATCHING, 30, START, EQUIPMENT)
+        large = service.run(workflow_csv, 1, 1, BATCHING, 60, START, EQUIPMENT)
+        assert small['summary']['business_days_to_100'] < large['summary']['business_days_to_100']
+        assert service.result(keys[0]) == small
+    finally:
+        service.close()
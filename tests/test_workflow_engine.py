@@ -0,0 +1,72 @@
+import simpy
+from lab_simulation.core.config_loader import load_config
+from lab_simulation.core.process_runner import equipment_stats, run_step
+from lab_simulation.core.workflow_engine import WorkflowEngine
+from lab_simulation.processes.steps import Step
+from lab_simulation.resources.equipment import Equipment
+from lab_simulation.resources.staff import Staff
+
+
+def branch_config(staff):
+    return {
+        'instruments': {'xrf': {'name': 'XRF'}, 'xrd': {'name': 'XRD', 'capacity': '2'}},
+        'staff': staff,
+        'workflow_steps': {
+            'prep': {'name': 'Prep', 'duration': {'most_likely': 5}, 'can_batch': True, 'max_batch_size': 4},
+            'xrf': {'name': 'XRF', 'duration': {'most_likely': 10}, 'equipment_required': ['xrf'],
+                    'required_skills': ['xrf_operation'], 'skill_level': 'basic'},
+            'xrd': {'name': 'XRD', 'duration': {'most_likely': 60}, 'equipment_required': ['xrd'], 'can_batch': True, 'max_batch_size': 2},
+            'report': {'name': 'Report', 'duration': {'most_likely': 1}, 'unit': 'days', 'external_lab': 'vendor',
+                       'dependencies': ['xrf', 'xrd'], 'can_batch': True, 'max_batch_size': 4},
+        },
+        'workflow_dependencies': [{'from_step': 'prep', 'to_step': 'xrf'}, {'from_step': 'prep', 'to_step': 'xrd'}],
+    }
+
+
+def test_branches_and_batches_run_concurrently():
+    env = simpy.Environment()
+    staff = {'a': {'name': 'A', 'skills': {'xrf_operation': {'level': 'basic'}}}}
+    engine = WorkflowEngine.from_config(env, branch_config(staff), sample_count=4)
+    metrics = engine.run()
+    xrf = [m for m in metrics if m['step'] == 'XRF']
+    xrd = [m for m in metrics if m['step'] == 'XRD']
+    # XRF batches run one at a time on one instrument while both XRD units run side by side
+    assert [m['start'] for m in xrf] == [5, 15, 25, 35]
+    assert [m['start'] for m in xrd] == [5, 5]
+    assert all(m['staff'] == 'A' for m in xrf)
+    # Report waits for both branches, then one external day
+    assert engine.completion_times == [65 + 24 * 60]*4
+    assert env.now == 65 + 24 * 60
+
+
+def test_staff_level_none_cannot_take_step():
+    env = simpy.Environment()
+    staff = {'a': {'name': 'A', 'skills': {'xrf_operation': {'level': 'none'}}},
+             'b': {'name': 'B', 'skills': {'xrf_operation': {'level': 'expert'}}}}
+    metrics = WorkflowEngine.from_config(env, branch_config(staff), sample_count=2).run()
+    assert {m['staff'] for m in metrics if m['step'] == 'XRF'} == {'B'}
+    assert Staff(env, 'C', skills=['xrf_operation']).has_skill('xrf_operation')
+    assert not Staff(env, 'D', {'skills': {'xrd_operation': {'level': 'basic'}}}).has_skill('xrd_operation', 'intermediate')
+
+
+def test_rock_config_runs_to_completion():
+    env = simpy.Environment()
+    engine = WorkflowEngine.from_config(env, load_config('rock_analysis_configs.txt'), sample_count=20)
+    metrics = engine.run()
+    assert all(t is not None for t in engine.completion_times)
+    assert {m['step'] for m in metrics} == {s['name'] for s in load_config('rock_analysis_configs.txt')['workflow_steps'].values()}
+
+
+def test_run_step_balances_twin_units():
+    env = simpy.Environment()
+    equipment = {'mill_1': Equipment(env, 'Mill 1'), 'mill_2': Equipment(env, 'Mill 2')}
+    step = Step('Micronize', {'duration': {'most_likely': 15}, 'equipment_required': ['mill_1', 'mill_2']})
+    metrics = []
+    env.process(run_step(env, step, equipment, {}, sample_count=4, metrics=metrics))
+    env.run()
+    # Two units halve the makespan of four single-sample batches
+    assert env.now == 30
+    assert sorted(m['equipment'] for m in metrics) == ['mill_1', 'mill_1', 'mill_2', 'mill_2']
+    stats = equipment_stats(equipment)
+    assert stats['mill_1']['requests'] == 2 and stats['mill_1']['mean_wait'] == 7.5
+    assert stats['mill_2']['utilization'] == 1
@@ -20,3 +20,15 @@ def test_parse_and_graph():
     assert 'XRF' in graph['Prep'] and 'XRD' in graph['Prep']
     print('Parsed steps:', [s.name for s in steps])
     print('Graph:', dict(graph))
+
+
+def test_rows_keep_their_own_links(tmp_path):
+    path = tmp_path / 'workflow.csv'
+    path.write_text('Step Name,Previous Task,Dependencies,Next Task,Task Type,Time (min),Tool/Instrument,Attended,Batch?,Max Batch Size\n'
+                    'Prep,,,XRF;XRF,sample prep,15,,Yes,No,\n'
+                    'XRF,Prep,none,Report,instrument,10,XRF,No,No,\n'
+                    'Prep,XRF,"XRF, Prep",Report,sample prep,5,,Yes,No,\n', encoding='utf-8')
+    first, xrf, second = parse_workflow_csv(str(path))
+    assert first.next == ['XRF', 'XRF'] and first.prev == []
+    assert xrf.deps == ['none']
+    assert second.prev == ['XRF'] and second.deps == ['XRF, Prep']
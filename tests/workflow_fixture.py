@@ -0,0 +1,14 @@
+# The small rock workflow shared by the tests and the benchmarks
+WORKFLOW_COLUMNS = ['Step Name', 'Previous Task', 'Dependencies', 'Next Task', 'Task Type', 'Time (min)', 'Tool/Instrument', 'Attended', 'Batch?', 'Max Batch Size']
+
+WORKFLOW_ROWS = [
+    ['Sample Entry', '', '', 'Rock Cutting', 'sample entry', '5', '', 'Yes', 'Yes', '20'],
+    ['Rock Cutting', 'Sample Entry', 'Sample Entry', 'Micronizing;Thin Section', 'sample prep', '20', 'Rock Saw', 'Yes', 'Yes', '10'],
+    ['Micronizing', 'Rock Cutting', 'Rock Cutting', 'XRF Scan;XRD Scan', 'sample prep', '15', 'Micronizing Mill', 'Yes', 'No', '1'],
+    ['XRF Scan', 'Micronizing', 'Micronizing', 'Data Analysis', 'instrument', '10', 'XRF1', 'No', 'Yes', '40'],
+    ['XRD Scan', 'Micronizing', 'Micronizing', 'Data Analysis', 'instrument', '60', 'XRD1', 'No', 'Yes', '20'],
+    ['Thin Section', 'Rock Cutting', 'Rock Cutting', 'Report', 'sample prep', '600', 'Thin Section Machine', 'No', 'Yes', '20'],
+    ['Data Analysis', 'XRF Scan;XRD Scan', 'XRF Scan;XRD Scan', 'Data Review', 'data analysis', '45', '', 'Yes', 'Yes', '10'],
+    ['Data Review', 'Data Analysis', 'Data Analysis', 'Report', 'data review', '20', '', 'Yes', 'Yes', '20'],
+    ['Report', 'Data Review;Thin Section', 'Data Review;Thin Section', '', 'reporting', '90', '', 'Yes', 'Yes', '100'],
+]
@@ -1,88 +1,120 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import datetime
-from collections import defaultdict
+from lab_simulation.core.analytics import DailyActivity
+
+MAX_DAY_TICKS = 60
+SAMPLE_BURN_SIZE = (14, 6)
+PROJECT_BURN_SIZE = (14, 4)
 
 # Helper to color weekends/holidays
+def _shade_non_workdays(ax, activity, calendar, holidays):
+    # One broken_barh artist covering each run of consecutive non-workdays
+    dates = activity.dates()
+    day_numbers = activity.day_numbers()
+    off = [d.weekday() >= 5 or d in holidays or not calendar.is_workday(d) for d in dates]
+    spans = []
+    for n, is_off in zip(day_numbers.tolist(), off):
+        if not is_off:
+            continue
+        if spans and spans[-1][0] + spans[-1][1] == n - 0.5:
+            spans[-1] = (spans[-1][0], spans[-1][1] + 1)
+        else:
+            spans.append((n - 0.5, 1))
+    if spans:
+        # x in data units, y spanning the full axes height
+        ax.broken_barh(spans, (0, 1), transform=ax.get_xaxis_transform(), color='#f8d7da', alpha=0.4, zorder=0)
+
+def _label_days(ax, activity):
+    # Every indexed day gets a tick on short schedules; long ones keep at most MAX_DAY_TICKS,
+    # spaced evenly in time (indexed days cluster where work is dense)
+    all_days = activity.day_numbers()
+    spacing = (all_days[-1] - all_days[0]) / MAX_DAY_TICKS if len(all_days) else 0
+    keep = []
+    next_day = None
+    for i, n in enumerate(all_days.tolist()):
+        if next_day is None or n >= next_day:
+            keep.append(i)
+            next_day = n + spacing
+    day_numbers = all_days[keep]
+    dates = activity.dates()
+    ax.set_xticks(day_numbers)
+    ax.set_xticklabels([dates[i].strftime('%a %m-%d') for i in keep], rotation=45, ha='right')
+    # Day numbers along the top instead of one text artist per date
+    top = ax.secondary_xaxis('top')
+    top.set_xticks(day_numbers)
+    top.set_xticklabels([str(n) for n in day_numbers.tolist()], fontsize=8, color='gray', rotation=90)
 
-def plot_sample_burn(sample_events, calendar, holidays=None):
+def plot_sample_burn(schedule, calendar, holidays=None, activity=None, ax=None, show=True):
+    # schedule: a ScheduleTable, or the sample_events dict from simulate_sample_set
+    # activity: a precomputed DailyActivity for the same schedule, shared with plot_project_burn
+    # ax: draw on this axes instead of a new pyplot figure (show is then ignored)
+    activity = activity or DailyActivity.from_schedule(schedule)
     holidays = holidays or set()
-    fig, ax = plt.subplots(figsize=(14, 6))
-    all_dates = set()
-    for events in sample_events.values():
-        for e in events:
-            all_dates.add(e['planned_start'].date())
-            all_dates.add(e['planned_end'].date())
-    all_dates = sorted(all_dates)
+    if ax is None:
+        # Imported on first use, so importing this module does not load matplotlib
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=SAMPLE_BURN_SIZE)
+    else:
+        show = False
     # Use days from start as x-axis
-    day_numbers = [(d - all_dates[0]).days for d in all_dates]
-    # Color weekends/holidays and annotate day numbers
-    for i, d in enumerate(all_dates):
-        if d.weekday() >= 5 or d in holidays or not calendar.is_workday(d):
-            ax.axvspan(day_numbers[i] - 0.5, day_numbers[i] + 0.5, color='#f8d7da', alpha=0.4)
-        ax.text(day_numbers[i], ax.get_ylim()[1], str(day_numbers[i]), ha='center', va='bottom', fontsize=8, color='gray', rotation=90)
-    # Plot per-step activity
-    step_counts = defaultdict(lambda: [0]*len(all_dates))
-    date_idx = {d: i for i, d in enumerate(all_dates)}
-    for events in sample_events.values():
-        for e in events:
-            step = e['step']
-            start = e['planned_start'].date()
-            end = e['planned_end'].date()
-            for d in all_dates:
-                if start <= d <= end:
-                    step_counts[step][date_idx[d]] += 1
+    day_numbers = activity.day_numbers()
     # Cumulative per-step activity (burn-up)
-    step_cum = defaultdict(lambda: [0]*len(all_dates))
-    for step, counts in step_counts.items():
-        running = 0
-        for i, c in enumerate(counts):
-            running += c
-            step_cum[step][i] = running
-    for step, cum_counts in step_cum.items():
+    for step, cum_counts in zip(activity.steps, activity.cumulative_activity()):
         ax.plot(day_numbers, cum_counts, label=step)
-    ax.set_xticks(day_numbers)
-    ax.set_xticklabels([f"{d.strftime('%a %m-%d')}" for d in all_dates], rotation=45, ha='right')
+    _shade_non_workdays(ax, activity, calendar, holidays)
+    _label_days(ax, activity)
     ax.set_xlabel('Days from Start')
     ax.set_ylabel('Cumulative Samples Completed')
     ax.set_title('Per-Sample Burn Plot')
     ax.legend()
-    plt.tight_layout()
-    plt.show()
+    if show:
+        plt.tight_layout()
+        plt.show()
 
-def plot_project_burn(sample_events, calendar, holidays=None):
+def plot_project_burn(schedule, calendar, holidays=None, activity=None, ax=None, show=True):
+    activity = activity or DailyActivity.from_schedule(schedule)
     holidays = holidays or set()
-    fig, ax = plt.subplots(figsize=(14, 4))
-    all_dates = set()
-    for events in sample_events.values():
-        for e in events:
-            all_dates.add(e['planned_start'].date())
-            all_dates.add(e['planned_end'].date())
-    all_dates = sorted(all_dates)
-    # Use days from start as x-axis
-    day_numbers = [(d - all_dates[0]).days for d in all_dates]
-    for i, d in enumerate(all_dates):
-        if d.weekday() >= 5 or d in holidays or not calendar.is_workday(d):
-            ax.axvspan(day_numbers[i] - 0.5, day_numbers[i] + 0.5, color='#f8d7da', alpha=0.4)
-        ax.text(day_numbers[i], ax.get_ylim()[1], str(day_numbers[i]), ha='center', va='bottom', fontsize=8, color='gray', rotation=90)
+    if ax is None:
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=PROJECT_BURN_SIZE)
+    else:
+        show = False
     # Cumulative percent complete (burn-up)
-    total_steps = sum(len(events) for events in sample_events.values())
-    completed = [0]*len(all_dates)
-    date_idx = {d: i for i, d in enumerate(all_dates)}
-    for events in sample_events.values():
-        for e in events:
-            end = e['planned_end'].date()
-            idx = date_idx[end]
-            completed[idx] += 1
-    # Cumulative sum
-    for i in range(1, len(completed)):
-        completed[i] += completed[i-1]
-    percent = [c/total_steps*100 for c in completed]
-    ax.plot(day_numbers, percent, label='Project % Complete', color='navy')
-    ax.set_xticks(day_numbers)
-    ax.set_xticklabels([f"{d.strftime('%a %m-%d')}" for d in all_dates], rotation=45, ha='right')
+    ax.plot(activity.day_numbers(), activity.percent_complete(), label='Project % Complete', color='navy')
+    _shade_non_workdays(ax, activity, calendar, holidays)
+    _label_days(ax, activity)
     ax.set_xlabel('Days from Start')
     ax.set_ylabel('Percent Complete')
     ax.set_title('Project Burn Chart')
-    plt.tight_layout()
-    plt.show()
+    if show:
+        plt.tight_layout()
+        plt.show()
+
+# Figures reused across render_burn_charts calls in this process, by chart
+_FIGURES = {}
+# Fixed margins for rendered charts: the tick labels have a fixed format, so tight_layout's extra text pass is not needed
+RENDER_MARGINS = {'left': 0.06, 'right': 0.98, 'bottom': 0.2, 'top': 0.82}
+
+def _blank_axes(name, figsize):
+    # A bare Figure draws through the Agg/SVG canvases, so no display or pyplot state is involved
+    fig = _FIGURES.get(name)
+    if fig is None:
+        from matplotlib.figure import Figure
+        fig = _FIGURES[name] = Figure(figsize=figsize)
+    fig.clear()
+    fig.subplots_adjust(**RENDER_MARGINS)
+    return fig.add_subplot()
+
+def render_burn_charts(schedule, calendar, prefix, formats=('png',), holidays=None, activity=None, dpi=100):
+    """
+    Write both burn charts headlessly as <prefix>_sample_burn.<fmt> and <prefix>_project_burn.<fmt>.
+    The two figures are kept and reused by later calls in the same process. Returns the written paths.
+    """
+    activity = activity or DailyActivity.from_schedule(schedule)
+    paths = []
+    for name, plot, figsize in (('sample_burn', plot_sample_burn, SAMPLE_BURN_SIZE), ('project_burn', plot_project_burn, PROJECT_BURN_SIZE)):
+        ax = _blank_axes(name, figsize)
+        plot(schedule, calendar, holidays, activity, ax=ax)
+        for fmt in formats:
+            path = f'{prefix}_{name}.{fmt}'
+            ax.figure.savefig(path, dpi=dpi)
+            paths.append(path)
+    return paths
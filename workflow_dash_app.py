@@ -1,8 +1,10 @@
+import datetime
 import dash
-from dash import html
+from dash import dcc, html, Input, Output, State
 import dash_cytoscape as cyto
-import csv
-import networkx as nx
+from lab_simulation.core.compiled_workflow import load_workflow
+from lab_simulation.core.config_loader import load_config
+from lab_simulation.core.simulation_service import SimulationService
 
 # Define colors for different process types
 PROCESS_COLORS = {
@@ -16,68 +18,22 @@ PROCESS_COLORS = {
     'stop': 'gray',
 }
 
-def compute_pert_times(G, step_durations):
-    es = {n: 0 for n in G.nodes}
-    ef = {n: 0 for n in G.nodes}
-    for n in nx.topological_sort(G):
-        duration = step_durations.get(n, 0)
-        es[n] = max([ef[p] for p in G.predecessors(n)] or [0])
-        ef[n] = es[n] + duration
-    max_ef = max(ef.values())
-    lf = {n: max_ef for n in G.nodes}
-    ls = {n: max_ef for n in G.nodes}
-    for n in reversed(list(nx.topological_sort(G))):
-        duration = step_durations.get(n, 0)
-        lf[n] = min([ls[s] for s in G.successors(n)] or [max_ef])
-        ls[n] = lf[n] - duration
-    slack = {n: ls[n] - es[n] for n in G.nodes}
-    return es, ef, ls, lf, slack
-
 def build_elements(csv_path):
-    nodes = []  # Initialize nodes list
-    edges = []  # Initialize edges list
-    G = nx.DiGraph()  # Directed graph for critical path calculation
-    step_durations = {}  # Dictionary to store step durations
-    step_rows = {}
-    # Read CSV and build initial nodes and edges
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = list(csv.DictReader(csvfile))
-        for row in reader:
-            label = row['Step Name']
-            duration = row['Time (min)']
-            ttype = row['Task Type']
-            color = PROCESS_COLORS.get(ttype, 'gray')
-            step_durations[label] = int(duration) if duration.isdigit() else 0
-            step_rows[label] = row
-        for row in reader:
-            label = row['Step Name']
-            for nxt in row['Next Task'].replace(';', ',').split(','):
-                nxt = nxt.strip()
-                if nxt and nxt.lower() != 'none':
-                    edges.append({'data': {'source': label, 'target': nxt, 'id': f'{label}->{nxt}'}})
-                    G.add_edge(label, nxt)
-    # Add start/stop nodes and edges
-    nodes.append({'data': {'id': 'START', 'label': 'START'}, 'style': {'background-color': 'gray'}})
-    edges.append({'data': {'source': 'START', 'target': 'Sample Entry', 'id': 'START->Sample Entry'}})
-    nodes.append({'data': {'id': 'STOP', 'label': 'STOP'}, 'style': {'background-color': 'gray'}})
-    edges.append({'data': {'source': 'Report', 'target': 'STOP', 'id': 'Report->STOP'}})
-    G.add_edge('START', 'Sample Entry')
-    G.add_edge('Report', 'STOP')
-    # Compute CPM/PERT values
-    es, ef, ls, lf, slack = compute_pert_times(G, step_durations)
-    # Compute critical path
-    try:
-        cp = nx.algorithms.dag.dag_longest_path(G, weight=lambda u, v, d: step_durations.get(u, 0))
-        cp_edges = set((cp[i], cp[i+1]) for i in range(len(cp)-1))
-        cp_set = set(cp)
-    except Exception:
-        cp_edges = set()
-        cp_set = set()
-    # Build nodes with CPM/PERT labels
-    for label in step_durations:
-        ttype = step_rows[label]['Task Type']
+    # CPM/PERT values and the critical path come precomputed with the compiled workflow
+    workflow = load_workflow(csv_path)
+    nodes = []
+    edges = []
+    cp_edges = workflow.critical_edges()
+    cp_set = set(workflow.critical_names())
+    for node in range(len(workflow)):
+        label = workflow.steps[node]
+        ttype = workflow.task_types[node]
+        if workflow.row(node) is None:
+            # START/STOP terminals (and names referenced but never defined)
+            nodes.append({'data': {'id': label, 'label': label}, 'style': {'background-color': 'gray'}})
+            continue
         color = PROCESS_COLORS.get(ttype, 'gray')
-        node_label = f"{es[label]}|{step_durations[label]}|{ef[label]}\n{label}\n{ls[label]}|{slack[label]}|{lf[label]}"
+        node_label = f"{workflow.es[node]}|{workflow.durations[node]}|{workflow.ef[node]}\n{label}\n{workflow.ls[node]}|{workflow.slack[node]}|{workflow.lf[node]}"
         node_classes = ttype.replace(' ', '_')
         if label in cp_set:
             node_classes += ' critical_node'
@@ -86,53 +42,106 @@ def build_elements(csv_path):
             'classes': node_classes,
             'style': {'background-color': color}
         })
-    # Mark critical path edges
-    for edge in edges:
-        if (edge['data']['source'], edge['data']['target']) in cp_edges:
+    for source, target in workflow.edges():
+        edge = {'data': {'source': source, 'target': target, 'id': f'{source}->{target}'}}
+        # Mark critical path edges
+        if (source, target) in cp_edges:
             edge['classes'] = 'critical'
+        edges.append(edge)
     return nodes + edges
 
-# Build elements from CSV
-elements = build_elements('Rock_Workflow_CLEAN.csv')
+def serve_layout(csv_path, sim_config):
+    # Built per page load, so edits to the CSV show up without restarting the server
+    staff = sim_config.get('staff', {'tech': 2, 'sci': 2})
+    batching = sim_config.get('batching', {})
+    return html.Div([
+        html.H2('Interactive Project Network Diagram (Dash Cytoscape)'),
+        html.Div([
+            html.Label('Techs'), dcc.Input(id='n-tech', type='number', min=1, step=1, value=staff['tech']),
+            html.Label('Scientists'), dcc.Input(id='n-sci', type='number', min=1, step=1, value=staff['sci']),
+            html.Label('Default batch size'), dcc.Input(id='batch-size', type='number', min=1, step=1, value=batching.get('default_batch_size', 1)),
+            html.Label('Samples'), dcc.Input(id='samples', type='number', min=1, step=1, value=sim_config.get('samples', 100)),
+            html.Button('Simulate', id='simulate', n_clicks=0),
+        ], style={'display': 'flex', 'gap': '8px', 'alignItems': 'center'}),
+        # Key of the run being shown; polled until its result is ready
+        dcc.Store(id='run-key'),
+        dcc.Interval(id='poll', interval=500, disabled=True),
+        html.Div(id='run-status'),
+        dcc.Graph(id='burn-chart'),
+        cyto.Cytoscape(
+            id='cytoscape-workflow',
+            elements=build_elements(csv_path),
+            layout={'name': 'breadthfirst', 'directed': True, 'padding': 20, 'spacingFactor': 1.5},
+            style={'width': '100%', 'height': '900px'},
+            stylesheet=[
+                {'selector': 'node', 'style': {
+                    'label': 'data(label)',
+                    'text-valign': 'center',
+                    'text-halign': 'center',
+                    'shape': 'rectangle',
+                    'width': 120,
+                    'height': 60,
+                    'font-size': 14,
+                    'border-width': 2,
+                    'border-color': '#333',
+                }},
+                {'selector': 'edge', 'style': {
+                    'width': 3,
+                    'line-color': '#888',
+                    'target-arrow-color': '#888',
+                    'target-arrow-shape': 'triangle',
+                }},
+                {'selector': '.critical', 'style': {
+                    'line-color': 'crimson',
+                    'target-arrow-color': 'crimson',
+                    'width': 5,
+                }},
+            ]
+        )
+    ])
+
+def create_app(csv_path='Rock_Workflow_CLEAN.csv', sim_config_file='sim_config.yaml', service=None):
+    """
+    Dash app showing the workflow network, with what-if simulations run in the background by a SimulationService.
+    Callbacks only submit runs and poll for results, so the server never blocks on a simulation.
+    """
+    sim_config = load_config(sim_config_file)
+    lab_config = load_config(sim_config.get('lab_config_file', 'lab_config.yaml'))
+    start_date = datetime.datetime.strptime(sim_config.get('start_date', '2025-06-18 09:00'), '%Y-%m-%d %H:%M')
+    service = service or SimulationService()
+    app = dash.Dash(__name__)
+    app.layout = lambda: serve_layout(csv_path, sim_config)
+
+    @app.callback(Output('run-key', 'data'), Output('poll', 'disabled'), Output('run-status', 'children'),
+                  Input('simulate', 'n_clicks'), State('n-tech', 'value'), State('n-sci', 'value'),
+                  State('batch-size', 'value'), State('samples', 'value'), prevent_initial_call=True)
+    def submit_run(n_clicks, n_tech, n_sci, batch_size, samples):
+        batching = dict(sim_config.get('batching', {}), default_batch_size=int(batch_size or 1))
+        key = service.submit(csv_path, int(n_tech or 1), int(n_sci or 1), batching, int(samples or 1), start_date, lab_config['equipment'])
+        return key, False, 'Simulating...'
 
-# Initialize Dash app
-app = dash.Dash(__name__)
+    @app.callback(Output('burn-chart', 'figure'), Output('run-status', 'children', allow_duplicate=True),
+                  Output('poll', 'disabled', allow_duplicate=True),
+                  Input('poll', 'n_intervals'), State('run-key', 'data'), prevent_initial_call=True)
+    def show_result(n_intervals, key):
+        try:
+            result = service.result(key)
+        except Exception as e:
+            return dash.no_update, f'Simulation failed: {e}', True
+        if result is None:
+            return dash.no_update, 'Simulating...', False
+        summary = result['summary']
+        figure = {
+            'data': [{'x': result['days'], 'y': result['percent_complete'], 'type': 'scatter', 'name': 'Project % Complete'}],
+            'layout': {'title': 'Project Burn Chart', 'xaxis': {'title': 'Days from Start'}, 'yaxis': {'title': 'Percent Complete'}},
+        }
+        status = (f"50% in {summary['business_days_to_50']} business days ({summary['date_50']}), "
+                  f"100% in {summary['business_days_to_100']} business days ({summary['date_100']}) "
+                  f"[cache hits {service.hits}, runs {service.misses}]")
+        return figure, status, True
 
-# Define app layout
-app.layout = html.Div([
-    html.H2('Interactive Project Network Diagram (Dash Cytoscape)'),
-    cyto.Cytoscape(
-        id='cytoscape-workflow',
-        elements=elements,
-        layout={'name': 'breadthfirst', 'directed': True, 'padding': 20, 'spacingFactor': 1.5},
-        style={'width': '100%', 'height': '900px'},
-        stylesheet=[
-            {'selector': 'node', 'style': {
-                'label': 'data(label)',
-                'text-valign': 'center',
-                'text-halign': 'center',
-                'shape': 'rectangle',
-                'width': 120,
-                'height': 60,
-                'font-size': 14,
-                'border-width': 2,
-                'border-color': '#333',
-            }},
-            {'selector': 'edge', 'style': {
-                'width': 3,
-                'line-color': '#888',
-                'target-arrow-color': '#888',
-                'target-arrow-shape': 'triangle',
-            }},
-            {'selector': '.critical', 'style': {
-                'line-color': 'crimson',
-                'target-arrow-color': 'crimson',
-                'width': 5,
-            }},
-        ]
-    )
-])
+    return app
 
 # Run app
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)